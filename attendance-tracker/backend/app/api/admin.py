@@ -1,17 +1,38 @@
-from datetime import datetime
-from typing import Any, List, Optional
+import io
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, exc, func, select, true
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.core.attendance_io import (
+    EXPORT_MEDIA_TYPES,
+    export_formats,
+    export_query,
+    import_attendance_csv,
+    stream_arrow,
+    stream_csv,
+)
 from app.core.auth import (
     get_current_active_admin,
     get_current_active_superadmin,
-    get_password_hash,
+    get_password_hash_pooled,
 )
-from app.db.base import get_db
+from app.core.hashing import password_hasher
+from app.core.login_events import login_events
+from app.core.pagination import decode_cursor, keyset_after, set_next_cursor
+from app.core.presence import presence_tracker
+from app.core.principal_cache import Principal, principal_cache
+from app.core.stats_cache import stats_cache
+from app.core.rollups import office_attendance, recompute_rollups
+from app.core.serialization import FastJSONResponse, rows_response, schema_columns
+from app.core.timesheet import build_timesheet, day_boundaries, local_date, resolve_timezone
+from app.db.base import engine, get_db, get_pool_stats, get_read_db, read_engine
 from app.logger import logger
-from app.models.models import Office, User, UserLoginHistory, AttendanceRecord
+from app.models.models import DailyOfficeAttendance, Office, User, UserLoginHistory
 from app.schemas.schemas import (
     AdminUserCreate,
     AdminUserUpdate,
@@ -27,27 +48,43 @@ router = APIRouter()
 # User Management Endpoints (Admin only)
 @router.get("/users", response_model=List[UserExtended])
 def get_users(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_admin: User = Depends(get_current_active_admin),
+    cursor: Optional[str] = None,
+    current_admin: Principal = Depends(get_current_active_admin),
 ) -> Any:
-    """Get all users (admin only).
+    """Get all users ordered by ID (admin only).
+    
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch
+    the next page; ``skip`` is ignored when a cursor is given. Rows are
+    selected as column tuples and serialized without per-row models.
     
     Args:
+        response: Response, used to set the next-page cursor header
         db: Database session
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor from a previous page
         current_admin: Current authenticated admin user
     
     Returns:
         List of users
     """
-    # CORRECT
-    users = db.query(User).order_by(User.id).offset(skip).limit(limit).all()
+    query = db.query(*schema_columns(UserExtended, User)).order_by(User.id)
+    
+    if cursor:
+        (after_id,) = decode_cursor(cursor, int)
+        query = query.filter(User.id > after_id)
+    else:
+        query = query.offset(skip)
+    
+    users = query.limit(limit).all()
+    set_next_cursor(response, users, limit, lambda u: (u.id,))
 
     logger.info("Admin %s retrieved user list (%d users)", current_admin.username, len(users))
-    return users
+    return rows_response(users, response)
 
 
 @router.post("/users", response_model=UserExtended)
@@ -55,7 +92,7 @@ def create_user(
     *,
     db: Session = Depends(get_db),
     user_in: AdminUserCreate,
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: Principal = Depends(get_current_active_admin),
 ) -> Any:
     """Create a new user (admin only).
     
@@ -100,7 +137,7 @@ def create_user(
     db_user = User(
         email=user_in.email,
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=get_password_hash_pooled(user_in.password),
         full_name=user_in.full_name,
         is_active=user_in.is_active,
         is_admin=user_in.is_admin,
@@ -123,7 +160,7 @@ def create_user(
 def get_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: Principal = Depends(get_current_active_admin),
 ) -> Any:
     """Get a specific user (admin only).
     
@@ -156,7 +193,7 @@ def update_user(
     db: Session = Depends(get_db),
     user_id: int,
     user_in: AdminUserUpdate,
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: Principal = Depends(get_current_active_admin),
 ) -> Any:
     """Update a user (admin only).
     
@@ -197,12 +234,13 @@ def update_user(
     
     # Handle password update
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = get_password_hash_pooled(update_data.pop("password"))
     
     for field, value in update_data.items():
         setattr(user, field, value)
     
     db.add(user)
+    principal_cache.evict_user(db, user.id)
     db.commit()
     db.refresh(user)
     
@@ -215,7 +253,7 @@ def delete_user(
     *,
     db: Session = Depends(get_db),
     user_id: int,
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: Principal = Depends(get_current_active_admin),
 ) -> None:
     """Delete a user (admin only).
     
@@ -255,6 +293,7 @@ def delete_user(
         )
     
     db.delete(user)
+    principal_cache.evict_user(db, user.id)
     db.commit()
     
     logger.info("Admin %s deleted user %s", current_admin.username, user.username)
@@ -263,30 +302,50 @@ def delete_user(
 # Login History Endpoints
 @router.get("/login-history", response_model=List[LoginHistory])
 def get_login_history(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     user_id: Optional[int] = None,
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: Principal = Depends(get_current_active_admin),
 ) -> Any:
-    """Get login history (admin only).
+    """Get login history, newest first (admin only).
+    
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch
+    the next page; ``skip`` is ignored when a cursor is given. Rows are
+    selected as column tuples and serialized without per-row models.
     
     Args:
+        response: Response, used to set the next-page cursor header
         db: Database session
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor from a previous page
         user_id: Filter by user ID (optional)
         current_admin: Current authenticated admin user
     
     Returns:
         List of login history records
     """
-    query = db.query(UserLoginHistory)
+    query = db.query(*schema_columns(LoginHistory, UserLoginHistory))
     
     if user_id:
         query = query.filter(UserLoginHistory.user_id == user_id)
     
-    records = query.order_by(UserLoginHistory.login_time.desc()).offset(skip).limit(limit).all()
+    query = query.order_by(UserLoginHistory.login_time.desc(), UserLoginHistory.id.desc())
+    
+    if cursor:
+        query = query.filter(keyset_after(
+            (UserLoginHistory.login_time, UserLoginHistory.id),
+            decode_cursor(cursor, datetime, int),
+            descending=True,
+        ))
+    else:
+        query = query.offset(skip)
+    
+    records = query.limit(limit).all()
+    set_next_cursor(response, records, limit, lambda r: (r.login_time, r.id))
     
     logger.info(
         "Admin %s retrieved login history (%d records)%s", 
@@ -295,17 +354,19 @@ def get_login_history(
         f" for user ID {user_id}" if user_id else ""
     )
     
-    return records
+    return rows_response(records, response)
 
 
 # Dashboard Stats Endpoint
 @router.get("/dashboard-stats")
 def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_active_admin),
+    db: Session = Depends(get_read_db),
+    current_admin: Principal = Depends(get_current_active_admin),
 ) -> Any:
     """Get dashboard statistics (admin only).
     
+    Results are cached for ``DASHBOARD_STATS_CACHE_SECONDS``.
+    
     Args:
         db: Database session
         current_admin: Current authenticated admin user
@@ -313,47 +374,342 @@ def get_dashboard_stats(
     Returns:
         Dashboard statistics
     """
-    # Count total users
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    admin_users = db.query(User).filter(User.is_admin == True).count()
-    
-    # Count offices
-    total_offices = db.query(Office).count()
-    
-    # Count today's attendance
-    today = datetime.now().date()
-    today_attendance = db.query(AttendanceRecord).filter(
-        AttendanceRecord.check_in_time >= today
-    ).count()
-    
-    # Count active logins
-    active_logins = db.query(UserLoginHistory).filter(
-        UserLoginHistory.logout_time.is_(None)
-    ).count()
+    # One TIMESHEET_TIMEZONE day for every counter and the cache key
+    today = local_date(datetime.utcnow())
+    stats = stats_cache.get_or_compute(
+        ("dashboard", today), lambda: _query_dashboard_stats(db, today)
+    )
     
-    # Count today's logins
-    today_logins = db.query(UserLoginHistory).filter(
-        UserLoginHistory.login_time >= today
-    ).count()
+    logger.info("Admin %s retrieved dashboard stats", current_admin.username)
+    return stats
+
+
+def _query_dashboard_stats(db: Session, today: date) -> Dict[str, Any]:
+    """Compute all dashboard counts in a single round trip.
     
-    stats = {
+    Each table is aggregated in its own one-row subquery and the subqueries
+    are cross joined. Attendance comes from the daily office rollup and the
+    login subqueries are range or filtered-index seeks, so their cost
+    follows today's activity and the number of offices rather than table
+    size.
+    
+    Args:
+        db: Database session
+        today: Day to count, in ``TIMESHEET_TIMEZONE``
+    
+    Returns:
+        Dashboard statistics
+    """
+    users = select(
+        func.count().label("total"),
+        func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0).label("active"),
+        func.coalesce(func.sum(case((User.is_admin == True, 1), else_=0)), 0).label("admins"),
+    ).select_from(User).subquery()
+    
+    offices = select(func.count().label("total")).select_from(Office).subquery()
+    
+    # Check-ins on today's rollup day, in TIMESHEET_TIMEZONE
+    attendance_today = select(
+        func.coalesce(func.sum(DailyOfficeAttendance.check_ins), 0).label("today")
+    ).where(
+        DailyOfficeAttendance.work_date == today
+    ).subquery()
+    
+    logins_active = select(func.count().label("active")).where(
+        UserLoginHistory.logout_time.is_(None)
+    ).subquery()
+    
+    # login_time is naive UTC; count from the UTC instant of local midnight
+    day_start = day_boundaries(today, today, resolve_timezone(None))[0].item()
+    logins_today = select(func.count().label("today")).where(
+        UserLoginHistory.login_time >= day_start
+    ).subquery()
+    
+    row = db.execute(
+        select(
+            users.c.total, users.c.active, users.c.admins,
+            offices.c.total.label("offices_total"),
+            attendance_today.c.today.label("attendance_today"),
+            logins_active.c.active.label("logins_active"),
+            logins_today.c.today.label("logins_today"),
+        ).select_from(users).join(offices, true()).join(attendance_today, true())
+        .join(logins_active, true()).join(logins_today, true())
+    ).one()
+    
+    return {
         "users": {
-            "total": total_users,
-            "active": active_users,
-            "admins": admin_users
+            "total": row.total,
+            "active": row.active,
+            "admins": row.admins
         },
         "offices": {
-            "total": total_offices
+            "total": row.offices_total
         },
         "attendance": {
-            "today": today_attendance
+            "today": row.attendance_today
         },
         "logins": {
-            "active": active_logins,
-            "today": today_logins
+            "active": row.logins_active,
+            "today": row.logins_today
         }
     }
+
+
+# Timesheet Endpoint
+@router.get("/timesheet")
+def get_timesheet(
+    start_date: date,
+    end_date: date,
+    group_by: str = "day",
+    tz: Optional[str] = None,
+    user_id: Optional[int] = None,
+    office_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+    current_admin: Principal = Depends(get_current_active_admin),
+) -> Any:
+    """Get worked hours per user, office and day, week or range (admin only).
     
-    logger.info("Admin %s retrieved dashboard stats", current_admin.username)
+    Served from the daily rollup in ``TIMESHEET_TIMEZONE``; other time
+    zones are computed from the attendance records.
+    
+    Args:
+        start_date: First day of the report
+        end_date: Last day of the report
+        group_by: "day", "week" or "total"
+        tz: Time zone the days are in (default ``TIMESHEET_TIMEZONE``)
+        user_id: Only report this user
+        office_id: Only report this office
+        db: Database session
+        current_admin: Current authenticated admin user
+    
+    Returns:
+        Worked time rows; open records count up to now
+    
+    Raises:
+        HTTPException: If the range, grouping or time zone is invalid
+    """
+    if end_date < start_date or (end_date - start_date).days >= settings.TIMESHEET_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be 1 to {settings.TIMESHEET_MAX_DAYS} days",
+        )
+    
+    try:
+        rows = build_timesheet(db, start_date, end_date, tz, group_by, user_id, office_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info("Admin %s retrieved timesheet (%d rows)", current_admin.username, len(rows))
+    # Rows are plain JSON types; skip response model validation on large reports
+    return FastJSONResponse(rows)
+
+
+# Office Attendance Endpoints
+@router.get("/office-attendance")
+def get_office_attendance(
+    start_date: date,
+    end_date: date,
+    office_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+    current_admin: Principal = Depends(get_current_active_admin),
+) -> Any:
+    """Get check-ins, distinct visitors and worked hours per office and day (admin only).
+    
+    Served entirely from the daily office rollup; days are in
+    ``TIMESHEET_TIMEZONE``.
+    
+    Args:
+        start_date: First day of the report
+        end_date: Last day of the report
+        office_id: Only report this office
+        db: Database session
+        current_admin: Current authenticated admin user
+    
+    Returns:
+        One row per office and day with activity
+    
+    Raises:
+        HTTPException: If the date range is invalid
+    """
+    if end_date < start_date or (end_date - start_date).days >= settings.TIMESHEET_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be 1 to {settings.TIMESHEET_MAX_DAYS} days",
+        )
+    
+    rows = office_attendance(db, start_date, end_date, office_id)
+    
+    logger.info("Admin %s retrieved office attendance (%d rows)", current_admin.username, len(rows))
+    return rows
+
+
+@router.post("/rollups/recompute")
+def recompute_daily_rollups(
+    start_date: date,
+    end_date: date,
+    current_admin: Principal = Depends(get_current_active_superadmin),
+) -> Any:
+    """Rebuild the daily rollups for a date range from attendance records (super admin only).
+    
+    Idempotent; use it to repair the rollups after records were edited
+    outside the API. Longer backfills should use ``attendance_data.py backfill``.
+    
+    Args:
+        start_date: First day to rebuild
+        end_date: Last day to rebuild
+        current_admin: Current authenticated super admin user
+    
+    Returns:
+        Number of rollup rows written
+    
+    Raises:
+        HTTPException: If the date range is invalid
+    """
+    if end_date < start_date or (end_date - start_date).days >= settings.TIMESHEET_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be 1 to {settings.TIMESHEET_MAX_DAYS} days",
+        )
+    
+    with engine.begin() as conn:
+        rows = recompute_rollups(conn, start_date, end_date)
+    stats_cache.invalidate()
+    
+    logger.info(
+        "Super admin %s recomputed rollups from %s to %s (%d rows)",
+        current_admin.username, start_date, end_date, rows
+    )
+    return {"rows": rows}
+
+
+# Attendance Export / Import Endpoints
+@router.get("/attendance/export")
+def export_attendance(
+    file_format: str = Query("csv", alias="format"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    office_id: Optional[int] = None,
+    current_admin: Principal = Depends(get_current_active_admin),
+) -> Any:
+    """Stream attendance records with user and office names (admin only).
+    
+    Rows are fetched in batches of ``EXPORT_BATCH_SIZE`` from the read
+    replica when one is configured, so memory use does not grow with the
+    date range.
+    
+    Args:
+        file_format: "csv", or "parquet" / "arrow" when pyarrow is installed
+        start_date: First check-in date to include
+        end_date: Last check-in date to include
+        office_id: Only export records of this office
+        current_admin: Current authenticated admin user
+    
+    Returns:
+        Streaming file download
+    
+    Raises:
+        HTTPException: If the format is not available
+    """
+    if file_format not in export_formats():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format; available: {', '.join(export_formats())}",
+        )
+    
+    query = export_query(start_date, end_date, office_id)
+    source = read_engine or engine
+    chunks = stream_csv(source, query) if file_format == "csv" else stream_arrow(source, query, file_format)
+    
+    filename = f"attendance_{start_date or 'start'}_{end_date or 'now'}.{file_format}"
+    logger.info("Admin %s exported attendance as %s", current_admin.username, file_format)
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/attendance/import")
+def import_attendance(
+    file: UploadFile = File(...),
+    current_admin: Principal = Depends(get_current_active_superadmin),
+) -> Any:
+    """Bulk insert attendance records from a CSV file (super admin only).
+    
+    Accepts the CSV produced by the export. The import is all or nothing.
+    
+    Args:
+        file: CSV file
+        current_admin: Current authenticated super admin user
+    
+    Returns:
+        Number of imported records
+    
+    Raises:
+        HTTPException: If the CSV is invalid or references unknown users or offices
+    """
+    try:
+        with engine.begin() as conn:
+            imported = import_attendance_csv(
+                conn, io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except exc.IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Import references unknown users or offices",
+        )
+    
+    stats_cache.invalidate()
+    
+    logger.info("Super admin %s imported %d attendance records", current_admin.username, imported)
+    return {"imported": imported}
+
+
+# Presence Endpoint
+@router.get("/presence")
+def get_presence(
+    current_admin: Principal = Depends(get_current_active_admin),
+) -> Any:
+    """Get the users inside each office according to location pings (admin only).
+    
+    Presence is tracked per worker process; this reports the users whose
+    pings reached the worker serving the request.
+    
+    Args:
+        current_admin: Current authenticated admin user
+    
+    Returns:
+        Sorted user IDs per office ID
+    """
+    present = {office_id: sorted(user_ids) for office_id, user_ids in presence_tracker.present().items()}
+    
+    logger.info("Admin %s retrieved presence", current_admin.username)
+    return present
+
+
+# System Stats Endpoint
+@router.get("/system-stats")
+def get_system_stats(
+    current_admin: Principal = Depends(get_current_active_admin),
+) -> Any:
+    """Get runtime statistics of this worker process (admin only).
+    
+    Args:
+        current_admin: Current authenticated admin user
+    
+    Returns:
+        Password hashing pool, database pool, login event queue, presence
+        tracker and logging statistics
+    """
+    stats = {
+        "password_hashing": password_hasher.stats(),
+        "database_pool": get_pool_stats(),
+        "login_events": login_events.stats(),
+        "presence": presence_tracker.stats(),
+        "logging": {"dropped_records": logger.dropped},
+    }
+    
+    logger.info("Admin %s retrieved system stats", current_admin.username)
     return stats
@@ -1,16 +1,40 @@
-from datetime import datetime
-from typing import Any, List
+import asyncio
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.config import settings
 from app.core.auth import get_current_active_user
+from app.core.conditional import conditional_response, make_etag
+from app.core.events import OFFICES_CHANNEL, event_bus, user_channel
 from app.core.geofence import GeofenceService
-from app.db.base import get_db
+from app.core.office_cache import office_cache
+from app.core.pagination import decode_cursor, keyset_after, set_next_cursor
+from app.core.presence import (
+    PresenceEvent,
+    apply_attendance,
+    ndjson_batches,
+    open_attendance_offices,
+    parse_pings,
+    presence_tracker,
+)
+from app.core.principal_cache import Principal
+from app.core.rollups import record_check_in, record_check_out
+from app.core.serialization import FastJSONResponse, rows_response, schema_columns
+from app.core.timesheet import build_timesheet
+from app.db.base import get_async_db, get_async_read_db, get_db, get_read_db
 from app.logger import logger
-from app.models.models import AttendanceRecord, Office, User
+from app.models.models import AttendanceRecord
 from app.schemas.schemas import (
     AttendanceRecord as AttendanceRecordSchema,
+    BatchLocationCheck,
     CheckInCreate,
     CheckOutCreate,
     GeofenceStatus,
@@ -21,11 +45,11 @@ router = APIRouter()
 
 
 @router.post("/check-location", response_model=List[GeofenceStatus])
-def check_location(
+async def check_location(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     location_data: LocationCheck,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """Check if a location is within any geofence.
     
@@ -39,7 +63,7 @@ def check_location(
     """
     # If office_id is provided, check against that specific office
     if location_data.office_id:
-        office = db.query(Office).filter(Office.id == location_data.office_id).first()
+        office = await db.run_sync(office_cache.get, location_data.office_id)
         
         if not office:
             logger.warning("Office not found for location check: ID %d", location_data.office_id)
@@ -47,16 +71,23 @@ def check_location(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Office not found"
             )
             
-        status = GeofenceService.check_within_geofence(
+        geofence_status = GeofenceService.check_within_geofence(
             location_data.latitude, location_data.longitude, office
         )
         
-        return [status]
+        return [geofence_status]
     
-    # Otherwise, check against all offices
-    results = GeofenceService.check_all_geofences(
-        db, location_data.latitude, location_data.longitude
-    )
+    # Otherwise, check against all offices (or only the containing ones)
+    if location_data.within_only:
+        results = await db.run_sync(
+            GeofenceService.check_containing_geofences,
+            location_data.latitude, location_data.longitude
+        )
+    else:
+        results = await db.run_sync(
+            GeofenceService.check_all_geofences,
+            location_data.latitude, location_data.longitude
+        )
     
     logger.info(
         "Location check for user %s at (%f, %f): %d offices checked",
@@ -66,12 +97,82 @@ def check_location(
     return results
 
 
-@router.post("/check-in", response_model=AttendanceRecordSchema)
-def check_in(
+# Kept as a sync handler: batch evaluation is CPU-bound and should run in
+# the threadpool rather than on the event loop
+@router.post("/check-location/batch", response_model=List[List[GeofenceStatus]])
+def check_location_batch(
     *,
     db: Session = Depends(get_db),
+    batch: BatchLocationCheck,
+    current_user: Principal = Depends(get_current_active_user),
+) -> Any:
+    """Check many locations against the office geofences in one request.
+    
+    Each item follows the same rules as ``/check-location``. Large batches
+    are streamed back as a JSON array instead of being built in memory.
+    
+    Args:
+        db: Database session
+        batch: Locations to check
+        current_user: Current authenticated user
+    
+    Returns:
+        List of geofence status lists, one per location, in input order
+    
+    Raises:
+        HTTPException: If the batch is too large or references an unknown office
+    """
+    locations = batch.locations
+    
+    if len(locations) > settings.BATCH_LOCATION_MAX_ITEMS:
+        logger.warning(
+            "User %s sent oversized location batch (%d items)",
+            current_user.username, len(locations)
+        )
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BATCH_LOCATION_MAX_ITEMS} locations are allowed per batch.",
+        )
+    
+    missing = sorted({
+        item.office_id for item in locations
+        if item.office_id and office_cache.get(db, item.office_id) is None
+    })
+    
+    if missing:
+        logger.warning("Offices not found for batch location check: IDs %s", missing)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Office not found: {', '.join(map(str, missing))}",
+        )
+    
+    results = GeofenceService.check_batch(db, locations)
+    
+    logger.info(
+        "Batch location check for user %s: %d locations",
+        current_user.username, len(locations)
+    )
+    
+    if len(locations) > settings.BATCH_LOCATION_STREAM_THRESHOLD:
+        return StreamingResponse(_stream_json_array(results), media_type="application/json")
+    
+    return list(results)
+
+
+def _stream_json_array(rows: Iterator[List[GeofenceStatus]]) -> Iterator[str]:
+    """Serialize geofence status lists as a JSON array, one row at a time."""
+    yield "["
+    for i, statuses in enumerate(rows):
+        yield ("," if i else "") + json.dumps([s.dict() for s in statuses])
+    yield "]"
+
+
+@router.post("/check-in", response_model=AttendanceRecordSchema)
+async def check_in(
+    *,
+    db: AsyncSession = Depends(get_async_db),
     check_in_data: CheckInCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """Check in to an office.
     
@@ -87,7 +188,7 @@ def check_in(
         HTTPException: If office not found or user not within geofence
     """
     # Check if the office exists
-    office = db.query(Office).filter(Office.id == check_in_data.office_id).first()
+    office = await db.run_sync(office_cache.get, check_in_data.office_id)
     
     if not office:
         logger.warning("Office not found for check-in: ID %d", check_in_data.office_id)
@@ -96,10 +197,13 @@ def check_in(
         )
     
     # Check if user is already checked in
-    active_record = db.query(AttendanceRecord).filter(
-        AttendanceRecord.user_id == current_user.id,
-        AttendanceRecord.check_out_time.is_(None)
-    ).first()
+    result = await db.execute(
+        select(AttendanceRecord).where(
+            AttendanceRecord.user_id == current_user.id,
+            AttendanceRecord.check_out_time.is_(None)
+        ).limit(1)
+    )
+    active_record = result.scalars().first()
     
     if active_record:
         logger.warning(
@@ -136,24 +240,30 @@ def check_in(
         check_in_longitude=check_in_data.longitude,
     )
     
+    await db.run_sync(record_check_in, attendance_record)
     db.add(attendance_record)
-    db.commit()
-    db.refresh(attendance_record)
+    await db.commit()
+    await db.refresh(attendance_record)
     
     logger.info(
         "User %s checked in at office %s (Record ID: %d)",
         current_user.username, office.name, attendance_record.id
     )
     
+    event_bus.publish(
+        user_channel(current_user.id), "check_in",
+        AttendanceRecordSchema.from_orm(attendance_record).dict(),
+    )
+    
     return attendance_record
 
 
 @router.post("/check-out", response_model=AttendanceRecordSchema)
-def check_out(
+async def check_out(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     check_out_data: CheckOutCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """Check out from an office.
     
@@ -169,10 +279,13 @@ def check_out(
         HTTPException: If no active check-in found
     """
     # Find active attendance record
-    attendance_record = db.query(AttendanceRecord).filter(
-        AttendanceRecord.user_id == current_user.id,
-        AttendanceRecord.check_out_time.is_(None)
-    ).first()
+    result = await db.execute(
+        select(AttendanceRecord).where(
+            AttendanceRecord.user_id == current_user.id,
+            AttendanceRecord.check_out_time.is_(None)
+        ).limit(1)
+    )
+    attendance_record = result.scalars().first()
     
     if not attendance_record:
         logger.warning("User %s attempted check-out without active check-in", current_user.username)
@@ -187,59 +300,232 @@ def check_out(
     attendance_record.check_out_longitude = check_out_data.longitude
     
     db.add(attendance_record)
-    db.commit()
-    db.refresh(attendance_record)
+    await db.run_sync(record_check_out, attendance_record)
+    await db.commit()
+    await db.refresh(attendance_record)
+    
+    office = await db.run_sync(office_cache.get, attendance_record.office_id)
     
     logger.info(
         "User %s checked out from office %s (Record ID: %d)",
-        current_user.username, attendance_record.office.name, attendance_record.id
+        current_user.username, office.name if office else attendance_record.office_id,
+        attendance_record.id
+    )
+    
+    event_bus.publish(
+        user_channel(current_user.id), "check_out",
+        AttendanceRecordSchema.from_orm(attendance_record).dict(),
     )
     
     return attendance_record
 
 
+@router.post("/pings")
+async def ingest_pings(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+) -> Any:
+    """Feed a stream of NDJSON location pings into the presence state machine.
+    
+    The body is read and evaluated ``PRESENCE_BATCH_SIZE`` lines at a
+    time. Pings only update in-memory state; the database is touched only
+    for enter and exit events, to seed users from their open attendance
+    record and check them in and out when ``PRESENCE_AUTO_ATTENDANCE`` is
+    on. Admins may send pings for other users with ``user_id``.
+    
+    Args:
+        request: Request with an ``application/x-ndjson`` body
+        db: Database session
+        current_user: Current authenticated user
+    
+    Returns:
+        Counts of accepted and rejected pings, the enter and exit events
+        and the number of attendance records opened or closed
+    """
+    engine = await db.run_sync(office_cache.get_engine)
+    accepted = inaccurate = attendance_changes = 0
+    errors: List[str] = []
+    events = []
+    line = 1
+    
+    async for lines in ndjson_batches(request.stream(), settings.PRESENCE_BATCH_SIZE):
+        pings = parse_pings(lines, current_user.id, current_user.is_admin, line)
+        line += len(lines)
+        accepted += len(pings.times)
+        inaccurate += pings.inaccurate
+        errors.extend(pings.errors)
+        
+        if settings.PRESENCE_AUTO_ATTENDANCE:
+            unknown = presence_tracker.unknown(pings.user_ids.tolist())
+            if unknown:
+                presence_tracker.seed(await db.run_sync(open_attendance_offices, unknown))
+        
+        # CPU-bound; keep it off the event loop
+        batch_events = await run_in_threadpool(presence_tracker.process, engine, pings)
+        if settings.PRESENCE_AUTO_ATTENDANCE and batch_events:
+            attendance_changes += await db.run_sync(apply_attendance, batch_events)
+            await db.commit()
+        _publish_presence(batch_events)
+        events.extend(batch_events)
+    
+    expired = presence_tracker.expire()
+    if settings.PRESENCE_AUTO_ATTENDANCE and expired:
+        attendance_changes += await db.run_sync(apply_attendance, expired)
+        await db.commit()
+    _publish_presence(expired)
+    events.extend(expired)
+    
+    if errors:
+        logger.warning(
+            "User %s sent %d invalid pings, first: %s", current_user.username, len(errors), errors[0]
+        )
+    logger.info(
+        "User %s sent %d pings: %d presence events, %d attendance changes",
+        current_user.username, accepted, len(events), attendance_changes
+    )
+    
+    return {
+        "accepted": accepted,
+        "inaccurate": inaccurate,
+        "rejected": len(errors),
+        "errors": errors[:10],
+        "events": [event.to_dict() for event in events],
+        "attendance_changes": attendance_changes,
+    }
+
+
+def _publish_presence(events: Sequence[PresenceEvent]) -> None:
+    """Push presence events to the users they belong to."""
+    for event in events:
+        event_bus.publish(user_channel(event.user_id), f"geofence_{event.kind}", event.to_dict())
+
+
+@router.get("/events")
+async def stream_events(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+) -> Any:
+    """Push status changes of the current user as server-sent events.
+    
+    The client authenticates once when opening the stream instead of
+    polling ``/status`` and ``/check-location``. Each event is a ``data:``
+    line holding ``{"event": ..., "data": ...}``, where event is one of
+    ``check_in`` and ``check_out`` (data is the attendance record),
+    ``geofence_enter`` and ``geofence_exit`` (data is the presence event),
+    ``offices_changed`` (data has ``action`` and ``office_id``) and
+    ``resync``, sent when the client fell behind and should re-fetch its
+    state. The stream ends after ``EVENTS_MAX_STREAM_SECONDS``; clients
+    reconnect with their current token.
+    
+    Args:
+        db: Database session, closed before streaming starts
+        current_user: Current authenticated user
+    
+    Returns:
+        ``text/event-stream`` response
+    """
+    # Authentication is done; don't hold a pooled connection for the whole stream
+    await db.close()
+    
+    logger.info("User %s opened an event stream", current_user.username)
+    
+    return StreamingResponse(
+        _event_stream([user_channel(current_user.id), OFFICES_CHANNEL]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _event_stream(channels: List[str]) -> AsyncIterator[str]:
+    """Format messages of the channels as server-sent events, with keepalives.
+    
+    The response cancels this generator when the client disconnects, which
+    closes the subscription.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_MAX_STREAM_SECONDS
+    with event_bus.subscribe(channels) as subscription:
+        # Tell EventSource clients how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            message = await subscription.get(min(settings.EVENTS_KEEPALIVE_SECONDS, remaining))
+            yield f"data: {message}\n\n" if message is not None else ": keepalive\n\n"
+
+
 @router.get("/history", response_model=List[AttendanceRecordSchema])
-def get_attendance_history(
+async def get_attendance_history(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
-    """Get attendance history for the current user.
+    """Get attendance history for the current user, newest first.
+    
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch
+    the next page; ``skip`` is ignored when a cursor is given. Rows are
+    selected as column tuples and serialized without per-row models.
     
     Args:
         db: Database session
+        response: Response, used to set the next-page cursor header
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor from a previous page
         current_user: Current authenticated user
     
     Returns:
         List of attendance records
     """
-    records = db.query(AttendanceRecord).filter(
+    query = select(*schema_columns(AttendanceRecordSchema, AttendanceRecord)).where(
         AttendanceRecord.user_id == current_user.id
     ).order_by(
-        AttendanceRecord.check_in_time.desc()
-    ).offset(skip).limit(limit).all()
+        AttendanceRecord.check_in_time.desc(), AttendanceRecord.id.desc()
+    )
+    
+    if cursor:
+        query = query.where(keyset_after(
+            (AttendanceRecord.check_in_time, AttendanceRecord.id),
+            decode_cursor(cursor, datetime, int),
+            descending=True,
+        ))
+    else:
+        query = query.offset(skip)
+    
+    result = await db.execute(query.limit(limit))
+    records = result.all()
+    set_next_cursor(response, records, limit, lambda r: (r.check_in_time, r.id))
     
     logger.info(
         "Retrieved %d attendance records for user %s",
         len(records), current_user.username
     )
     
-    return records
+    return rows_response(records, response)
 
 
 @router.get("/status", response_model=AttendanceRecordSchema)
-def get_attendance_status(
+async def get_attendance_status(
     *,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """Get current attendance status for the user.
     
+    An open record does not change until check-out, so its ID is its
+    ETag; a matching ``If-None-Match`` returns 304 without serializing it.
+    
     Args:
+        request: Request, used for conditional headers
+        response: Response, used to set cache validator headers
         db: Database session
         current_user: Current authenticated user
     
@@ -249,10 +535,13 @@ def get_attendance_status(
     Raises:
         HTTPException: If no active check-in found
     """
-    record = db.query(AttendanceRecord).filter(
-        AttendanceRecord.user_id == current_user.id,
-        AttendanceRecord.check_out_time.is_(None)
-    ).first()
+    result = await db.execute(
+        select(AttendanceRecord).where(
+            AttendanceRecord.user_id == current_user.id,
+            AttendanceRecord.check_out_time.is_(None)
+        ).limit(1)
+    )
+    record = result.scalars().first()
     
     if not record:
         logger.info("User %s has no active check-in", current_user.username)
@@ -261,9 +550,55 @@ def get_attendance_status(
             detail="No active check-in found.",
         )
     
+    not_modified = conditional_response(
+        request, response, make_etag("status", record.id), record.check_in_time
+    )
+    if not_modified is not None:
+        return not_modified
+    
     logger.info(
         "Retrieved active attendance record for user %s (Record ID: %d)",
         current_user.username, record.id
     )
     
-    return record
\ No newline at end of file
+    return record
+
+
+@router.get("/timesheet")
+def get_timesheet(
+    start_date: date,
+    end_date: date,
+    group_by: str = "day",
+    tz: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_active_user),
+) -> Any:
+    """Get worked hours of the current user per office and day or week.
+    
+    Args:
+        start_date: First day of the report
+        end_date: Last day of the report
+        group_by: "day", "week" or "total"
+        tz: Time zone the days are in (default ``TIMESHEET_TIMEZONE``)
+        db: Database session
+        current_user: Current authenticated user
+    
+    Returns:
+        Worked time rows; open records count up to now
+    
+    Raises:
+        HTTPException: If the range, grouping or time zone is invalid
+    """
+    if end_date < start_date or (end_date - start_date).days >= settings.TIMESHEET_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be 1 to {settings.TIMESHEET_MAX_DAYS} days",
+        )
+    
+    try:
+        rows = build_timesheet(db, start_date, end_date, tz, group_by, user_id=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info("User %s retrieved timesheet (%d rows)", current_user.username, len(rows))
+    return FastJSONResponse(rows)
@@ -1,20 +1,26 @@
 from datetime import datetime, timedelta
 from typing import Any, Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.core.auth import (
     create_access_token,
     get_current_active_user,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_and_update_password_async,
     get_current_user,
     get_current_active_admin
 )
-from app.db.base import get_db
+from app.core.conditional import conditional_response, make_etag
+from app.core.login_events import login_events
+from app.core.pagination import decode_cursor, keyset_after, set_next_cursor
+from app.core.principal_cache import Principal
+from app.db.base import get_async_db, get_read_db
 from app.logger import logger
 from app.models.models import User, UserLoginHistory
 from app.schemas.schemas import Token, User as UserSchema, UserCreate, LoginHistory
@@ -23,7 +29,7 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserSchema)
-def register_user(*, db: Session = Depends(get_db), user_in: UserCreate) -> Any:
+async def register_user(*, db: AsyncSession = Depends(get_async_db), user_in: UserCreate) -> Any:
     """Register a new user.
     
     Args:
@@ -37,9 +43,12 @@ def register_user(*, db: Session = Depends(get_db), user_in: UserCreate) -> Any:
         HTTPException: If user already exists
     """
     # Check if user already exists
-    user = db.query(User).filter(
-        (User.email == user_in.email) | (User.username == user_in.username)
-    ).first()
+    result = await db.execute(
+        select(User).where(
+            (User.email == user_in.email) | (User.username == user_in.username)
+        ).limit(1)
+    )
+    user = result.scalars().first()
     
     if user:
         logger.warning(
@@ -55,41 +64,63 @@ def register_user(*, db: Session = Depends(get_db), user_in: UserCreate) -> Any:
     db_user = User(
         email=user_in.email,
         username=user_in.username,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
         full_name=user_in.full_name,
         is_active=True,
         is_admin=False,
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     logger.info("User registered successfully: %s", db_user.username)
     return db_user
 
 
 @router.get("/me", response_model=UserSchema)
-def read_users_me(current_user: User = Depends(get_current_active_user)) -> Any:
+async def read_users_me(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user),
+) -> Any:
     """Get current user information.
     
+    Returns 304 without serializing the user when ``If-None-Match``
+    matches its ``updated_at`` and ``last_login``.
+    
     Args:
+        request: Request, used for conditional headers
+        response: Response, used to set cache validator headers
+        db: Database session
         current_user: Current authenticated user
     
     Returns:
         Current user data
     """
-    return current_user
+    result = await db.execute(select(User).where(User.id == current_user.id))
+    user = result.scalars().first()
+    
+    if user is not None:
+        last_modified = max((t for t in (user.updated_at, user.last_login) if t is not None), default=None)
+        not_modified = conditional_response(
+            request, response, make_etag("me", user.id, user.updated_at, user.last_login), last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+    
+    return user
 
 # Add this dependency to auth.py
-def get_current_active_superadmin(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_superadmin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Get the current active super admin user.
     
     Args:
         current_user: Current user from token
     
     Returns:
-        User object if active and super admin
+        Principal if active and super admin
     
     Raises:
         HTTPException: If user is not a super admin
@@ -103,9 +134,9 @@ def get_current_active_superadmin(current_user: User = Depends(get_current_user)
 
 # Update the login_for_access_token function to track login history
 @router.post("/login", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     request: Request,
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """Login and get access token.
@@ -122,39 +153,45 @@ def login_for_access_token(
         HTTPException: If authentication fails
     """
     # Check if user exists
-    user = db.query(User).filter(User.username == form_data.username).first()
+    result = await db.execute(select(User).where(User.username == form_data.username))
+    user = result.scalars().first()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    is_valid, new_hash = False, None
+    if user:
+        is_valid, new_hash = await verify_and_update_password_async(
+            form_data.password, user.hashed_password
+        )
+
+    if not user or not is_valid:
         logger.warning("Failed login attempt for username: %s", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     if not user.is_active:
         logger.warning("Login attempt by inactive user: %s", user.username)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
 
-    # Update last login time
-    user.last_login = datetime.utcnow()
-    
-    # Record login history
-    client_host = request.client.host if request.client else None
-    user_agent = request.headers.get("user-agent")
-    
-    login_record = UserLoginHistory(
-        user_id=user.id,
-        login_time=datetime.utcnow(),
-        ip_address=client_host,
-        user_agent=user_agent
+    # Upgrade the stored hash to the configured bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+        logger.info(
+            "Rehashed password for user %s with bcrypt cost %d",
+            user.username, settings.BCRYPT_ROUNDS
+        )
+
+    # Record login history and last login time off the request path
+    login_events.record_login(
+        user.id,
+        datetime.utcnow(),
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
     )
-    
-    db.add(login_record)
-    db.add(user)
-    db.commit()
 
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -166,31 +203,22 @@ def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/logout")
-def logout(
+async def logout(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ) -> Any:
     """Logout the current user.
     
+    The latest open login session is closed by the login event writer.
+    
     Args:
         request: Request object to get client info
-        db: Database session
         current_user: Current authenticated user
     
     Returns:
         Success message
     """
-    # Find active login session
-    active_session = db.query(UserLoginHistory).filter(
-        UserLoginHistory.user_id == current_user.id,
-        UserLoginHistory.logout_time.is_(None)
-    ).order_by(UserLoginHistory.login_time.desc()).first()
-    
-    if active_session:
-        active_session.logout_time = datetime.utcnow()
-        db.add(active_session)
-        db.commit()
+    login_events.record_logout(current_user.id, datetime.utcnow())
     
     logger.info("User logged out: %s", current_user.username)
     return {"detail": "Successfully logged out"}
@@ -198,18 +226,25 @@ def logout(
 # Login History Endpoints
 @router.get("/login-history", response_model=List[LoginHistory])
 def get_login_history(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     user_id: Optional[int] = None,
-    current_admin: User = Depends(get_current_active_admin),
+    current_admin: Principal = Depends(get_current_active_admin),
 ) -> Any:
-    """Get login history (admin only).
+    """Get login history, newest first (admin only).
+    
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch
+    the next page; ``skip`` is ignored when a cursor is given.
     
     Args:
+        response: Response, used to set the next-page cursor header
         db: Database session
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor from a previous page
         user_id: Filter by user ID (optional)
         current_admin: Current authenticated admin user
     
@@ -221,7 +256,19 @@ def get_login_history(
     if user_id:
         query = query.filter(UserLoginHistory.user_id == user_id)
     
-    records = query.order_by(UserLoginHistory.login_time.desc()).offset(skip).limit(limit).all()
+    query = query.order_by(UserLoginHistory.login_time.desc(), UserLoginHistory.id.desc())
+    
+    if cursor:
+        query = query.filter(keyset_after(
+            (UserLoginHistory.login_time, UserLoginHistory.id),
+            decode_cursor(cursor, datetime, int),
+            descending=True,
+        ))
+    else:
+        query = query.offset(skip)
+    
+    records = query.limit(limit).all()
+    set_next_cursor(response, records, limit, lambda r: (r.login_time, r.id))
     
     logger.info(
         "Admin %s retrieved login history (%d records)%s", 
@@ -1,38 +1,100 @@
-from typing import Any, List
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_active_admin, get_current_active_user
-from app.db.base import get_db
+from app.core.conditional import conditional_response, make_etag
+from app.core.events import OFFICES_CHANNEL, event_bus
+from app.core.office_cache import OFFICES_CACHE_NAME, office_cache
+from app.core.pagination import decode_cursor, set_next_cursor
+from app.core.polygon import geojson_to_wkb, wkb_to_geojson
+from app.core.principal_cache import Principal
+from app.core.serialization import rows_response, schema_columns
+from app.db.base import get_db, get_read_db
 from app.logger import logger
-from app.models.models import Office, User
+from app.models.models import CacheVersion, Office
 from app.schemas.schemas import Office as OfficeSchema, OfficeCreate, OfficeUpdate
 
 router = APIRouter()
 
 
+def _offices_etag(db: Session, *params: Any) -> Tuple[str, Optional[datetime]]:
+    """Build the validators of the office list without loading it.
+
+    The shared office version changes on every write through the API,
+    including deletes; the row count and latest ``updated_at`` also catch
+    edits made directly in the database.
+
+    Args:
+        db: Database session
+        params: Query parameters that select the page
+
+    Returns:
+        Tuple of ETag and Last-Modified time
+    """
+    stamp = select(CacheVersion.version, CacheVersion.updated_at).where(
+        CacheVersion.name == OFFICES_CACHE_NAME
+    ).subquery()
+    count, latest, version, changed = db.execute(select(
+        select(func.count(Office.id)).scalar_subquery(),
+        select(func.max(Office.updated_at)).scalar_subquery(),
+        select(stamp.c.version).scalar_subquery(),
+        select(stamp.c.updated_at).scalar_subquery(),
+    )).one()
+    
+    last_modified = max((t for t in (latest, changed) if t is not None), default=None)
+    return make_etag("offices", version, count, latest, *params), last_modified
+
+
 @router.get("/", response_model=List[OfficeSchema])
 def read_offices(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
-    """Retrieve all offices.
+    """Retrieve all offices ordered by ID.
+    
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch
+    the next page; ``skip`` is ignored when a cursor is given. Returns 304
+    without loading offices when ``If-None-Match`` matches. Rows are
+    selected as column tuples and serialized without per-row models.
     
     Args:
+        request: Request, used for conditional headers
+        response: Response, used to set the next-page cursor and cache validator headers
         db: Database session
         skip: Number of records to skip
         limit: Maximum number of records to return
+        cursor: Cursor from a previous page
         current_user: Current authenticated user
     
     Returns:
         List of offices
     """
-    offices = db.query(Office).order_by(Office.id).offset(skip).limit(limit).all()
+    etag, last_modified = _offices_etag(db, skip, limit, cursor)
+    not_modified = conditional_response(request, response, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    
+    query = db.query(*schema_columns(OfficeSchema, Office)).order_by(Office.id)
+    
+    if cursor:
+        (after_id,) = decode_cursor(cursor, int)
+        query = query.filter(Office.id > after_id)
+    else:
+        query = query.offset(skip)
+    
+    offices = query.limit(limit).all()
+    set_next_cursor(response, offices, limit, lambda o: (o.id,))
     logger.info("Retrieved %d offices", len(offices))
-    return offices
+    return rows_response(offices, response, {"geofence": wkb_to_geojson})
 
 
 @router.post("/", response_model=OfficeSchema)
@@ -40,7 +102,7 @@ def create_office(
     *,
     db: Session = Depends(get_db),
     office_in: OfficeCreate,
-    current_user: User = Depends(get_current_active_admin),
+    current_user: Principal = Depends(get_current_active_admin),
 ) -> Any:
     """Create a new office with geofence.
     
@@ -58,11 +120,16 @@ def create_office(
         latitude=office_in.latitude,
         longitude=office_in.longitude,
         radius=office_in.radius,
+        geofence=geojson_to_wkb(office_in.geofence),
     )
     
     db.add(office)
+    db.flush()
+    version = office_cache.record_change(db)
     db.commit()
     db.refresh(office)
+    office_cache.upsert(office, version)
+    event_bus.publish(OFFICES_CHANNEL, "offices_changed", {"action": "created", "office_id": office.id})
     
     logger.info(
         "Office created: %s at (%f, %f) with radius %f meters", 
@@ -74,13 +141,20 @@ def create_office(
 @router.get("/{office_id}", response_model=OfficeSchema)
 def read_office(
     office_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_active_user),
 ) -> Any:
     """Get a specific office by ID.
     
+    Returns 304 without serializing the office when ``If-None-Match``
+    matches its ``updated_at``.
+    
     Args:
         office_id: ID of the office
+        request: Request, used for conditional headers
+        response: Response, used to set cache validator headers
         db: Database session
         current_user: Current authenticated user
     
@@ -97,6 +171,12 @@ def read_office(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Office not found"
         )
+    
+    not_modified = conditional_response(
+        request, response, make_etag("office", office.id, office.updated_at), office.updated_at
+    )
+    if not_modified is not None:
+        return not_modified
         
     logger.info("Retrieved office: %s (ID: %d)", office.name, office.id)
     return office
@@ -108,7 +188,7 @@ def update_office(
     db: Session = Depends(get_db),
     office_id: int,
     office_in: OfficeUpdate,
-    current_user: User = Depends(get_current_active_admin),
+    current_user: Principal = Depends(get_current_active_admin),
 ) -> Any:
     """Update an office.
     
@@ -134,12 +214,17 @@ def update_office(
     
     # Update office fields
     update_data = office_in.dict(exclude_unset=True)
+    if "geofence" in update_data:
+        update_data["geofence"] = geojson_to_wkb(update_data["geofence"])
     for field, value in update_data.items():
         setattr(office, field, value)
     
     db.add(office)
+    version = office_cache.record_change(db)
     db.commit()
     db.refresh(office)
+    office_cache.upsert(office, version)
+    event_bus.publish(OFFICES_CHANNEL, "offices_changed", {"action": "updated", "office_id": office.id})
     
     logger.info("Office updated: %s (ID: %d)", office.name, office.id)
     return office
@@ -150,7 +235,7 @@ def delete_office(
     *,
     db: Session = Depends(get_db),
     office_id: int,
-    current_user: User = Depends(get_current_active_admin),
+    current_user: Principal = Depends(get_current_active_admin),
 ) -> None:
     """Delete an office.
     
@@ -171,6 +256,9 @@ def delete_office(
         )
     
     db.delete(office)
+    version = office_cache.record_change(db)
     db.commit()
+    office_cache.discard(office_id, version)
+    event_bus.publish(OFFICES_CHANNEL, "offices_changed", {"action": "deleted", "office_id": office_id})
     
     logger.info("Office deleted: %s (ID: %d)", office.name, office.id)
\ No newline at end of file
@@ -13,10 +13,52 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "Attendance Tracker"
 
+    # LOGGING
+    LOG_LEVEL: str = "INFO"
+    # "json" for one JSON object per line, "text" for the plain console format
+    LOG_FORMAT: str = "json"
+    # Records buffered for the writer thread; further records are dropped
+    LOG_QUEUE_SIZE: int = 10000
+    # Max DEBUG/INFO records per second from a single call site (0 disables)
+    LOG_RATE_LIMIT_PER_SECOND: int = 20
+
+    # METRICS
+    # Record request/DB/geofence metrics and serve them at /metrics
+    METRICS_ENABLED: bool = True
+
+    # RESPONSE COMPRESSION
+    # gzip (or brotli, when installed) for clients that accept it
+    COMPRESSION_ENABLED: bool = True
+    # Smaller bodies are sent uncompressed
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
     # SECURITY
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-for-development")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
 
+    # PASSWORD HASHING
+    # bcrypt cost factor; stored hashes with another cost are rehashed on login.
+    # Run calibrate_bcrypt.py to measure hash time per cost on the deployment hardware.
+    BCRYPT_ROUNDS: int = 12
+    # Worker processes for bcrypt (0 runs hashing in the threadpool instead)
+    PASSWORD_HASH_WORKERS: int = max(1, (os.cpu_count() or 2) // 2)
+    # Queued plus running hash operations allowed before login returns 503
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
+
+    # AUTHENTICATED USER CACHE
+    # How long an authenticated user is trusted without a DB lookup (0 disables the cache)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    # How often a worker checks whether another worker changed or deleted a user
+    PRINCIPAL_CACHE_VERSION_CHECK_SECONDS: float = 1.0
+
+    # ADMIN DASHBOARD
+    # How long /admin/dashboard-stats results are reused (0 disables the cache)
+    DASHBOARD_STATS_CACHE_SECONDS: float = 10.0
+
     # DATABASE
     DATABASE_URL: str = os.getenv(
         "DATABASE_URL",""
@@ -27,6 +69,80 @@ class Settings(BaseSettings):
     def set_db_uri(cls, v: Optional[str], values: Dict[str, Any]) -> str:
         return values.get("DATABASE_URL")
 
+    # Connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds a request waits for a free connection before failing
+    DB_POOL_TIMEOUT: float = 30.0
+    # Replace connections older than this many seconds (-1 never)
+    DB_POOL_RECYCLE: int = 1800
+    # Test connections before use; with an interval, only those idle longer than it
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_PRE_PING_INTERVAL: float = 0.0
+
+    # Serve async route handlers from an async engine instead of running the
+    # sync session in the threadpool
+    DB_ASYNC_MODE: bool = False
+    # Async driver URL; derived from DATABASE_URL (aiosqlite / aioodbc) when unset
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Run Alembic migrations on startup; disable to run `alembic upgrade head` separately
+    DB_AUTO_MIGRATE: bool = True
+
+    # Login history and last_login are written behind the request, in batches
+    # flushed every LOGIN_EVENTS_FLUSH_MS or at LOGIN_EVENTS_BATCH_SIZE events
+    LOGIN_EVENTS_FLUSH_MS: int = 500
+    LOGIN_EVENTS_BATCH_SIZE: int = 200
+    # Events queued beyond this are dropped
+    LOGIN_EVENTS_MAX_QUEUE: int = 10000
+    # While the database is unreachable, retries back off from LOGIN_EVENTS_FLUSH_MS up to this
+    LOGIN_EVENTS_MAX_RETRY_MS: int = 30000
+
+    # Rows fetched per batch by attendance exports (one CSV chunk / Parquet row group)
+    EXPORT_BATCH_SIZE: int = 5000
+    # Rows inserted per executemany by attendance imports
+    IMPORT_BATCH_SIZE: int = 1000
+
+    # IANA time zone whose calendar days the worked-hours rollup uses
+    TIMESHEET_TIMEZONE: str = "UTC"
+    # Longest date range a timesheet report may cover
+    TIMESHEET_MAX_DAYS: int = 366
+
+    # Read replica for read-only endpoints; reads use the primary when unset
+    READ_REPLICA_URL: Optional[str] = None
+    # Async driver URL of the replica; derived from READ_REPLICA_URL when unset
+    ASYNC_READ_REPLICA_URL: Optional[str] = None
+    # Seconds a user's reads stay on the primary after they write
+    READ_REPLICA_STICKY_SECONDS: float = 5.0
+
+    # PRESENCE (location ping ingestion)
+    # Seconds pings must stay inside a geofence before the user enters the office
+    PRESENCE_ENTER_DWELL_SECONDS: float = 60.0
+    # Seconds pings must stay beyond the exit margin before the user leaves
+    PRESENCE_EXIT_DWELL_SECONDS: float = 180.0
+    # Meters beyond the geofence radius a user must move to start leaving
+    PRESENCE_EXIT_MARGIN_METERS: float = 25.0
+    # Users whose pings stop for this long leave at their last ping
+    PRESENCE_TIMEOUT_SECONDS: float = 900.0
+    # Pings reporting a worse GPS accuracy (meters) are dropped
+    PRESENCE_MAX_ACCURACY_METERS: float = 100.0
+    # Open and close attendance records on enter and exit events
+    PRESENCE_AUTO_ATTENDANCE: bool = False
+    # NDJSON lines evaluated per batch
+    PRESENCE_BATCH_SIZE: int = 10000
+
+    # PUSH EVENTS (server-sent events at /attendance/events)
+    # Pub/sub broker that fans events out to all workers, e.g. redis://localhost:6379/0;
+    # events only reach clients of the publishing worker when unset
+    EVENTS_BROKER_URL: Optional[str] = None
+    # Prefix of the broker channel names
+    EVENTS_CHANNEL_PREFIX: str = "attendance:"
+    # Seconds between keepalive comments on an idle stream
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    # Streams are closed after this long so clients reconnect and authenticate again
+    EVENTS_MAX_STREAM_SECONDS: float = 3600.0
+    # Events buffered per stream; a client that falls further behind gets a resync event
+    EVENTS_QUEUE_SIZE: int = 100
+
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
@@ -40,6 +156,16 @@ class Settings(BaseSettings):
 
     # GEOFENCE SETTINGS
     GEOFENCE_RADIUS_METERS: int = 100
+    # Maximum number of locations accepted by the batch check-location endpoint
+    BATCH_LOCATION_MAX_ITEMS: int = 10000
+    # Batches larger than this are streamed back instead of built in memory
+    BATCH_LOCATION_STREAM_THRESHOLD: int = 500
+
+    # OFFICE CACHE SETTINGS
+    # How often a worker compares its cached offices against the shared version stamp
+    OFFICE_CACHE_VERSION_CHECK_SECONDS: float = 5.0
+    # Full reload interval, to pick up office edits made outside the API
+    OFFICE_CACHE_MAX_AGE_SECONDS: float = 300.0
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,333 @@
+import csv
+import io
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, IO, Iterator, List, Optional, Sequence, Set
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import Select
+
+from app.config import settings
+from app.core.rollups import recompute_rollups
+from app.core.timesheet import local_date
+from app.models.models import AttendanceRecord, Office, User
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Export formats; parquet and arrow need pyarrow
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+EXPORT_COLUMNS = [
+    ("id", AttendanceRecord.id),
+    ("user_id", AttendanceRecord.user_id),
+    ("username", User.username),
+    ("full_name", User.full_name),
+    ("office_id", AttendanceRecord.office_id),
+    ("office_name", Office.name),
+    ("check_in_time", AttendanceRecord.check_in_time),
+    ("check_out_time", AttendanceRecord.check_out_time),
+    ("check_in_latitude", AttendanceRecord.check_in_latitude),
+    ("check_in_longitude", AttendanceRecord.check_in_longitude),
+    ("check_out_latitude", AttendanceRecord.check_out_latitude),
+    ("check_out_longitude", AttendanceRecord.check_out_longitude),
+]
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp to naive UTC, as stored; naive input is taken as UTC."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+# Columns read by import_attendance_csv; other columns (e.g. names from an export) are ignored
+IMPORT_COLUMNS = {
+    "user_id": int,
+    "office_id": int,
+    "check_in_time": _parse_timestamp,
+    "check_out_time": _parse_timestamp,
+    "check_in_latitude": float,
+    "check_in_longitude": float,
+    "check_out_latitude": float,
+    "check_out_longitude": float,
+}
+REQUIRED_IMPORT_COLUMNS = ("user_id", "office_id", "check_in_time", "check_in_latitude", "check_in_longitude")
+
+
+def export_formats() -> List[str]:
+    """Get the export formats available in this installation.
+
+    Returns:
+        Format names; parquet and arrow only when pyarrow is installed
+    """
+    return list(EXPORT_MEDIA_TYPES) if pyarrow is not None else ["csv"]
+
+
+def export_query(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    office_id: Optional[int] = None,
+) -> Select:
+    """Build the export query, joined with user and office names.
+
+    Args:
+        start_date: First check-in date to include (UTC)
+        end_date: Last check-in date to include (UTC)
+        office_id: Only include records of this office
+
+    Returns:
+        Select ordered by check-in time
+    """
+    query = select(*[column.label(name) for name, column in EXPORT_COLUMNS]).join(
+        User, User.id == AttendanceRecord.user_id
+    ).join(
+        Office, Office.id == AttendanceRecord.office_id
+    ).order_by(AttendanceRecord.check_in_time, AttendanceRecord.id)
+
+    if start_date:
+        query = query.where(AttendanceRecord.check_in_time >= datetime.combine(start_date, time.min))
+    if end_date:
+        query = query.where(
+            AttendanceRecord.check_in_time < datetime.combine(end_date + timedelta(days=1), time.min)
+        )
+    if office_id:
+        query = query.where(AttendanceRecord.office_id == office_id)
+    return query
+
+
+def _partitions(engine: Engine, query: Select) -> Iterator[Sequence[Any]]:
+    # Server-side cursor where the driver supports one; at most one batch in memory
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=settings.EXPORT_BATCH_SIZE
+        ).execute(query)
+        yield from result.partitions()
+
+
+def stream_csv(engine: Engine, query: Select) -> Iterator[bytes]:
+    """Stream export rows as CSV, one chunk per fetched batch.
+
+    Args:
+        engine: Engine to read from
+        query: Query from ``export_query``
+
+    Yields:
+        UTF-8 encoded CSV chunks, starting with the header row
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+
+    for rows in _partitions(engine, query):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to a generator."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema() -> "pyarrow.Schema":
+    types = {
+        "id": pyarrow.int64(),
+        "user_id": pyarrow.int64(),
+        "office_id": pyarrow.int64(),
+        "username": pyarrow.string(),
+        "full_name": pyarrow.string(),
+        "office_name": pyarrow.string(),
+        "check_in_time": pyarrow.timestamp("us"),
+        "check_out_time": pyarrow.timestamp("us"),
+    }
+    return pyarrow.schema([(name, types.get(name, pyarrow.float64())) for name, _ in EXPORT_COLUMNS])
+
+
+def stream_arrow(engine: Engine, query: Select, file_format: str) -> Iterator[bytes]:
+    """Stream export rows as Parquet or an Arrow IPC stream.
+
+    Each fetched batch becomes one Parquet row group or Arrow record batch.
+
+    Args:
+        engine: Engine to read from
+        query: Query from ``export_query``
+        file_format: "parquet" or "arrow"
+
+    Yields:
+        Encoded file chunks
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    if pyarrow is None:
+        raise RuntimeError("pyarrow is required for Parquet and Arrow exports")
+
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    if file_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+
+    try:
+        for rows in _partitions(engine, query):
+            columns = list(zip(*rows))
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _parse_row(row: Dict[str, str], line: int) -> Dict[str, Any]:
+    record = {}
+    for name, parse in IMPORT_COLUMNS.items():
+        value = (row.get(name) or "").strip()
+        if not value:
+            if name in REQUIRED_IMPORT_COLUMNS:
+                raise ValueError(f"Line {line}: missing {name}")
+            record[name] = None
+            continue
+        try:
+            record[name] = parse(value)
+        except ValueError:
+            raise ValueError(f"Line {line}: invalid {name} '{value}'")
+
+    if record["check_out_time"] is not None and record["check_out_time"] <= record["check_in_time"]:
+        raise ValueError(f"Line {line}: check_out_time must be after check_in_time")
+    return record
+
+
+def _check_references(
+    conn: Connection, batch: List[Dict[str, Any]], known: Dict[str, Set[int]]
+) -> None:
+    # One lookup per batch for IDs not seen in earlier batches
+    for key, model in (("user_id", User), ("office_id", Office)):
+        wanted = {row[key] for row in batch} - known[key]
+        if not wanted:
+            continue
+        found = set(conn.execute(select(model.id).where(model.id.in_(wanted))).scalars())
+        if wanted - found:
+            raise ValueError(f"Unknown {key} values: {sorted(wanted - found)}")
+        known[key] |= found
+
+
+def _check_active_records(conn: Connection, open_lines: Dict[int, int]) -> None:
+    # Check-in, check-out and /status expect at most one open record per user
+    if not open_lines:
+        return
+    active = conn.execute(select(AttendanceRecord.user_id).where(
+        AttendanceRecord.user_id.in_(open_lines),
+        AttendanceRecord.check_out_time.is_(None),
+    )).scalars().first()
+    if active is not None:
+        raise ValueError(f"Line {open_lines[active]}: user {active} already has an active record")
+
+
+def import_attendance_csv(conn: Connection, file: IO[str]) -> int:
+    """Insert attendance records from CSV with batched executemany.
+
+    The CSV needs a header row with at least the required import columns;
+    the export's CSV is accepted as is. Record IDs are not imported.
+    Timestamps with a UTC offset are converted to UTC. A row without a
+    check-out is rejected when its user already has an active record. The
+    daily rollups are rebuilt for the days the imported records cover.
+
+    Args:
+        conn: Connection inside a transaction; nothing is written if any row fails
+        file: Text file with CSV data
+
+    Returns:
+        Number of records inserted
+
+    Raises:
+        ValueError: If the header or a row is invalid, a row references a
+            user or office that does not exist, or a second active record
+            would be created for a user
+    """
+    reader = csv.DictReader(file)
+    missing = [name for name in REQUIRED_IMPORT_COLUMNS if name not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    table = AttendanceRecord.__table__
+    known: Dict[str, Set[int]] = {"user_id": set(), "office_id": set()}
+    inserted = 0
+    batch: List[Dict[str, Any]] = []
+    first_check_in: Optional[datetime] = None
+    last_event: Optional[datetime] = None
+    # Line of each open row, for all rows read and for the current batch
+    open_lines: Dict[int, int] = {}
+    batch_open_lines: Dict[int, int] = {}
+
+    for row in reader:
+        record = _parse_row(row, reader.line_num)
+        if record["check_out_time"] is None:
+            user_id = record["user_id"]
+            if user_id in open_lines:
+                raise ValueError(
+                    f"Line {reader.line_num}: user {user_id} already has an active record "
+                    f"(line {open_lines[user_id]})"
+                )
+            open_lines[user_id] = batch_open_lines[user_id] = reader.line_num
+        batch.append(record)
+        first_check_in = min(record["check_in_time"], first_check_in or record["check_in_time"])
+        event_time = record["check_out_time"] or record["check_in_time"]
+        last_event = max(event_time, last_event or event_time)
+        if len(batch) >= settings.IMPORT_BATCH_SIZE:
+            _check_references(conn, batch, known)
+            _check_active_records(conn, batch_open_lines)
+            conn.execute(table.insert(), batch)
+            inserted += len(batch)
+            batch = []
+            batch_open_lines = {}
+
+    if batch:
+        _check_references(conn, batch, known)
+        _check_active_records(conn, batch_open_lines)
+        conn.execute(table.insert(), batch)
+        inserted += len(batch)
+
+    if first_check_in is not None:
+        recompute_rollups(conn, local_date(first_check_in), local_date(last_event))
+    return inserted
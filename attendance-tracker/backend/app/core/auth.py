@@ -1,20 +1,23 @@
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Optional, Tuple, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.db.base import get_db
+from app.core.hashing import HashingOverloadedError, password_hasher, pwd_context
+from app.core.metrics import PASSWORD_HASH_SECONDS
+from app.core.principal_cache import Principal, principal_cache
+from app.db.base import get_async_db
+from app.db.replica import request_user_id
 from app.logger import logger
 from app.models.models import User
 from app.schemas.schemas import TokenPayload
 
 # Security settings
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 # JWT token functions
@@ -50,7 +53,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         Whether the password matches the hash
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    with PASSWORD_HASH_SECONDS.labels("verify").time():
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -62,20 +66,98 @@ def get_password_hash(password: str) -> str:
     Returns:
         Hashed password
     """
-    return pwd_context.hash(password)
+    with PASSWORD_HASH_SECONDS.labels("hash").time():
+        return pwd_context.hash(password)
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+def _hashing_overloaded(error: HashingOverloadedError) -> HTTPException:
+    """Build the 503 response for a full password hashing queue."""
+    logger.warning("Password hashing overloaded: %s", str(error))
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the password hashing pool.
+
+    If the password matches but the stored hash uses a bcrypt cost other
+    than ``BCRYPT_ROUNDS``, a replacement hash is computed in the same call.
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Hashed password
+
+    Returns:
+        Tuple of whether the password matches and the replacement hash
+        (None when no rehash is needed)
+
+    Raises:
+        HTTPException: 503 with Retry-After if the hashing queue is full
+    """
+    try:
+        with PASSWORD_HASH_SECONDS.labels("verify").time():
+            return await password_hasher.verify_and_update(plain_password, hashed_password)
+    except HashingOverloadedError as e:
+        raise _hashing_overloaded(e)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hashing pool.
+    
+    Args:
+        password: Plain text password
+    
+    Returns:
+        Hashed password
+    
+    Raises:
+        HTTPException: 503 with Retry-After if the hashing queue is full
+    """
+    try:
+        with PASSWORD_HASH_SECONDS.labels("hash").time():
+            return await password_hasher.hash(password)
+    except HashingOverloadedError as e:
+        raise _hashing_overloaded(e)
+
+
+def get_password_hash_pooled(password: str) -> str:
+    """Hash a password on the password hashing pool from a sync handler.
+    
+    Args:
+        password: Plain text password
+    
+    Returns:
+        Hashed password
+    
+    Raises:
+        HTTPException: 503 with Retry-After if the hashing queue is full
+    """
+    try:
+        with PASSWORD_HASH_SECONDS.labels("hash").time():
+            return password_hasher.hash_blocking(password)
+    except HashingOverloadedError as e:
+        raise _hashing_overloaded(e)
+
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> Principal:
     """Get the current authenticated user.
     
+    The user is served from the principal cache when possible, so most
+    authenticated requests do not touch the users table.
+    
     Args:
         db: Database session
         token: JWT token
     
     Returns:
-        User object
+        Principal for the authenticated user
     
     Raises:
         HTTPException: If token is invalid or user not found
@@ -99,7 +181,14 @@ def get_current_user(
         logger.error("JWT error: %s", str(e))
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == token_data.sub).first()
+    principal = await db.run_sync(principal_cache.get, token_data.sub, token)
+    if principal is not None:
+        request_user_id.set(principal.id)
+        logger.debug("User authenticated from cache: %s", principal.username)
+        return principal
+    
+    result = await db.execute(select(User).where(User.id == token_data.sub))
+    user = result.scalars().first()
     
     if user is None:
         logger.warning("User not found for token subject: %s", token_data.sub)
@@ -110,19 +199,23 @@ def get_current_user(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
+    
+    principal = Principal.from_user(user)
+    principal_cache.put(token, principal)
+    request_user_id.set(principal.id)
         
     logger.info("User authenticated: %s", user.username)
-    return user
+    return principal
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Get the current active authenticated user.
     
     Args:
         current_user: Current user from token
     
     Returns:
-        User object if active
+        Principal if active
     
     Raises:
         HTTPException: If user is inactive
@@ -135,14 +228,14 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
-def get_current_active_admin(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Get the current active admin user.
     
     Args:
         current_user: Current user from token
     
     Returns:
-        User object if active and admin
+        Principal if active and admin
     
     Raises:
         HTTPException: If user is not an admin
@@ -155,14 +248,14 @@ def get_current_active_admin(current_user: User = Depends(get_current_user)) ->
     return current_user
 
 
-def get_current_active_superadmin(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_superadmin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Get the current active super admin user.
     
     Args:
         current_user: Current user from token
     
     Returns:
-        User object if active and super admin
+        Principal if active and super admin
     
     Raises:
         HTTPException: If user is not a super admin
@@ -0,0 +1,42 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.models import CacheVersion
+
+
+def bump_cache_version(db: Session, name: str) -> int:
+    """Increment a shared cache version stamp inside the current transaction.
+
+    Args:
+        db: Database session
+        name: Cache name
+
+    Returns:
+        The new version number
+    """
+    result = db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+    )
+
+    if result.rowcount == 0:
+        db.add(CacheVersion(name=name, version=1))
+        db.flush()
+        return 1
+
+    return db.query(CacheVersion.version).filter(CacheVersion.name == name).scalar()
+
+
+def get_cache_version(db: Session, name: str) -> int:
+    """Read a shared cache version stamp.
+
+    Args:
+        db: Database session
+        name: Cache name
+
+    Returns:
+        The current version number (0 if never bumped)
+    """
+    version = db.query(CacheVersion.version).filter(CacheVersion.name == name).scalar()
+    return version or 0
@@ -0,0 +1,112 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+# Responses may be stored by the client but must be revalidated on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a weak ETag from the values that determine a response.
+
+    Args:
+        parts: Version stamps, timestamps and query parameters
+
+    Returns:
+        Quoted weak ETag
+    """
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:20]}"'
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" match
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluate ``If-None-Match`` and ``If-Modified-Since`` against a resource.
+
+    ``If-Modified-Since`` is only used when ``If-None-Match`` is absent.
+
+    Args:
+        request: Request with the conditional headers
+        etag: Current ETag of the resource
+        last_modified: Current modification time of the resource (naive UTC)
+
+    Returns:
+        Whether the client's copy is current
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+    return modified <= since
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None) -> None:
+    """Add ETag, Last-Modified and Cache-Control headers to a response.
+
+    Args:
+        response: Response to update
+        etag: ETag of the resource
+        last_modified: Modification time of the resource (naive UTC)
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """Short-circuit a GET whose client copy is still current.
+
+    Call before loading and serializing the resource.
+
+    Args:
+        request: Request with the conditional headers
+        response: Response of the handler; validators are set on it
+        etag: Current ETag of the resource
+        last_modified: Current modification time of the resource (naive UTC)
+
+    Returns:
+        A 304 response to return as is, or None to build the full response
+    """
+    if is_not_modified(request, etag, last_modified):
+        not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        set_validators(not_modified, etag, last_modified)
+        return not_modified
+
+    set_validators(response, etag, last_modified)
+    return None
@@ -0,0 +1,126 @@
+from typing import Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.spatial import EARTH_RADIUS_METERS, OfficeGeometry
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Upper bound on the number of (point, office) pairs evaluated per block,
+# which caps temporary memory at a few tens of MB
+MAX_PAIRS_PER_BLOCK = 1_000_000
+
+
+def haversine_distances(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> np.ndarray:
+    """Vectorized haversine distance between coordinates given in degrees.
+
+    Inputs broadcast against each other using NumPy rules. Uses the same
+    formula and earth radius as the ``haversine`` package.
+
+    Args:
+        lat1: Latitude(s) of the first point(s)
+        lon1: Longitude(s) of the first point(s)
+        lat2: Latitude(s) of the second point(s)
+        lon2: Longitude(s) of the second point(s)
+
+    Returns:
+        Array of distances in meters
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    return _haversine(phi1, np.radians(lon1), np.cos(phi1), phi2, np.radians(lon2), np.cos(phi2))
+
+
+def _haversine(phi1, lam1, cos1, phi2, lam2, cos2) -> np.ndarray:
+    a = np.sin((phi2 - phi1) * 0.5) ** 2 + cos1 * cos2 * np.sin((lam2 - lam1) * 0.5) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class DistanceEngine:
+    """Batched distance evaluation of points against a fixed set of offices.
+
+    Office coordinates are stored as arrays of radians and latitude
+    cosines, so M points can be evaluated against N offices in a
+    single vectorized pass instead of M * N calls into ``haversine``.
+    Columns of polygon offices hold the distance to the polygon instead,
+    so ``distance <= radius`` is the containment test for every office.
+    """
+
+    def __init__(self, offices: Iterable[OfficeGeometry]) -> None:
+        """Precompute the office arrays.
+
+        Args:
+            offices: Office geometries; column order of results follows this order
+        """
+        self.offices: List[OfficeGeometry] = list(offices)
+
+        latitudes = np.array([o.latitude for o in self.offices], dtype=np.float64)
+        longitudes = np.array([o.longitude for o in self.offices], dtype=np.float64)
+
+        self.ids = np.array([o.id for o in self.offices], dtype=np.int64)
+        self.radii = np.array([o.radius for o in self.offices], dtype=np.float64)
+        self.lat_rad = np.radians(latitudes)
+        self.lon_rad = np.radians(longitudes)
+        self.cos_lat = np.cos(self.lat_rad)
+        self._position = {office.id: i for i, office in enumerate(self.offices)}
+        self._polygons = [
+            (i, office.polygon) for i, office in enumerate(self.offices) if office.polygon is not None
+        ]
+
+    def __len__(self) -> int:
+        return len(self.offices)
+
+    def position(self, office_id: int) -> int:
+        """Get the column of an office in result arrays.
+
+        Args:
+            office_id: ID of the office
+
+        Returns:
+            Column index
+
+        Raises:
+            KeyError: If the office is not part of the engine
+        """
+        return self._position[office_id]
+
+    def distances(self, latitudes: ArrayLike, longitudes: ArrayLike) -> np.ndarray:
+        """Distances from each point to every office.
+
+        Args:
+            latitudes: M point latitudes in degrees
+            longitudes: M point longitudes in degrees
+
+        Returns:
+            (M, N) array of distances in meters; polygon offices are 0 for points inside
+        """
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        phi = np.radians(latitudes)[:, None]
+        lam = np.radians(longitudes)[:, None]
+        distances = _haversine(phi, lam, np.cos(phi), self.lat_rad, self.lon_rad, self.cos_lat)
+
+        for column, polygon in self._polygons:
+            distances[:, column] = polygon.distances(latitudes, longitudes)
+        return distances
+
+    def iter_blocks(
+        self, latitudes: ArrayLike, longitudes: ArrayLike
+    ) -> Iterator[Tuple[slice, np.ndarray, np.ndarray]]:
+        """Evaluate points in row blocks with bounded memory.
+
+        Args:
+            latitudes: M point latitudes in degrees
+            longitudes: M point longitudes in degrees
+
+        Yields:
+            Tuples of (row slice, distances block, within-geofence block)
+        """
+        latitudes = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        longitudes = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        rows = max(1, MAX_PAIRS_PER_BLOCK // max(1, len(self.offices)))
+
+        for start in range(0, len(latitudes), rows):
+            block = slice(start, start + rows)
+            distances = self.distances(latitudes[block], longitudes[block])
+            yield block, distances, distances <= self.radii
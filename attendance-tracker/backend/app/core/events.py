@@ -0,0 +1,315 @@
+import asyncio
+import json
+import threading
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from app.config import settings
+from app.logger import logger
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+# Broadcast channel for office list changes
+OFFICES_CHANNEL = "offices"
+
+# Sent to a subscriber whose queue overflowed; the client should re-fetch its state
+RESYNC_MESSAGE = json.dumps({"event": "resync", "data": None})
+
+Deliver = Callable[[str, str], None]
+
+
+def user_channel(user_id: int) -> str:
+    """Name of the channel carrying events of one user.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        Channel name
+    """
+    return f"user:{user_id}"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class EventBackend:
+    """Transport between ``publish`` and the subscribers of a worker.
+
+    All methods are called on the event loop of the bus.
+    """
+
+    async def start(self, deliver: Deliver) -> None:
+        """Start delivering published messages to ``deliver(channel, message)``."""
+        self._deliver = deliver
+
+    def publish(self, channel: str, message: str) -> None:
+        """Send a message to every worker subscribed to the channel."""
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        """Stop delivering messages and release connections."""
+
+
+class LocalBackend(EventBackend):
+    """Delivers messages within this worker process only."""
+
+    def publish(self, channel: str, message: str) -> None:
+        self._deliver(channel, message)
+
+
+class RedisBackend(EventBackend):
+    """Fans messages out to every worker through Redis pub/sub.
+
+    Each worker subscribes to all channels under the prefix and delivers
+    its own messages when they come back from Redis, so delivery order is
+    the same in every worker.
+    """
+
+    def __init__(self, url: str, prefix: str) -> None:
+        if aioredis is None:
+            raise RuntimeError("EVENTS_BROKER_URL needs the redis package")
+        self._url = url
+        self._prefix = prefix
+        self._client: Any = None
+        self._reader: Optional[asyncio.Task] = None
+        self._sends: Set[asyncio.Task] = set()
+
+    async def start(self, deliver: Deliver) -> None:
+        await super().start(deliver)
+        self._client = aioredis.from_url(self._url)
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def _read(self) -> None:
+        while True:
+            pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{self._prefix}*")
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        channel = message["channel"].decode()[len(self._prefix):]
+                        self._deliver(channel, message["data"].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Event broker subscription failed, reconnecting: %s", str(e))
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.close()
+
+    def publish(self, channel: str, message: str) -> None:
+        send = asyncio.get_running_loop().create_task(
+            self._client.publish(f"{self._prefix}{channel}", message)
+        )
+        self._sends.add(send)
+        send.add_done_callback(self._sent)
+
+    def _sent(self, send: asyncio.Task) -> None:
+        self._sends.discard(send)
+        if not send.cancelled() and send.exception() is not None:
+            logger.error("Failed to publish event: %s", str(send.exception()))
+
+    async def stop(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+        if self._client is not None:
+            await self._client.close()
+
+
+def create_backend(url: Optional[str]) -> EventBackend:
+    """Create the event backend for a broker URL.
+
+    Args:
+        url: Broker URL (``redis://``, ``rediss://`` or ``unix://``), or None for in-process delivery
+
+    Returns:
+        Event backend
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if not url:
+        return LocalBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, settings.EVENTS_CHANNEL_PREFIX)
+    raise ValueError(f"Unsupported EVENTS_BROKER_URL: {url}")
+
+
+class Subscription:
+    """Messages of a set of channels, buffered for one client."""
+
+    def __init__(self, bus: "EventBus", channels: Iterable[str], max_queue: int) -> None:
+        self.channels = frozenset(channels)
+        self._bus = bus
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue(max_queue)
+
+    def put(self, message: str) -> int:
+        """Queue a message; on overflow, replace the backlog with a resync event.
+
+        Returns:
+            Number of messages dropped
+        """
+        try:
+            self._queue.put_nowait(message)
+            return 0
+        except asyncio.QueueFull:
+            dropped = self._queue.qsize() + 1
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC_MESSAGE)
+            return dropped
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """Wait for the next message.
+
+        Args:
+            timeout: Seconds to wait
+
+        Returns:
+            The JSON message, or None on timeout
+        """
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self._bus._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class EventBus:
+    """Publish/subscribe hub for pushing status changes to clients.
+
+    ``publish`` can be called from the event loop or from threadpool
+    handlers; messages go through the configured backend and are then
+    queued for every local subscription of the channel. Before ``start``
+    (e.g. in CLI scripts) publishing does nothing.
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._backend: Optional[EventBackend] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+
+    async def start(self, backend: Optional[EventBackend] = None) -> None:
+        """Start the bus on the running event loop.
+
+        Args:
+            backend: Backend to use (default: from ``EVENTS_BROKER_URL``)
+        """
+        self._backend = backend or create_backend(settings.EVENTS_BROKER_URL)
+        await self._backend.start(self._dispatch)
+        self._loop = asyncio.get_running_loop()
+        logger.info("Event bus started with %s", type(self._backend).__name__)
+
+    async def stop(self) -> None:
+        """Stop the bus; later publishes are ignored."""
+        self._loop = None
+        if self._backend is not None:
+            await self._backend.stop()
+            self._backend = None
+
+    def publish(self, channel: str, event: str, data: Any = None) -> None:
+        """Publish an event to a channel.
+
+        Args:
+            channel: Channel name, e.g. ``user_channel(user_id)``
+            event: Event name
+            data: JSON-serializable payload; datetimes are sent as ISO 8601
+        """
+        loop = self._loop
+        if loop is None:
+            return
+
+        message = json.dumps({"event": event, "data": data}, default=_json_default)
+        with self._lock:
+            self._published += 1
+
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+
+        if on_loop:
+            self._backend.publish(channel, message)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._publish_on_loop, channel, message)
+            except RuntimeError:
+                # Loop closed during shutdown
+                pass
+
+    def _publish_on_loop(self, channel: str, message: str) -> None:
+        if self._backend is not None:
+            self._backend.publish(channel, message)
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """Subscribe to channels; call on the event loop and close when done.
+
+        Args:
+            channels: Channel names
+
+        Returns:
+            Subscription, usable as a context manager
+        """
+        subscription = Subscription(self, channels, settings.EVENTS_QUEUE_SIZE)
+        for channel in subscription.channels:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        with self._lock:
+            self._active += 1
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        for channel in subscription.channels:
+            subscribers = self._subscriptions.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[channel]
+        with self._lock:
+            self._active -= 1
+
+    def _dispatch(self, channel: str, message: str) -> None:
+        subscribers = self._subscriptions.get(channel, ())
+        dropped = sum(subscription.put(message) for subscription in subscribers)
+        with self._lock:
+            self._delivered += len(subscribers)
+            self._dropped += dropped
+
+    def stats(self) -> Dict[str, int]:
+        """Get subscription and message counts of this worker.
+
+        Returns:
+            Subscriptions, and events published, delivered and dropped
+        """
+        with self._lock:
+            return {
+                "subscriptions": self._active,
+                "published": self._published,
+                "delivered": self._delivered,
+                "dropped": self._dropped,
+            }
+
+
+# Create a default event bus instance
+event_bus = EventBus()
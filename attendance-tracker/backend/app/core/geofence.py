@@ -1,16 +1,19 @@
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
-from haversine import haversine
 from sqlalchemy.orm import Session
 
+from app.core.distance import haversine_distances
+from app.core.metrics import GEOFENCE_SECONDS
+from app.core.office_cache import office_cache, office_geometry
+from app.core.spatial import OfficeGeometry
 from app.logger import logger
 from app.models.models import Office
-from app.schemas.schemas import GeofenceStatus
+from app.schemas.schemas import GeofenceStatus, LocationCheck
 
 
 class GeofenceService:
     """Service for handling geofence-related operations."""
-    
+
     @staticmethod
     def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate the distance between two geographic coordinates.
@@ -24,18 +27,21 @@ class GeofenceService:
         Returns:
             Distance in meters
         """
-        # Convert from km to meters
-        return haversine((lat1, lon1), (lat2, lon2), unit='m')
+        return float(haversine_distances(lat1, lon1, lat2, lon2))
 
     @classmethod
+    @GEOFENCE_SECONDS.labels("single").time()
     def check_within_geofence(
         cls, 
         latitude: float, 
         longitude: float, 
-        office: Office
+        office: Union[Office, OfficeGeometry]
     ) -> GeofenceStatus:
         """Check if coordinates are within a specific office geofence.
         
+        Circle offices measure the distance to the office coordinates;
+        polygon offices measure the distance to the polygon, 0 inside it.
+        
         Args:
             latitude: Latitude to check
             longitude: Longitude to check
@@ -44,14 +50,40 @@ class GeofenceService:
         Returns:
             GeofenceStatus object with results
         """
-        distance = cls.calculate_distance(
-            latitude, longitude, 
-            office.latitude, office.longitude
-        )
+        if isinstance(office, Office):
+            office = office_geometry(office)
+        
+        if office.polygon is not None:
+            distance = float(office.polygon.distances(latitude, longitude)[0])
+        else:
+            distance = cls.calculate_distance(
+                latitude, longitude, 
+                office.latitude, office.longitude
+            )
         
+        return cls._build_status(latitude, longitude, office, distance)
+
+    @staticmethod
+    def _build_status(
+        latitude: float, 
+        longitude: float, 
+        office: Union[Office, OfficeGeometry], 
+        distance: float
+    ) -> GeofenceStatus:
+        """Build the geofence status for an already computed distance.
+        
+        Args:
+            latitude: Latitude that was checked
+            longitude: Longitude that was checked
+            office: Office the distance was computed against
+            distance: Distance in meters
+            
+        Returns:
+            GeofenceStatus object with results
+        """
         is_within = distance <= office.radius
         
-        logger.info(
+        logger.debug(
             "Location check: (%f, %f) to Office %s (%f, %f) - Distance: %f m, Within: %s",
             latitude, longitude, office.name, office.latitude, office.longitude, 
             distance, is_within
@@ -65,6 +97,7 @@ class GeofenceService:
         )
 
     @classmethod
+    @GEOFENCE_SECONDS.labels("all").time()
     def check_all_geofences(
         cls, 
         db: Session, 
@@ -81,16 +114,112 @@ class GeofenceService:
         Returns:
             List of GeofenceStatus objects for all offices
         """
-        offices = db.query(Office).all()
-        results = []
+        engine = office_cache.get_engine(db)
+        distances = engine.distances(latitude, longitude)[0].tolist()
+        
+        return [
+            cls._build_status(latitude, longitude, office, distance)
+            for office, distance in zip(engine.offices, distances)
+        ]
+
+    @classmethod
+    @GEOFENCE_SECONDS.labels("containing").time()
+    def check_containing_geofences(
+        cls, 
+        db: Session, 
+        latitude: float, 
+        longitude: float
+    ) -> List[GeofenceStatus]:
+        """Check coordinates against only the offices whose geofence contains them.
+        
+        Uses the spatial index to skip offices that cannot contain the point,
+        so the cost depends on nearby offices rather than the table size.
+        
+        Args:
+            db: Database session
+            latitude: Latitude to check
+            longitude: Longitude to check
+            
+        Returns:
+            List of GeofenceStatus objects for the containing offices
+        """
+        candidates = office_cache.get_index(db).candidates(latitude, longitude)
+        distances = haversine_distances(
+            latitude, longitude,
+            [office.latitude for office in candidates],
+            [office.longitude for office in candidates],
+        )
+        for i, office in enumerate(candidates):
+            if office.polygon is not None:
+                distances[i] = office.polygon.distances(latitude, longitude)[0]
+        distances = distances.tolist()
+        
+        return [
+            cls._build_status(latitude, longitude, office, distance)
+            for office, distance in zip(candidates, distances)
+            if distance <= office.radius
+        ]
+
+    @classmethod
+    def check_batch(
+        cls, 
+        db: Session, 
+        locations: Sequence[LocationCheck]
+    ) -> Iterator[List[GeofenceStatus]]:
+        """Check many locations against the office geofences in one pass.
         
-        for office in offices:
-            status = cls.check_within_geofence(latitude, longitude, office)
-            results.append(status)
+        Distances for every location are computed block by block with the
+        vectorized distance engine. Items with an ``office_id`` only report
+        that office, and items with ``within_only`` only report containing
+        offices, mirroring the single check-location endpoint.
         
-        return results
+        Args:
+            db: Database session
+            locations: Locations to check
+            
+        Yields:
+            List of GeofenceStatus objects per location, in input order
+            
+        Raises:
+            KeyError: If an item references an office that does not exist
+        """
+        engine = office_cache.get_engine(db)
+        offices = engine.offices
+        
+        # Resolve per-item office columns up front so a bad ID fails the whole batch
+        columns = [
+            engine.position(item.office_id) if item.office_id else None
+            for item in locations
+        ]
+        
+        blocks = engine.iter_blocks(
+            [item.latitude for item in locations],
+            [item.longitude for item in locations],
+        )
+        
+        for block, distances, within in _timed_blocks(blocks):
+            for row, (item, column) in enumerate(zip(locations[block], columns[block])):
+                if column is not None:
+                    selected = [column]
+                elif item.within_only:
+                    selected = within[row].nonzero()[0].tolist()
+                else:
+                    selected = range(len(offices))
+                
+                row_distances = distances[row].tolist()
+                row_within = within[row].tolist()
+                yield [
+                    GeofenceStatus.construct(
+                        is_within_geofence=row_within[i],
+                        office_id=offices[i].id,
+                        office_name=offices[i].name,
+                        distance=row_distances[i],
+                    )
+                    for i in selected
+                ]
 
     @classmethod
+    @GEOFENCE_SECONDS.labels("nearest").time()
     def find_nearest_geofence(
         cls, 
         db: Session, 
@@ -99,6 +228,9 @@ class GeofenceService:
     ) -> Optional[GeofenceStatus]:
         """Find the nearest office geofence to the given coordinates.
         
+        Polygon offices are ranked by the distance to their polygon, so the
+        result has the smallest distance reported by ``check_all_geofences``.
+        
         Args:
             db: Database session
             latitude: Latitude to check
@@ -107,10 +239,21 @@ class GeofenceService:
         Returns:
             GeofenceStatus object for the nearest office
         """
-        results = cls.check_all_geofences(db, latitude, longitude)
+        nearest = office_cache.get_index(db).nearest(latitude, longitude, k=1)
         
-        if not results:
+        if not nearest:
             return None
             
-        # Find the result with minimum distance
-        return min(results, key=lambda x: x.distance)
\ No newline at end of file
+        office, _ = nearest[0]
+        return cls.check_within_geofence(latitude, longitude, office)
+
+
+def _timed_blocks(blocks: Iterator[Tuple]) -> Iterator[Tuple]:
+    """Record the time to compute each distance block of a batch check."""
+    timer = GEOFENCE_SECONDS.labels("batch_block")
+    while True:
+        with timer.time():
+            block = next(blocks, None)
+        if block is None:
+            return
+        yield block
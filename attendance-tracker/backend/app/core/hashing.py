@@ -0,0 +1,205 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.logger import logger
+
+T = TypeVar("T")
+
+# Security settings. Pinning min/max to the configured cost makes
+# needs_update() flag stored hashes with any other cost for rehashing.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+class HashingOverloadedError(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Bounded worker pool for bcrypt hashing and verification.
+
+    bcrypt runs in a dedicated process pool of ``PASSWORD_HASH_WORKERS``
+    processes so a login storm cannot starve the threadpool or event loop
+    used by check-ins. At most ``PASSWORD_HASH_MAX_QUEUE`` operations may be
+    queued or running; beyond that callers get ``HashingOverloadedError``.
+    Setting ``PASSWORD_HASH_WORKERS`` to 0 runs hashing in the threadpool.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._queue_depth = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def _get_executor(self) -> Optional[Executor]:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            return None
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Spawn instead of fork: the API process runs threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=settings.PASSWORD_HASH_WORKERS,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                    logger.info(
+                        "Started password hashing pool with %d workers",
+                        settings.PASSWORD_HASH_WORKERS,
+                    )
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._queue_depth >= settings.PASSWORD_HASH_MAX_QUEUE:
+                self._rejected += 1
+                raise HashingOverloadedError(
+                    f"Password hashing queue is full ({self._queue_depth} pending)"
+                )
+            self._queue_depth += 1
+
+    def _release(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._queue_depth -= 1
+            self._completed += 1
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return await run_in_threadpool(fn, *args)
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+        finally:
+            self._release(started)
+
+    def _run_blocking(self, fn: Callable[..., T], *args: Any) -> T:
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                return fn(*args)
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+        finally:
+            self._release(started)
+
+    def _discard_executor(self, executor: Executor) -> None:
+        # A worker died; start a fresh pool on the next call
+        logger.error("Password hashing pool is broken; restarting it")
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the pool.
+
+        Args:
+            password: Plain text password
+
+        Returns:
+            Hashed password
+
+        Raises:
+            HashingOverloadedError: If the queue is full
+        """
+        return await self._run(_hash, password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify a password on the pool and rehash it if its cost is out of date.
+
+        Args:
+            plain_password: Plain text password
+            hashed_password: Hashed password
+
+        Returns:
+            Tuple of whether the password matches and the replacement hash,
+            which is None unless the stored hash needs updating
+
+        Raises:
+            HashingOverloadedError: If the queue is full
+        """
+        return await self._run(_verify_and_update, plain_password, hashed_password)
+
+    def hash_blocking(self, password: str) -> str:
+        """Hash a password on the pool from a sync (threadpool) handler.
+
+        Args:
+            password: Plain text password
+
+        Returns:
+            Hashed password
+
+        Raises:
+            HashingOverloadedError: If the queue is full
+        """
+        return self._run_blocking(_hash, password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool statistics.
+
+        Returns:
+            Dictionary with worker count, queue depth and latency figures
+        """
+        with self._lock:
+            return {
+                "workers": max(settings.PASSWORD_HASH_WORKERS, 0),
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "queue_depth": self._queue_depth,
+                "max_queue": settings.PASSWORD_HASH_MAX_QUEUE,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "latency_seconds_avg": (
+                    self._latency_total / self._completed if self._completed else 0.0
+                ),
+                "latency_seconds_max": self._latency_max,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Create a default password hasher instance
+password_hasher = PasswordHasher()
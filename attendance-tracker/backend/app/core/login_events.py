@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, exc, select, update
+
+from app.config import settings
+from app.db.base import engine
+from app.logger import logger
+from app.models.models import User, UserLoginHistory
+
+_history = UserLoginHistory.__table__
+_users = User.__table__
+
+# Newest session of a user still open at the logout time. Bound parameter
+# names must differ from column names in Core executemany statements.
+_close_session = update(_history).where(
+    _history.c.id == select(_history.c.id).where(
+        and_(
+            _history.c.user_id == bindparam("b_user_id"),
+            _history.c.logout_time.is_(None),
+            _history.c.login_time <= bindparam("b_logout_time"),
+        )
+    ).order_by(
+        _history.c.login_time.desc(), _history.c.id.desc()
+    ).limit(1).scalar_subquery()
+).values(logout_time=bindparam("b_logout_time"))
+
+_set_last_login = update(_users).where(
+    _users.c.id == bindparam("b_user_id")
+).values(last_login=bindparam("b_last_login"))
+
+
+class LoginEventWriter:
+    """Write-behind buffer for login history and ``users.last_login``.
+
+    Login and logout only queue an event; a background thread writes queued
+    events in one transaction every ``LOGIN_EVENTS_FLUSH_MS`` or as soon as
+    ``LOGIN_EVENTS_BATCH_SIZE`` are pending, using one executemany per
+    statement. Each logout closes the user's newest session opened before
+    it, so batches need no ordering between logins and logouts. Events
+    beyond ``LOGIN_EVENTS_MAX_QUEUE`` are dropped and counted. While the
+    database is unreachable, retries back off exponentially from
+    ``LOGIN_EVENTS_FLUSH_MS`` up to ``LOGIN_EVENTS_MAX_RETRY_MS``.
+    """
+
+    def __init__(self) -> None:
+        self._logins: Deque[Dict[str, Any]] = deque()
+        self._logouts: Deque[Dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._flushed = 0
+        self._dropped = 0
+        self._failures = 0
+
+    def _pending(self) -> int:
+        return len(self._logins) + len(self._logouts)
+
+    def _enqueue(self, queue: Deque[Dict[str, Any]], event: Dict[str, Any]) -> None:
+        with self._cond:
+            if self._pending() >= settings.LOGIN_EVENTS_MAX_QUEUE:
+                self._dropped += 1
+                logger.error("Login event queue is full; dropping %s", event)
+                return
+
+            queue.append(event)
+            if self._thread is None:
+                self._start()
+            if self._pending() >= settings.LOGIN_EVENTS_BATCH_SIZE:
+                self._cond.notify()
+
+    def _start(self) -> None:
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="login-event-writer", daemon=True
+        )
+        self._thread.start()
+
+    def record_login(
+        self,
+        user_id: int,
+        login_time: datetime,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+    ) -> None:
+        """Queue a login history row and a ``last_login`` update.
+
+        Args:
+            user_id: ID of the user who logged in
+            login_time: Login time (UTC)
+            ip_address: Client address
+            user_agent: Client user agent
+        """
+        self._enqueue(self._logins, {
+            "user_id": user_id,
+            "login_time": login_time,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+        })
+
+    def record_logout(self, user_id: int, logout_time: datetime) -> None:
+        """Queue closing the user's latest open login session.
+
+        Args:
+            user_id: ID of the user who logged out
+            logout_time: Logout time (UTC)
+        """
+        self._enqueue(self._logouts, {
+            "b_user_id": user_id,
+            "b_logout_time": logout_time,
+        })
+
+    def _run(self) -> None:
+        interval = settings.LOGIN_EVENTS_FLUSH_MS / 1000
+        retries = 0
+        while True:
+            with self._cond:
+                if retries:
+                    # A full batch must not cut the wait short after a failure
+                    delay = min(interval * 2 ** (retries - 1), settings.LOGIN_EVENTS_MAX_RETRY_MS / 1000)
+                    batch_size = float("inf")
+                else:
+                    delay, batch_size = interval, settings.LOGIN_EVENTS_BATCH_SIZE
+                deadline = time.monotonic() + delay
+                while (
+                    not self._stopping
+                    and self._pending() < batch_size
+                    and time.monotonic() < deadline
+                ):
+                    self._cond.wait(deadline - time.monotonic())
+                stopping = self._stopping
+            _, failed = self._flush()
+            if stopping:
+                return
+            retries = retries + 1 if failed else 0
+
+    def _take_batch(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        with self._cond:
+            logins, logouts = list(self._logins), list(self._logouts)
+            self._logins.clear()
+            self._logouts.clear()
+        return logins, logouts
+
+    def _requeue(self, logins: List[Dict[str, Any]], logouts: List[Dict[str, Any]]) -> None:
+        """Put a failed batch back in front of the queue, oldest logins dropped first if full."""
+        with self._cond:
+            room = max(0, settings.LOGIN_EVENTS_MAX_QUEUE - self._pending())
+            overflow = max(0, len(logins) + len(logouts) - room)
+            if overflow:
+                dropped_logins = min(overflow, len(logins))
+                logins = logins[dropped_logins:]
+                logouts = logouts[overflow - dropped_logins:]
+                self._dropped += overflow
+                logger.error("Login event queue is full; dropping %d events of the failed batch", overflow)
+            self._logins.extendleft(reversed(logins))
+            self._logouts.extendleft(reversed(logouts))
+
+    def flush(self) -> int:
+        """Write all queued events now.
+
+        When the database is unreachable the events are put back and
+        retried on the next flush; a batch failing for any other reason is
+        dropped.
+
+        Returns:
+            Number of events written
+        """
+        return self._flush()[0]
+
+    def _flush(self) -> Tuple[int, bool]:
+        """Write all queued events.
+
+        Returns:
+            Number of events written, and whether the batch was put back for a retry
+        """
+        logins, logouts = self._take_batch()
+        if not logins and not logouts:
+            return 0, False
+
+        last_login: Dict[int, datetime] = {}
+        for event in logins:
+            user_id = event["user_id"]
+            last_login[user_id] = max(event["login_time"], last_login.get(user_id, event["login_time"]))
+
+        try:
+            with engine.begin() as conn:
+                if logins:
+                    conn.execute(_history.insert(), logins)
+                    conn.execute(_set_last_login, [
+                        {"b_user_id": user_id, "b_last_login": login_time}
+                        for user_id, login_time in last_login.items()
+                    ])
+                if logouts:
+                    # Executed in order, so repeated logouts close successive sessions
+                    conn.execute(_close_session, sorted(logouts, key=lambda e: e["b_logout_time"]))
+        except exc.OperationalError as e:
+            logger.error("Failed to write %d login events, retrying: %s", len(logins) + len(logouts), str(e))
+            with self._cond:
+                self._failures += 1
+            self._requeue(logins, logouts)
+            return 0, True
+        except Exception as e:
+            logger.error("Dropping %d login events: %s", len(logins) + len(logouts), str(e))
+            with self._cond:
+                self._failures += 1
+                self._dropped += len(logins) + len(logouts)
+            return 0, False
+
+        written = len(logins) + len(logouts)
+        with self._cond:
+            self._flushed += written
+        logger.debug("Wrote %d login events", written)
+        return written, False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue statistics.
+
+        Returns:
+            Dictionary with pending, written, dropped and failed flush counts
+        """
+        with self._cond:
+            return {
+                "pending": self._pending(),
+                "flushed": self._flushed,
+                "dropped": self._dropped,
+                "failed_flushes": self._failures,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the writer thread after writing everything still queued."""
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        # Events queued while the thread was exiting, or left after a failure
+        self.flush()
+
+
+# Create a default login event writer instance
+login_events = LoginEventWriter()
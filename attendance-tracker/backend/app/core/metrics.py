@@ -0,0 +1,394 @@
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds, as used by Prometheus client libraries
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Text exposition format served by /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class for a metric family with optional labels."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        """Get the child metric for a set of label values.
+
+        Args:
+            values: One value per label name, in order
+
+        Returns:
+            Child metric
+        """
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def _default(self) -> Any:
+        return self.labels()
+
+    def collect(self) -> List[str]:
+        """Render this metric family in text exposition format.
+
+        Returns:
+            Lines of the exposition
+        """
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.collect(self.name, self.labelnames, key))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def collect(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> List[str]:
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self._value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled counter."""
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def collect(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> List[str]:
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self._value)}"]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the unlabelled gauge."""
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrement the unlabelled gauge."""
+        self._default().dec(amount)
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled gauge."""
+        self._default().set(value)
+
+
+class _Timer:
+    """Context manager and decorator observing elapsed time on a histogram."""
+
+    def __init__(self, histogram: "_HistogramChild") -> None:
+        self._histogram = histogram
+        self._started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+    def __call__(self, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with _Timer(self._histogram):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self._buckets = tuple(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = len(self._buckets)
+        for i, bound in enumerate(self._buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def collect(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> List[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._buckets + (float("inf"),), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Observe a value on the unlabelled histogram."""
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        """Time a block or function on the unlabelled histogram."""
+        return self._default().time()
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together by the /metrics endpoint.
+
+    Besides metric objects, callbacks can be registered that report values
+    owned by other components (e.g. the password hashing pool) at scrape
+    time as ``(name, kind, documentation, value)`` tuples.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[Any, ...]]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric to the registry.
+
+        Args:
+            metric: Metric to add
+
+        Returns:
+            The same metric, for assignment at module level
+        """
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[Any, ...]]]) -> None:
+        """Add a callback reporting values at scrape time.
+
+        Args:
+            collector: Function yielding (name, kind, documentation, value)
+                tuples, optionally followed by a dict of labels
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+
+        described = set()
+        for collector in self._collectors:
+            for name, kind, documentation, value, *labels in collector():
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {kind}")
+                label_dict = labels[0] if labels else {}
+                label_text = _format_labels(list(label_dict), list(label_dict.values()))
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+class RequestDbStats:
+    """Database work done while serving one request."""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Set by the metrics middleware for the duration of a request. The object is
+# mutated in place, so queries run in threadpool workers are counted too.
+current_request_db: ContextVar[Optional[RequestDbStats]] = ContextVar("current_request_db", default=None)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency, status, in-flight count and DB work.
+
+    Requests are labelled with the matched route template (e.g.
+    ``/api/v1/offices/{office_id}``) rather than the raw path, to keep label
+    cardinality bounded.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        db_stats = RequestDbStats()
+        token = current_request_db.set(db_stats)
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            current_request_db.reset(token)
+
+            route = scope.get("route")
+            route_label = getattr(route, "path", "unmatched")
+            method = scope["method"]
+
+            HTTP_REQUESTS.labels(method, route_label, status_code).inc()
+            HTTP_REQUEST_SECONDS.labels(method, route_label).observe(elapsed)
+            HTTP_REQUEST_DB_QUERIES.labels(route_label).observe(db_stats.queries)
+            HTTP_REQUEST_DB_SECONDS.labels(route_label).observe(db_stats.seconds)
+
+
+# Create a default metrics registry instance
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status"),
+))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"),
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served",
+))
+HTTP_REQUEST_DB_QUERIES = registry.register(Histogram(
+    "http_request_db_queries", "Database queries per HTTP request", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+))
+HTTP_REQUEST_DB_SECONDS = registry.register(Histogram(
+    "http_request_db_seconds", "Database time per HTTP request", ("route",),
+))
+DB_QUERIES = registry.register(Counter(
+    "db_queries_total", "Database statements executed",
+))
+DB_QUERY_SECONDS = registry.register(Histogram(
+    "db_query_duration_seconds", "Database statement execution time",
+))
+DB_POOL_CHECKOUT_SECONDS = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection", ("engine",),
+))
+DB_POOL_TIMEOUTS = registry.register(Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ("engine",),
+))
+DB_POOL_INVALIDATIONS = registry.register(Counter(
+    "db_pool_invalidations_total", "Pooled connections invalidated (disconnects, failed pings)", ("engine",),
+))
+DB_POOL_CONNECTS = registry.register(Counter(
+    "db_pool_connects_total", "New DBAPI connections opened by the pool", ("engine",),
+))
+GEOFENCE_SECONDS = registry.register(Histogram(
+    "geofence_evaluation_seconds", "Geofence evaluation time by operation", ("operation",),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+))
+PASSWORD_HASH_SECONDS = registry.register(Histogram(
+    "password_hash_duration_seconds", "Password hash and verify time including pool queueing", ("operation",),
+))
@@ -0,0 +1,206 @@
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache_versions import bump_cache_version, get_cache_version
+from app.core.distance import DistanceEngine
+from app.core.polygon import prepare
+from app.core.spatial import OfficeGeometry, OfficeSpatialIndex
+from app.logger import logger
+from app.models.models import Office
+
+OFFICES_CACHE_NAME = "offices"
+
+
+def office_geometry(office: Any) -> OfficeGeometry:
+    """Snapshot an office or office row, preparing its polygon geofence.
+
+    Args:
+        office: Office or row with the office geofence columns
+
+    Returns:
+        OfficeGeometry
+    """
+    return OfficeGeometry(
+        office.id, office.name, office.latitude, office.longitude, office.radius,
+        prepare(office.geofence),
+    )
+
+
+class _Snapshot(NamedTuple):
+    version: int
+    offices: Dict[int, OfficeGeometry]
+    index: OfficeSpatialIndex
+    engine: DistanceEngine
+    loaded_at: float
+
+
+class OfficeCache:
+    """Process-local cache of office geometry, its spatial index and distance engine.
+
+    Each worker keeps its own copy and compares it against the shared
+    ``cache_versions`` stamp at most every
+    ``OFFICE_CACHE_VERSION_CHECK_SECONDS``. Office CRUD endpoints bump the
+    stamp in the same transaction as the change and patch the local copy,
+    so the check-in path does not need to SELECT offices.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: Optional[_Snapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session) -> _Snapshot:
+        version = get_cache_version(db, OFFICES_CACHE_NAME)
+        rows = db.query(
+            Office.id, Office.name, Office.latitude, Office.longitude, Office.radius, Office.geofence
+        ).order_by(Office.id).all()
+
+        offices = {row.id: office_geometry(row) for row in rows}
+        snapshot = _Snapshot(
+            version, offices, OfficeSpatialIndex(offices.values()),
+            DistanceEngine(offices.values()), time.monotonic()
+        )
+
+        logger.info("Loaded office cache (version %d, %d offices)", version, len(offices))
+        return snapshot
+
+    def _current(self, db: Session) -> _Snapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+
+        if snapshot is not None and now - self._checked_at < settings.OFFICE_CACHE_VERSION_CHECK_SECONDS:
+            return snapshot
+
+        # Never wait for a refresh in progress: with DB_ASYNC_MODE it can be
+        # suspended in a query on this same thread, and blocking would
+        # deadlock the event loop. Serve the stale copy meanwhile.
+        if not self._lock.acquire(blocking=False):
+            return snapshot if snapshot is not None else self._load(db)
+
+        try:
+            snapshot = self._snapshot
+            if snapshot is not None and now - self._checked_at < settings.OFFICE_CACHE_VERSION_CHECK_SECONDS:
+                return snapshot
+
+            if (
+                snapshot is None
+                or now - snapshot.loaded_at >= settings.OFFICE_CACHE_MAX_AGE_SECONDS
+                or get_cache_version(db, OFFICES_CACHE_NAME) != snapshot.version
+            ):
+                snapshot = self._snapshot = self._load(db)
+
+            self._checked_at = now
+            return snapshot
+        finally:
+            self._lock.release()
+
+    def get(self, db: Session, office_id: int) -> Optional[OfficeGeometry]:
+        """Get a single office by ID.
+
+        Args:
+            db: Database session, used only when the cache is stale
+            office_id: ID of the office
+
+        Returns:
+            OfficeGeometry or None if the office does not exist
+        """
+        return self._current(db).offices.get(office_id)
+
+    def all(self, db: Session) -> List[OfficeGeometry]:
+        """Get all offices ordered by ID.
+
+        Args:
+            db: Database session, used only when the cache is stale
+
+        Returns:
+            List of OfficeGeometry
+        """
+        return self._current(db).index.offices
+
+    def get_index(self, db: Session) -> OfficeSpatialIndex:
+        """Get the spatial index over all offices.
+
+        Args:
+            db: Database session, used only when the cache is stale
+
+        Returns:
+            OfficeSpatialIndex
+        """
+        return self._current(db).index
+
+    def get_engine(self, db: Session) -> DistanceEngine:
+        """Get the batched distance engine over all offices.
+
+        Args:
+            db: Database session, used only when the cache is stale
+
+        Returns:
+            DistanceEngine with offices in ID order
+        """
+        return self._current(db).engine
+
+    def record_change(self, db: Session) -> int:
+        """Bump the shared office version as part of an office write.
+
+        Call before committing the office change so the stamp and the
+        change land in the same transaction.
+
+        Args:
+            db: Database session
+
+        Returns:
+            The new version number, to pass to ``upsert`` or ``discard``
+        """
+        return bump_cache_version(db, OFFICES_CACHE_NAME)
+
+    def upsert(self, office: Office, version: int) -> None:
+        """Patch the local copy after a committed office create or update.
+
+        Args:
+            office: The committed office
+            version: Version returned by ``record_change``
+        """
+        self._patch(version, office.id, office_geometry(office))
+
+    def discard(self, office_id: int, version: int) -> None:
+        """Patch the local copy after a committed office delete.
+
+        Args:
+            office_id: ID of the deleted office
+            version: Version returned by ``record_change``
+        """
+        self._patch(version, office_id, None)
+
+    def invalidate(self) -> None:
+        """Drop the local copy so the next read reloads from the database."""
+        with self._lock:
+            self._snapshot = None
+
+    def _patch(self, version: int, office_id: int, office: Optional[OfficeGeometry]) -> None:
+        with self._lock:
+            snapshot = self._snapshot
+
+            # Another worker changed offices in between; reload on next read
+            if snapshot is None or snapshot.version != version - 1:
+                self._snapshot = None
+                return
+
+            offices = dict(snapshot.offices)
+            if office is None:
+                offices.pop(office_id, None)
+            else:
+                offices[office_id] = office
+            offices = dict(sorted(offices.items()))
+
+            self._snapshot = _Snapshot(
+                version, offices, OfficeSpatialIndex(offices.values()),
+                DistanceEngine(offices.values()), snapshot.loaded_at
+            )
+
+
+# Create a default office cache instance
+office_cache = OfficeCache()
@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor.
+
+    Args:
+        values: Sort key values, in ORDER BY order
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Type) -> Tuple[Any, ...]:
+    """Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor: Cursor string from the client
+        types: Expected type of each sort key value (datetime or int)
+
+    Returns:
+        Tuple of sort key values
+
+    Raises:
+        HTTPException: If the cursor is malformed or does not match the key
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("cursor has the wrong number of values")
+
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, payload)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def keyset_after(
+    columns: Sequence[ColumnElement], values: Sequence[Any], descending: bool = False
+) -> ColumnElement:
+    """Build the WHERE clause selecting rows after a cursor position.
+
+    Expands ``(a, b) > (x, y)`` into ``a > x OR (a = x AND b > y)`` because
+    SQL Server has no row-value comparison. The clause can use a composite
+    index on the same columns.
+
+    Args:
+        columns: Sort key columns, in ORDER BY order
+        values: Cursor values for those columns
+        descending: Whether the sort is descending
+
+    Returns:
+        SQLAlchemy boolean clause
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        past = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, past))
+    return or_(*clauses)
+
+
+def set_next_cursor(
+    response: Response, rows: Sequence[Any], limit: int, key: Callable[[Any], Tuple[Any, ...]]
+) -> Optional[str]:
+    """Set the next-page cursor header when the page is full.
+
+    Args:
+        response: Response to add the header to
+        rows: Rows on the current page
+        limit: Requested page size
+        key: Function returning the sort key of a row
+
+    Returns:
+        The cursor, or None when this is the last page
+    """
+    if not rows or len(rows) < limit:
+        return None
+
+    cursor = encode_cursor(*key(rows[-1]))
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
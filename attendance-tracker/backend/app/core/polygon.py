@@ -0,0 +1,364 @@
+import math
+import struct
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.spatial import EARTH_RADIUS_METERS
+
+# GeoJSON geometry types accepted as office geofences
+GEOMETRY_TYPES = ("Polygon", "MultiPolygon")
+
+# Upper bound on vertices per geofence, which bounds the prepared edge table
+MAX_VERTICES = 10_000
+
+# Upper bound on the number of horizontal bands edges are bucketed into
+MAX_BANDS = 4096
+
+# Upper bound on (point, edge) pairs per distance block, capping temporary memory
+MAX_EDGE_PAIRS = 1_000_000
+
+_WKB_POLYGON = 3
+_WKB_MULTIPOLYGON = 6
+
+# A geofence is a list of polygons, each a list of closed (lon, lat) rings;
+# the first ring is the outline and the rest are holes
+Rings = List[np.ndarray]
+
+
+def parse_geojson(geometry: Any) -> List[Rings]:
+    """Validate a GeoJSON Polygon or MultiPolygon geometry.
+
+    Unclosed rings are closed and altitudes are dropped.
+
+    Args:
+        geometry: GeoJSON geometry object
+
+    Returns:
+        Polygons as lists of (k, 2) float arrays of (lon, lat)
+
+    Raises:
+        ValueError: If the geometry is not a valid polygon or multipolygon
+    """
+    if not isinstance(geometry, dict) or geometry.get("type") not in GEOMETRY_TYPES:
+        raise ValueError(f"Geofence must be a GeoJSON {' or '.join(GEOMETRY_TYPES)}")
+
+    coordinates = geometry.get("coordinates")
+    polygons = [coordinates] if geometry["type"] == "Polygon" else coordinates
+    if not isinstance(polygons, list) or not polygons:
+        raise ValueError("Geofence has no polygons")
+
+    parsed = []
+    for polygon in polygons:
+        if not isinstance(polygon, list) or not polygon:
+            raise ValueError("Geofence polygon has no rings")
+        parsed.append([_parse_ring(ring) for ring in polygon])
+
+    points = np.concatenate([ring for polygon in parsed for ring in polygon])
+    if len(points) > MAX_VERTICES:
+        raise ValueError(f"Geofence has more than {MAX_VERTICES} vertices")
+    if np.ptp(points[:, 0]) >= 180.0:
+        raise ValueError("Geofence must span less than 180 degrees of longitude")
+    return parsed
+
+
+def _parse_ring(ring: Any) -> np.ndarray:
+    try:
+        points = np.array(ring, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError("Geofence ring must be a list of [longitude, latitude] positions")
+    if points.ndim != 2 or points.shape[1] < 2:
+        raise ValueError("Geofence ring must be a list of [longitude, latitude] positions")
+
+    points = points[:, :2]
+    if not np.isfinite(points).all() or (np.abs(points[:, 0]) > 180).any() or (np.abs(points[:, 1]) > 90).any():
+        raise ValueError("Geofence position out of range")
+    if (points[0] != points[-1]).any():
+        points = np.vstack([points, points[:1]])
+    if len(np.unique(points, axis=0)) < 3:
+        raise ValueError("Geofence ring needs at least 3 distinct positions")
+    return points
+
+
+def to_geojson(polygons: Sequence[Rings]) -> Dict[str, Any]:
+    """Build a GeoJSON geometry, a Polygon when there is only one polygon.
+
+    Args:
+        polygons: Polygons from ``parse_geojson`` or ``decode_wkb``
+
+    Returns:
+        GeoJSON geometry object
+    """
+    coordinates = [[ring.tolist() for ring in polygon] for polygon in polygons]
+    if len(coordinates) == 1:
+        return {"type": "Polygon", "coordinates": coordinates[0]}
+    return {"type": "MultiPolygon", "coordinates": coordinates}
+
+
+def encode_wkb(polygons: Sequence[Rings]) -> bytes:
+    """Encode polygons as little-endian WKB, 16 bytes per vertex.
+
+    Args:
+        polygons: Polygons from ``parse_geojson``
+
+    Returns:
+        WKB Polygon, or MultiPolygon when there are several polygons
+    """
+    def polygon_wkb(rings: Rings) -> bytes:
+        parts = [struct.pack("<BII", 1, _WKB_POLYGON, len(rings))]
+        for ring in rings:
+            parts.append(struct.pack("<I", len(ring)))
+            parts.append(np.ascontiguousarray(ring, dtype="<f8").tobytes())
+        return b"".join(parts)
+
+    if len(polygons) == 1:
+        return polygon_wkb(polygons[0])
+    return struct.pack("<BII", 1, _WKB_MULTIPOLYGON, len(polygons)) + b"".join(
+        polygon_wkb(rings) for rings in polygons
+    )
+
+
+def decode_wkb(data: bytes) -> List[Rings]:
+    """Decode a WKB Polygon or MultiPolygon.
+
+    Args:
+        data: WKB bytes
+
+    Returns:
+        Polygons as lists of (k, 2) float arrays of (lon, lat)
+
+    Raises:
+        ValueError: If the data is not a WKB polygon or multipolygon
+    """
+    data = bytes(data)
+
+    def header(offset: int) -> Tuple[str, int, int, int]:
+        order = "<" if data[offset] == 1 else ">"
+        geometry_type, count = struct.unpack_from(order + "II", data, offset + 1)
+        return order, geometry_type, count, offset + 9
+
+    def polygon(offset: int) -> Tuple[Rings, int]:
+        order, geometry_type, ring_count, offset = header(offset)
+        if geometry_type != _WKB_POLYGON:
+            raise ValueError(f"Unsupported WKB geometry type {geometry_type}")
+        rings = []
+        for _ in range(ring_count):
+            (size,) = struct.unpack_from(order + "I", data, offset)
+            offset += 4
+            rings.append(np.frombuffer(data, dtype=order + "f8", count=size * 2, offset=offset).reshape(size, 2))
+            offset += size * 16
+        return rings, offset
+
+    order, geometry_type, count, offset = header(0)
+    if geometry_type == _WKB_POLYGON:
+        return [polygon(0)[0]]
+    if geometry_type != _WKB_MULTIPOLYGON:
+        raise ValueError(f"Unsupported WKB geometry type {geometry_type}")
+
+    polygons = []
+    for _ in range(count):
+        rings, offset = polygon(offset)
+        polygons.append(rings)
+    return polygons
+
+
+def geojson_to_wkb(geometry: Optional[Dict[str, Any]]) -> Optional[bytes]:
+    """Validate and encode a GeoJSON geofence for storage.
+
+    Args:
+        geometry: GeoJSON Polygon or MultiPolygon, or None
+
+    Returns:
+        WKB bytes, or None when there is no geofence
+
+    Raises:
+        ValueError: If the geometry is invalid
+    """
+    return encode_wkb(parse_geojson(geometry)) if geometry is not None else None
+
+
+def wkb_to_geojson(data: Optional[bytes]) -> Optional[Dict[str, Any]]:
+    """Decode a stored geofence to GeoJSON.
+
+    Args:
+        data: WKB bytes, or None
+
+    Returns:
+        GeoJSON geometry, or None when there is no geofence
+    """
+    return to_geojson(decode_wkb(data)) if data is not None else None
+
+
+class PreparedPolygon:
+    """Polygon or multipolygon geofence prepared for fast point tests.
+
+    Vertices are projected once onto a local plane in meters centered on
+    the bounding box, which is accurate to well under a meter at building
+    and campus scale. Edges are bucketed into horizontal bands, so a
+    containment test rejects on the bounding box and then ray-casts only
+    against the few edges of the point's band instead of every edge.
+    Rings are combined with the even-odd rule, so holes and separate
+    polygons need no special casing.
+    """
+
+    def __init__(self, polygons: Sequence[Rings]) -> None:
+        """Precompute the bounding box and edge table.
+
+        Args:
+            polygons: Polygons from ``parse_geojson`` or ``decode_wkb``
+        """
+        rings = [ring for polygon in polygons for ring in polygon]
+        points = np.concatenate(rings)
+
+        self.lon_min, self.lat_min = points.min(axis=0).tolist()
+        self.lon_max, self.lat_max = points.max(axis=0).tolist()
+        self._lat0 = (self.lat_min + self.lat_max) / 2
+        self._lon0 = (self.lon_min + self.lon_max) / 2
+        self._y_scale = math.radians(1) * EARTH_RADIUS_METERS
+        self._x_scale = self._y_scale * math.cos(math.radians(self._lat0))
+
+        starts = np.concatenate([ring[:-1] for ring in rings])
+        ends = np.concatenate([ring[1:] for ring in rings])
+        self._x1, self._y1 = self._project(starts[:, 1], starts[:, 0])
+        self._x2, self._y2 = self._project(ends[:, 1], ends[:, 0])
+
+        self._x_min, self._y_min = self._project(self.lat_min, self.lon_min)
+        self._x_max, self._y_max = self._project(self.lat_max, self.lon_max)
+
+        # Edge table: band b holds the edges overlapping it, stored as one
+        # flat index array sliced by band offsets
+        edge_count = len(self._x1)
+        self._band_count = min(max(edge_count, 1), MAX_BANDS)
+        self._band_height = (self._y_max - self._y_min) / self._band_count or 1.0
+
+        first = self._band(np.minimum(self._y1, self._y2))
+        counts = self._band(np.maximum(self._y1, self._y2)) - first + 1
+        edges = np.repeat(np.arange(edge_count), counts)
+        bands = first[edges] + np.arange(len(edges)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        order = np.argsort(bands, kind="stable")
+        self._band_edges = edges[order]
+        self._band_offsets = np.searchsorted(bands[order], np.arange(self._band_count + 1))
+
+    @classmethod
+    def from_wkb(cls, data: bytes) -> "PreparedPolygon":
+        """Prepare a stored geofence.
+
+        Args:
+            data: WKB bytes
+
+        Returns:
+            PreparedPolygon
+        """
+        return cls(decode_wkb(data))
+
+    def __len__(self) -> int:
+        return len(self._x1)
+
+    def _project(self, latitudes: Any, longitudes: Any) -> Tuple[Any, Any]:
+        return (
+            (np.asarray(longitudes, dtype=np.float64) - self._lon0) * self._x_scale,
+            (np.asarray(latitudes, dtype=np.float64) - self._lat0) * self._y_scale,
+        )
+
+    def _band(self, y: np.ndarray) -> np.ndarray:
+        return np.clip(
+            np.floor((y - self._y_min) / self._band_height).astype(np.int64), 0, self._band_count - 1
+        )
+
+    def bounds(self, margin: float = 0.0) -> Tuple[float, float, float, float]:
+        """Get the bounding box in degrees, widened by a margin.
+
+        Args:
+            margin: Margin in meters
+
+        Returns:
+            Tuple of (lat_min, lat_max, lon_min, lon_max)
+        """
+        d_lat = margin / self._y_scale + 1e-9
+        d_lon = margin / self._x_scale + 1e-9
+        return (
+            max(self.lat_min - d_lat, -90.0), min(self.lat_max + d_lat, 90.0),
+            max(self.lon_min - d_lon, -180.0), min(self.lon_max + d_lon, 180.0),
+        )
+
+    def _contains(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        inside = np.zeros(len(x), dtype=bool)
+        candidates = np.flatnonzero(
+            (x >= self._x_min) & (x <= self._x_max) & (y >= self._y_min) & (y <= self._y_max)
+        )
+        if not len(candidates):
+            return inside
+
+        px, py = x[candidates], y[candidates]
+        bands = self._band(py)
+        starts = self._band_offsets[bands]
+        counts = self._band_offsets[bands + 1] - starts
+
+        # One (point, edge) pair per edge in each point's band
+        point = np.repeat(np.arange(len(candidates)), counts)
+        edge = self._band_edges[
+            np.repeat(starts, counts) + np.arange(len(point)) - np.repeat(np.cumsum(counts) - counts, counts)
+        ]
+        px, py = px[point], py[point]
+        x1, y1, x2, y2 = self._x1[edge], self._y1[edge], self._x2[edge], self._y2[edge]
+
+        # Ray cast towards +x; horizontal edges never straddle py
+        straddles = (y1 > py) != (y2 > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crosses = straddles & (px < x1 + (py - y1) * (x2 - x1) / (y2 - y1))
+
+        inside[candidates] = np.bincount(point, weights=crosses, minlength=len(candidates)) % 2 == 1
+        return inside
+
+    def contains(self, latitudes: Any, longitudes: Any) -> np.ndarray:
+        """Test which points lie inside the polygon.
+
+        Args:
+            latitudes: Point latitudes in degrees
+            longitudes: Point longitudes in degrees
+
+        Returns:
+            Boolean array, one per point
+        """
+        x, y = self._project(np.atleast_1d(latitudes), np.atleast_1d(longitudes))
+        return self._contains(x, y)
+
+    def distances(self, latitudes: Any, longitudes: Any) -> np.ndarray:
+        """Distance from each point to the polygon, 0 for points inside.
+
+        Outside points are measured to the nearest edge on the local plane.
+
+        Args:
+            latitudes: Point latitudes in degrees
+            longitudes: Point longitudes in degrees
+
+        Returns:
+            Array of distances in meters
+        """
+        x, y = self._project(np.atleast_1d(latitudes), np.atleast_1d(longitudes))
+        result = np.zeros(len(x))
+        outside = np.flatnonzero(~self._contains(x, y))
+
+        dx, dy = self._x2 - self._x1, self._y2 - self._y1
+        length2 = np.maximum(dx * dx + dy * dy, 1e-12)
+        rows = max(1, MAX_EDGE_PAIRS // len(self))
+
+        for start in range(0, len(outside), rows):
+            block = outside[start:start + rows]
+            px, py = x[block][:, None], y[block][:, None]
+            t = np.clip(((px - self._x1) * dx + (py - self._y1) * dy) / length2, 0.0, 1.0)
+            result[block] = np.hypot(px - self._x1 - t * dx, py - self._y1 - t * dy).min(axis=1)
+        return result
+
+
+def prepare(data: Optional[Union[bytes, memoryview]]) -> Optional[PreparedPolygon]:
+    """Prepare a stored geofence column value.
+
+    Args:
+        data: WKB bytes, or None for circle offices
+
+    Returns:
+        PreparedPolygon, or None when there is no geofence
+    """
+    return PreparedPolygon.from_wkb(data) if data is not None else None
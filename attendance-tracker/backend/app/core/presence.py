@@ -0,0 +1,451 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.distance import DistanceEngine
+from app.core.rollups import record_check_in, record_check_out
+from app.logger import logger
+from app.models.models import AttendanceRecord
+
+ENTER = "enter"
+EXIT = "exit"
+
+
+class PresenceEvent(NamedTuple):
+    """A confirmed geofence transition of a user."""
+
+    kind: str
+    user_id: int
+    office_id: int
+    time: datetime
+    latitude: float
+    longitude: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**self._asdict(), "time": self.time.isoformat()}
+
+
+class Pings(NamedTuple):
+    """Parsed location pings as parallel arrays, in arrival order."""
+
+    user_ids: np.ndarray
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    times: np.ndarray
+    inaccurate: int
+    errors: List[str]
+
+
+class _UserState:
+    """Presence of one user; times are epoch seconds."""
+
+    __slots__ = (
+        "office_id", "entering", "entering_since", "entering_at", "leaving_since", "leaving_at",
+        "last_time", "last_position", "last_seen",
+    )
+
+    def __init__(self, office_id: Optional[int]) -> None:
+        self.office_id = office_id
+        self.entering: Optional[int] = None
+        self.entering_since = 0.0
+        self.entering_at = (0.0, 0.0)
+        self.leaving_since: Optional[float] = None
+        self.leaving_at = (0.0, 0.0)
+        self.last_time = -np.inf
+        self.last_position = (0.0, 0.0)
+        self.last_seen = time.time()
+
+
+def _event(kind: str, user_id: int, office_id: int, at: float, position: Tuple[float, float]) -> PresenceEvent:
+    return PresenceEvent(
+        kind, user_id, office_id,
+        datetime.fromtimestamp(at, timezone.utc).replace(tzinfo=None), position[0], position[1],
+    )
+
+
+class PresenceTracker:
+    """Per-worker geofence state machine fed by location pings.
+
+    A user enters an office after their pings stay inside its geofence for
+    ``PRESENCE_ENTER_DWELL_SECONDS`` and leaves after their pings stay
+    more than ``PRESENCE_EXIT_MARGIN_METERS`` beyond it for
+    ``PRESENCE_EXIT_DWELL_SECONDS``; pings in the margin keep the current
+    state, so GPS jitter at the edge does not flap. Users silent for
+    ``PRESENCE_TIMEOUT_SECONDS`` leave at their last ping. Events carry the
+    time and position of the first ping of the dwell.
+
+    State lives in process memory: pings of one user should reach the same
+    worker, and a restarted worker starts from each user's open attendance
+    record when auto attendance is on.
+    """
+
+    def __init__(self) -> None:
+        self._states: Dict[int, _UserState] = {}
+        self._lock = threading.Lock()
+        self._swept_at = time.time()
+        self._pings = 0
+        self._ignored = 0
+        self._rejected = 0
+        self._events = 0
+
+    def unknown(self, user_ids: Iterable[int]) -> List[int]:
+        """Get the users that have no presence state in this worker.
+
+        Args:
+            user_ids: User IDs
+
+        Returns:
+            IDs to seed before processing their pings
+        """
+        return [user_id for user_id in set(user_ids) if user_id not in self._states]
+
+    def seed(self, offices: Dict[int, Optional[int]]) -> None:
+        """Start tracking users, e.g. at the office of their open attendance record.
+
+        Args:
+            offices: Office ID (or None when away) per user ID; known users are kept
+        """
+        with self._lock:
+            for user_id, office_id in offices.items():
+                self._states.setdefault(user_id, _UserState(office_id))
+
+    def process(self, engine: DistanceEngine, pings: Pings, now: Optional[float] = None) -> List[PresenceEvent]:
+        """Run pings through the state machine.
+
+        Distances to every office are computed in vectorized blocks; only
+        the per-ping state update is a Python loop. Pings older than the
+        user's last ping are ignored.
+
+        Args:
+            engine: Distance engine over the current offices
+            pings: Parsed pings
+            now: Current epoch time (default ``time.time()``)
+
+        Returns:
+            Transitions, in the order they were confirmed
+        """
+        now = now or time.time()
+        events: List[PresenceEvent] = []
+        enter_dwell = settings.PRESENCE_ENTER_DWELL_SECONDS
+        exit_dwell = settings.PRESENCE_EXIT_DWELL_SECONDS
+        exit_limits = engine.radii + settings.PRESENCE_EXIT_MARGIN_METERS
+        ignored = 0
+
+        for block, distances, within in engine.iter_blocks(pings.latitudes, pings.longitudes):
+            # Closest office whose geofence contains the ping, -1 when none
+            if len(engine):
+                inside = np.where(within, distances, np.inf)
+                nearest = inside.argmin(axis=1)
+                best = np.where(np.isfinite(inside.min(axis=1)), engine.ids[nearest], -1).tolist()
+            else:
+                best = [-1] * len(distances)
+
+            user_ids = pings.user_ids[block].tolist()
+            times = pings.times[block].tolist()
+            positions = list(zip(pings.latitudes[block].tolist(), pings.longitudes[block].tolist()))
+
+            with self._lock:
+                for row, (user_id, at, position, candidate) in enumerate(zip(user_ids, times, positions, best)):
+                    state = self._states.get(user_id)
+                    if state is None:
+                        state = self._states[user_id] = _UserState(None)
+                    if at < state.last_time:
+                        ignored += 1
+                        continue
+                    state.last_time, state.last_position, state.last_seen = at, position, now
+
+                    if state.office_id is not None:
+                        try:
+                            column = engine.position(state.office_id)
+                            outside = distances[row, column] > exit_limits[column]
+                        except KeyError:
+                            # Office was deleted
+                            outside = True
+
+                        if not outside:
+                            state.leaving_since = None
+                            continue
+                        if state.leaving_since is None:
+                            state.leaving_since, state.leaving_at = at, position
+                        if at - state.leaving_since < exit_dwell:
+                            continue
+
+                        events.append(_event(EXIT, user_id, state.office_id, state.leaving_since, state.leaving_at))
+                        state.office_id, state.leaving_since = None, None
+
+                    if candidate < 0:
+                        state.entering = None
+                        continue
+                    if state.entering != candidate:
+                        state.entering, state.entering_since, state.entering_at = candidate, at, position
+                    if at - state.entering_since >= enter_dwell:
+                        events.append(_event(ENTER, user_id, candidate, state.entering_since, state.entering_at))
+                        state.office_id, state.entering = candidate, None
+
+        with self._lock:
+            self._pings += len(pings.times)
+            self._ignored += ignored + pings.inaccurate
+            self._rejected += len(pings.errors)
+            self._events += len(events)
+        return events
+
+    def expire(self, now: Optional[float] = None) -> List[PresenceEvent]:
+        """Let users silent for ``PRESENCE_TIMEOUT_SECONDS`` leave and forget them.
+
+        Scans all users at most once per minute (or timeout, if shorter);
+        other calls return immediately.
+
+        Args:
+            now: Current epoch time (default ``time.time()``)
+
+        Returns:
+            Exit events at each user's last ping
+        """
+        now = now or time.time()
+        timeout = settings.PRESENCE_TIMEOUT_SECONDS
+        if now - self._swept_at < min(60.0, timeout):
+            return []
+
+        events = []
+        with self._lock:
+            self._swept_at = now
+            for user_id, state in list(self._states.items()):
+                if now - state.last_seen < timeout:
+                    continue
+                if state.office_id is not None:
+                    events.append(_event(EXIT, user_id, state.office_id, state.last_time, state.last_position))
+                del self._states[user_id]
+            self._events += len(events)
+        return events
+
+    def present(self) -> Dict[int, List[int]]:
+        """Get the users currently inside each office, as seen by this worker.
+
+        Returns:
+            User IDs per office ID
+        """
+        offices: Dict[int, List[int]] = {}
+        with self._lock:
+            for user_id, state in self._states.items():
+                if state.office_id is not None:
+                    offices.setdefault(state.office_id, []).append(user_id)
+        return offices
+
+    def stats(self) -> Dict[str, int]:
+        """Get tracker counters.
+
+        Returns:
+            Dict with tracked users, present users, processed pings, ignored
+            (stale or inaccurate) pings, rejected lines and events
+        """
+        with self._lock:
+            return {
+                "users": len(self._states),
+                "present": sum(state.office_id is not None for state in self._states.values()),
+                "pings": self._pings,
+                "ignored": self._ignored,
+                "rejected": self._rejected,
+                "events": self._events,
+            }
+
+    def reset(self) -> None:
+        """Forget all presence state."""
+        with self._lock:
+            self._states.clear()
+
+
+def _parse_time(value: Any, now: float) -> float:
+    if value is None:
+        return now
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        at = float(value)
+    elif isinstance(value, str):
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        at = moment.timestamp()
+    else:
+        raise ValueError("invalid timestamp")
+    # Client clocks run ahead; never accept pings from the future
+    return min(at, now)
+
+
+def _parse_ping(line: bytes, user_id: int, allow_user_ids: bool, now: float) -> Tuple[int, float, float, float, Any]:
+    try:
+        ping = json.loads(line)
+        latitude = float(ping["latitude"])
+        longitude = float(ping["longitude"])
+        at = _parse_time(ping.get("timestamp"), now)
+        accuracy = ping.get("accuracy")
+        owner = int(ping.get("user_id") or user_id)
+        accuracy = float(accuracy) if accuracy is not None else None
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError("invalid ping")
+    if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+        raise ValueError("coordinates out of range")
+    if owner != user_id and not allow_user_ids:
+        raise ValueError("pings for other users need admin rights")
+    return owner, latitude, longitude, at, accuracy
+
+
+def parse_pings(
+    lines: Sequence[bytes],
+    user_id: int,
+    allow_user_ids: bool,
+    first_line: int = 1,
+    now: Optional[float] = None,
+) -> Pings:
+    """Parse NDJSON location pings.
+
+    Each line is an object with ``latitude``, ``longitude`` and optionally
+    ``timestamp`` (epoch seconds or ISO 8601, default now), ``accuracy``
+    in meters and, for gateways, ``user_id``. Invalid lines are rejected
+    and pings less accurate than ``PRESENCE_MAX_ACCURACY_METERS`` dropped
+    without failing the rest of the stream. Blank lines are skipped.
+
+    Args:
+        lines: NDJSON lines
+        user_id: User the pings belong to unless a line names another
+        allow_user_ids: Whether lines may name another user
+        first_line: Line number of the first line, for error messages
+        now: Current epoch time (default ``time.time()``)
+
+    Returns:
+        Parsed pings
+    """
+    now = now or time.time()
+    max_accuracy = settings.PRESENCE_MAX_ACCURACY_METERS
+    user_ids: List[int] = []
+    latitudes: List[float] = []
+    longitudes: List[float] = []
+    times: List[float] = []
+    inaccurate = 0
+    errors: List[str] = []
+
+    for number, line in enumerate(lines, first_line):
+        if not line.strip():
+            continue
+        try:
+            owner, latitude, longitude, at, accuracy = _parse_ping(line, user_id, allow_user_ids, now)
+        except ValueError as e:
+            errors.append(f"Line {number}: {e}")
+            continue
+        if accuracy is not None and accuracy > max_accuracy:
+            inaccurate += 1
+            continue
+
+        user_ids.append(owner)
+        latitudes.append(latitude)
+        longitudes.append(longitude)
+        times.append(at)
+
+    return Pings(
+        np.asarray(user_ids, dtype=np.int64), np.asarray(latitudes, dtype=np.float64),
+        np.asarray(longitudes, dtype=np.float64), np.asarray(times, dtype=np.float64),
+        inaccurate, errors,
+    )
+
+
+async def ndjson_batches(chunks: AsyncIterator[bytes], size: int) -> AsyncIterator[List[bytes]]:
+    """Split a byte stream into batches of NDJSON lines.
+
+    Args:
+        chunks: Request body chunks
+        size: Lines per batch
+
+    Yields:
+        Lists of at most ``size`` complete lines
+    """
+    pending = b""
+    batch: List[bytes] = []
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        batch.extend(lines)
+        while len(batch) >= size:
+            yield batch[:size]
+            batch = batch[size:]
+    if pending:
+        batch.append(pending)
+    if batch:
+        yield batch
+
+
+def open_attendance_offices(db: Session, user_ids: Sequence[int]) -> Dict[int, Optional[int]]:
+    """Get the office of each user's open attendance record, to seed presence.
+
+    Args:
+        db: Database session
+        user_ids: User IDs
+
+    Returns:
+        Office ID per user ID, None for users who are not checked in
+    """
+    offices: Dict[int, Optional[int]] = dict.fromkeys(user_ids)
+    rows = db.execute(
+        select(AttendanceRecord.user_id, AttendanceRecord.office_id).where(
+            AttendanceRecord.user_id.in_(user_ids), AttendanceRecord.check_out_time.is_(None)
+        )
+    ).all()
+    offices.update(rows)
+    return offices
+
+
+def apply_attendance(db: Session, events: Sequence[PresenceEvent]) -> int:
+    """Check users in and out for presence events.
+
+    An enter opens a record unless the user is already checked in; an exit
+    closes the user's open record at that office. Both keep the daily
+    rollups up to date.
+
+    Args:
+        db: Database session; the caller commits
+        events: Presence events in order
+
+    Returns:
+        Number of attendance records opened or closed
+    """
+    changed = 0
+    for event in events:
+        record = db.execute(
+            select(AttendanceRecord).where(
+                AttendanceRecord.user_id == event.user_id, AttendanceRecord.check_out_time.is_(None)
+            ).limit(1)
+        ).scalars().first()
+
+        if event.kind == ENTER:
+            if record is not None:
+                logger.debug("User %d entered office %d while checked in; no record opened", event.user_id, event.office_id)
+                continue
+            record = AttendanceRecord(
+                user_id=event.user_id,
+                office_id=event.office_id,
+                check_in_time=event.time,
+                check_in_latitude=event.latitude,
+                check_in_longitude=event.longitude,
+            )
+            record_check_in(db, record)
+            db.add(record)
+        else:
+            if record is None or record.office_id != event.office_id:
+                continue
+            record.check_out_time = max(event.time, record.check_in_time)
+            record.check_out_latitude = event.latitude
+            record.check_out_longitude = event.longitude
+            record_check_out(db, record)
+
+        # Later events of the same user must see this record
+        db.flush()
+        changed += 1
+    return changed
+
+
+# Create a default presence tracker instance
+presence_tracker = PresenceTracker()
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache_versions import bump_cache_version, get_cache_version
+from app.models.models import User
+
+USERS_CACHE_NAME = "users"
+
+
+class Principal(NamedTuple):
+    """Authenticated user fields needed for authorization checks."""
+
+    id: int
+    username: str
+    is_active: bool
+    is_admin: bool
+    is_super_admin: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            is_super_admin=bool(user.is_super_admin),
+        )
+
+
+class PrincipalCache:
+    """Bounded TTL/LRU cache of authenticated principals.
+
+    Entries are keyed by (user ID, token) so a cache hit also implies the
+    token was seen before for that user. Admin user updates and deletes
+    evict the user's entries locally and bump the shared ``users`` version
+    stamp, which other workers check at most every
+    ``PRINCIPAL_CACHE_VERSION_CHECK_SECONDS`` before trusting their entries.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[Principal, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int, token: str) -> Optional[Principal]:
+        """Get a cached principal.
+
+        Args:
+            db: Database session, used only for the periodic version check
+            user_id: ID of the user from the token subject
+            token: Raw JWT
+
+        Returns:
+            Principal or None on a miss
+        """
+        if settings.PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+            return None
+
+        self._check_version(db)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get((user_id, token))
+            if entry is None:
+                return None
+
+            principal, expires_at = entry
+            if expires_at <= now:
+                self._remove((user_id, token))
+                return None
+
+            self._entries.move_to_end((user_id, token))
+            return principal
+
+    def put(self, token: str, principal: Principal) -> None:
+        """Cache a principal for a token.
+
+        Args:
+            token: Raw JWT
+            principal: Principal loaded from the database
+        """
+        if settings.PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+            return
+
+        key = (principal.id, token)
+        expires_at = time.monotonic() + settings.PRINCIPAL_CACHE_TTL_SECONDS
+
+        with self._lock:
+            self._entries[key] = (principal, expires_at)
+            self._entries.move_to_end(key)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+
+            while len(self._entries) > settings.PRINCIPAL_CACHE_MAX_ENTRIES:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def evict_user(self, db: Session, user_id: int) -> None:
+        """Evict every cached token of a user and notify other workers.
+
+        Call as part of the transaction that changes or deletes the user.
+
+        Args:
+            db: Database session
+            user_id: ID of the changed user
+        """
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove((user_id, token))
+
+        bump_cache_version(db, USERS_CACHE_NAME)
+
+    def clear(self) -> None:
+        """Drop all cached principals."""
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _check_version(self, db: Session) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < settings.PRINCIPAL_CACHE_VERSION_CHECK_SECONDS:
+            return
+
+        version = get_cache_version(db, USERS_CACHE_NAME)
+        with self._lock:
+            if self._version is not None and version != self._version:
+                self._entries.clear()
+                self._tokens_by_user.clear()
+            self._version = version
+            self._checked_at = now
+
+    def _remove(self, key: Tuple[int, str]) -> None:
+        self._entries.pop(key, None)
+        tokens = self._tokens_by_user.get(key[0])
+        if tokens is not None:
+            tokens.discard(key[1])
+            if not tokens:
+                del self._tokens_by_user[key[0]]
+
+
+# Create a default principal cache instance
+principal_cache = PrincipalCache()
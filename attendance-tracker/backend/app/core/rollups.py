@@ -0,0 +1,227 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+from app.core.timesheet import (
+    RECOMPUTE_CHUNK_DAYS,
+    day_boundaries,
+    local_date,
+    record_worked_time,
+    recompute_worked_time,
+    resolve_timezone,
+    split_worked_time,
+)
+from app.db.counters import increment_counters
+from app.models.models import AttendanceRecord, DailyOfficeAttendance, Office
+
+
+def record_check_in(db: Session, record: AttendanceRecord) -> None:
+    """Add a new check-in to the daily office rollup.
+
+    Call in the check-in transaction. The user counts as a new visitor
+    unless they already checked in at the office earlier that day.
+
+    Args:
+        db: Database session
+        record: New attendance record
+    """
+    tz = resolve_timezone(settings.TIMESHEET_TIMEZONE)
+    work_date = local_date(record.check_in_time, tz)
+
+    earlier = select(AttendanceRecord.id).where(
+        AttendanceRecord.user_id == record.user_id,
+        AttendanceRecord.office_id == record.office_id,
+        AttendanceRecord.check_in_time >= day_boundaries(work_date, work_date, tz)[0].item(),
+        AttendanceRecord.check_in_time <= record.check_in_time,
+    ).limit(1)
+    if record.id is not None:
+        earlier = earlier.where(AttendanceRecord.id != record.id)
+    first_visit = db.execute(earlier).first() is None
+
+    increment_counters(
+        db,
+        DailyOfficeAttendance,
+        {"work_date": work_date, "office_id": record.office_id},
+        check_ins=1,
+        unique_users=int(first_visit),
+    )
+
+
+def record_check_out(db: Session, record: AttendanceRecord) -> None:
+    """Add a just-closed attendance record to the daily rollups.
+
+    Call in the transaction that sets the check-out time.
+
+    Args:
+        db: Database session
+        record: Attendance record with check-in and check-out times
+    """
+    # Split into days once, for both rollups
+    worked = record_worked_time(db, record)
+
+    tz = resolve_timezone(settings.TIMESHEET_TIMEZONE)
+    first_day = local_date(record.check_in_time, tz)
+    last_day = local_date(record.check_out_time, tz)
+
+    amounts: Dict[date, Dict[str, Any]] = defaultdict(dict)
+    for day, seconds in zip(worked.periods.tolist(), worked.seconds.tolist()):
+        amounts[first_day + timedelta(days=day)]["worked_seconds"] = seconds
+    amounts[last_day]["check_outs"] = 1
+
+    for work_date, columns in amounts.items():
+        increment_counters(
+            db, DailyOfficeAttendance, {"work_date": work_date, "office_id": record.office_id}, **columns
+        )
+
+
+def recompute_rollups(db: Union[Session, Connection], first_day: date, last_day: date) -> int:
+    """Rebuild the daily worked-hours and office rollups for a date range.
+
+    Idempotent; used for backfills, after bulk imports and to repair
+    drift. The range is rebuilt ``RECOMPUTE_CHUNK_DAYS`` at a time.
+
+    Args:
+        db: Database session or connection; the caller commits
+        first_day: First day to rebuild
+        last_day: Last day to rebuild
+
+    Returns:
+        Number of rollup rows written
+    """
+    tz = resolve_timezone(settings.TIMESHEET_TIMEZONE)
+    written = recompute_worked_time(db, first_day, last_day)
+
+    chunk_start = first_day
+    while chunk_start <= last_day:
+        chunk_end = min(chunk_start + timedelta(days=RECOMPUTE_CHUNK_DAYS - 1), last_day)
+        written += _recompute_office_days(db, chunk_start, chunk_end, tz)
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def _count_by_day(offices: np.ndarray, days: np.ndarray) -> Iterable[Tuple[int, int, int]]:
+    if not len(days):
+        return []
+    keys, counts = np.unique(np.stack([offices, days]), axis=1, return_counts=True)
+    return zip(keys[0].tolist(), keys[1].tolist(), counts.tolist())
+
+
+def _recompute_office_days(
+    db: Union[Session, Connection], first_day: date, last_day: date, tz: ZoneInfo
+) -> int:
+    boundaries = day_boundaries(first_day, last_day, tz)
+    start, end = boundaries[0].item(), boundaries[-1].item()
+
+    db.execute(delete(DailyOfficeAttendance).where(
+        DailyOfficeAttendance.work_date >= first_day, DailyOfficeAttendance.work_date <= last_day
+    ))
+
+    rows = db.execute(
+        select(
+            AttendanceRecord.user_id, AttendanceRecord.office_id,
+            AttendanceRecord.check_in_time, AttendanceRecord.check_out_time,
+        ).where(
+            AttendanceRecord.check_in_time < end,
+            or_(AttendanceRecord.check_out_time.is_(None), AttendanceRecord.check_out_time > start),
+        )
+    ).all()
+    user_ids, office_ids, check_ins, check_outs = (
+        [list(column) for column in zip(*rows)] if rows else [[], [], [], []]
+    )
+    users = np.asarray(user_ids, dtype=np.int64)
+    offices = np.asarray(office_ids, dtype=np.int64)
+    ins = np.array(check_ins, dtype="datetime64[us]")
+    outs = np.array(check_outs, dtype="datetime64[us]")
+    closed = ~np.isnat(outs)
+
+    totals: Dict[Tuple[int, int], Dict[str, Any]] = defaultdict(
+        lambda: {"check_ins": 0, "check_outs": 0, "unique_users": 0, "worked_seconds": 0.0}
+    )
+
+    checked_in = (ins >= boundaries[0]) & (ins < boundaries[-1])
+    in_days = np.searchsorted(boundaries, ins[checked_in], side="right") - 1
+    for office, day, count in _count_by_day(offices[checked_in], in_days):
+        totals[office, day]["check_ins"] = count
+
+    if len(in_days):
+        visits = np.unique(np.stack([offices[checked_in], in_days, users[checked_in]]), axis=1)
+        for office, day, count in _count_by_day(visits[0], visits[1]):
+            totals[office, day]["unique_users"] = count
+
+    checked_out = closed & (outs >= boundaries[0]) & (outs < boundaries[-1])
+    out_days = np.searchsorted(boundaries, outs[checked_out], side="right") - 1
+    for office, day, count in _count_by_day(offices[checked_out], out_days):
+        totals[office, day]["check_outs"] = count
+
+    # One pseudo-user, so worked time is summed per office and day directly
+    worked = split_worked_time(
+        np.zeros(closed.sum(), dtype=np.int64), offices[closed], ins[closed], outs[closed], boundaries, end
+    )
+    for office, day, seconds in zip(worked.office_ids.tolist(), worked.periods.tolist(), worked.seconds.tolist()):
+        totals[office, day]["worked_seconds"] = seconds
+
+    if totals:
+        db.execute(insert(DailyOfficeAttendance), [
+            {"work_date": first_day + timedelta(days=day), "office_id": office, **columns}
+            for (office, day), columns in totals.items()
+        ])
+    return len(totals)
+
+
+def office_attendance(
+    db: Session,
+    first_day: date,
+    last_day: date,
+    office_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Get daily attendance per office from the rollup.
+
+    Reads only ``daily_office_attendance``, so cost follows days x offices
+    regardless of how many attendance records there are.
+
+    Args:
+        db: Database session
+        first_day: First day, in ``TIMESHEET_TIMEZONE``
+        last_day: Last day, in ``TIMESHEET_TIMEZONE``
+        office_id: Only report this office
+
+    Returns:
+        Rows ordered by day and office; days without check-ins or check-outs are omitted
+    """
+    query = select(
+        DailyOfficeAttendance.work_date,
+        DailyOfficeAttendance.office_id,
+        Office.name,
+        DailyOfficeAttendance.check_ins,
+        DailyOfficeAttendance.check_outs,
+        DailyOfficeAttendance.unique_users,
+        DailyOfficeAttendance.worked_seconds,
+    ).join(
+        Office, Office.id == DailyOfficeAttendance.office_id
+    ).where(
+        DailyOfficeAttendance.work_date >= first_day, DailyOfficeAttendance.work_date <= last_day
+    ).order_by(DailyOfficeAttendance.work_date, DailyOfficeAttendance.office_id)
+
+    if office_id:
+        query = query.where(DailyOfficeAttendance.office_id == office_id)
+
+    return [
+        {
+            "date": work_date.isoformat(),
+            "office_id": office,
+            "office_name": name,
+            "check_ins": check_ins,
+            "check_outs": check_outs,
+            "unique_users": unique_users,
+            "worked_hours": round(worked_seconds / 3600, 2),
+        }
+        for work_date, office, name, check_ins, check_outs, unique_users, worked_seconds
+        in db.execute(query).all()
+    ]
@@ -0,0 +1,88 @@
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import InstrumentedAttribute
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact JSON with orjson, or the standard library without it.
+
+    Datetimes are written in ISO 8601, as Pydantic does.
+
+    Args:
+        content: JSON-compatible data; datetimes and dates are allowed
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with ``dumps``; the default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def schema_columns(schema: Type[BaseModel], model: Any) -> List[InstrumentedAttribute]:
+    """Model columns for the fields of a response schema, for column-tuple queries.
+
+    Selecting only these keeps fields such as ``hashed_password`` out of
+    responses built with ``rows_response``.
+
+    Args:
+        schema: Pydantic response schema
+        model: SQLAlchemy model whose attributes are named like the schema fields
+
+    Returns:
+        Columns in schema field order
+    """
+    return [getattr(model, name) for name in schema.__fields__]
+
+
+def rows_response(
+    rows: Sequence[Row],
+    response: Optional[Response] = None,
+    convert: Optional[Dict[str, Callable[[Any], Any]]] = None,
+) -> FastJSONResponse:
+    """Serialize trusted database rows without building a model per row.
+
+    Use for list endpoints that select ``schema_columns`` of their response
+    schema; values read from the database already match the schema types.
+
+    Args:
+        rows: Rows from a column-tuple query
+        response: Response whose headers (e.g. the next-page cursor) are kept
+        convert: Per-field conversions, e.g. to decode a stored geofence
+
+    Returns:
+        JSON response of one object per row
+    """
+    items = [row._asdict() for row in rows]
+    for name, function in (convert or {}).items():
+        for item in items:
+            if item[name] is not None:
+                item[name] = function(item[name])
+
+    return FastJSONResponse(items, headers=dict(response.headers) if response is not None else None)
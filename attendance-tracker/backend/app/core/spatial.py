@@ -0,0 +1,243 @@
+import math
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from haversine import haversine
+
+if TYPE_CHECKING:
+    from app.core.polygon import PreparedPolygon
+
+# Mean earth radius used by the haversine package, in meters
+EARTH_RADIUS_METERS = 6371008.8
+
+# Size of a grid cell in degrees (~5.5 km of latitude)
+CELL_SIZE_DEGREES = 0.05
+
+# Offices whose geofence would span more cells than this are kept in a
+# separate list that is checked for every point instead of being gridded
+MAX_CELLS_PER_OFFICE = 256
+
+# Angular padding (radians, ~6 mm) so floating point error never drops a
+# candidate that the exact haversine check would accept
+_ANGULAR_PADDING = 1e-9
+
+
+class OfficeGeometry(NamedTuple):
+    """Compact, immutable snapshot of the office fields used for geofencing.
+
+    Offices with a ``polygon`` are inside when within ``radius`` meters of
+    the polygon; the others use the circle around their coordinates.
+    """
+
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+    radius: float
+    polygon: Optional["PreparedPolygon"] = None
+
+
+class _Entry(NamedTuple):
+    office: OfficeGeometry
+    order: int
+    lat_min: float
+    lat_max: float
+    lon_ranges: Tuple[Tuple[float, float], ...]
+
+
+def _cap_bounds(office: OfficeGeometry) -> Tuple[float, float, Tuple[Tuple[float, float], ...]]:
+    """Compute the lat/lon bounding box (in degrees) of an office geofence cap or polygon.
+
+    Args:
+        office: Office geometry
+
+    Returns:
+        Tuple of (lat_min, lat_max, lon_ranges) where lon_ranges is split at
+        the antimeridian when needed
+    """
+    if office.polygon is not None:
+        lat_min, lat_max, lon_min, lon_max = office.polygon.bounds(max(office.radius, 0.0))
+        return lat_min, lat_max, ((lon_min, lon_max),)
+
+    phi = math.radians(office.latitude)
+    delta = max(office.radius, 0.0) / EARTH_RADIUS_METERS + _ANGULAR_PADDING
+
+    lat_min = math.degrees(phi - delta)
+    lat_max = math.degrees(phi + delta)
+
+    if lat_max >= 90.0 or lat_min <= -90.0 or delta >= math.pi / 2:
+        return max(lat_min, -90.0), min(lat_max, 90.0), ((-180.0, 180.0),)
+
+    ratio = math.sin(delta) / math.cos(phi)
+    if ratio >= 1.0:
+        return lat_min, lat_max, ((-180.0, 180.0),)
+
+    d_lon = math.degrees(math.asin(ratio)) + math.degrees(_ANGULAR_PADDING)
+    lon_min = _normalize_longitude(office.longitude - d_lon)
+    lon_max = _normalize_longitude(office.longitude + d_lon)
+
+    if 2 * d_lon >= 360.0:
+        return lat_min, lat_max, ((-180.0, 180.0),)
+    if lon_min <= lon_max:
+        return lat_min, lat_max, ((lon_min, lon_max),)
+    # Wraps around the antimeridian
+    return lat_min, lat_max, ((lon_min, 180.0), (-180.0, lon_max))
+
+
+def _normalize_longitude(longitude: float) -> float:
+    """Wrap a longitude into the [-180, 180) range."""
+    return ((longitude + 180.0) % 360.0) - 180.0
+
+
+def _cell(value: float) -> int:
+    return int(math.floor(value / CELL_SIZE_DEGREES))
+
+
+class OfficeSpatialIndex:
+    """In-memory spatial index over office geofences.
+
+    Offices are bucketed into a fixed lat/lon grid by the bounding box of
+    their geofence, so a containment lookup only touches the offices whose
+    radius could reach the point. A latitude-sorted copy backs an exact
+    k-nearest search that prunes on the latitude lower bound of the
+    great-circle distance; polygon offices are measured to their outline.
+    """
+
+    def __init__(self, offices: Iterable[OfficeGeometry]) -> None:
+        """Build the index.
+
+        Args:
+            offices: Office geometries, in the order results should be reported
+        """
+        self._offices: List[OfficeGeometry] = list(offices)
+        self._grid: Dict[Tuple[int, int], List[_Entry]] = {}
+        self._wide: List[_Entry] = []
+
+        for order, office in enumerate(self._offices):
+            lat_min, lat_max, lon_ranges = _cap_bounds(office)
+            entry = _Entry(office, order, lat_min, lat_max, lon_ranges)
+
+            lat_cells = range(_cell(lat_min), _cell(lat_max) + 1)
+            lon_cells = [
+                c
+                for lon_lo, lon_hi in lon_ranges
+                for c in range(_cell(lon_lo), _cell(lon_hi) + 1)
+            ]
+
+            if len(lat_cells) * len(lon_cells) > MAX_CELLS_PER_OFFICE:
+                self._wide.append(entry)
+                continue
+
+            for lat_cell in lat_cells:
+                for lon_cell in lon_cells:
+                    self._grid.setdefault((lat_cell, lon_cell), []).append(entry)
+
+        # Polygon offices are measured exactly in every nearest search; the
+        # latitude bound of their centre says nothing about their outline
+        self._polygon_orders = [
+            order for order, office in enumerate(self._offices) if office.polygon is not None
+        ]
+        by_latitude = sorted(
+            (order for order, office in enumerate(self._offices) if office.polygon is None),
+            key=lambda i: self._offices[i].latitude,
+        )
+        self._sorted_orders = by_latitude
+        self._sorted_latitudes = [self._offices[i].latitude for i in by_latitude]
+
+    def __len__(self) -> int:
+        return len(self._offices)
+
+    @property
+    def offices(self) -> List[OfficeGeometry]:
+        """All indexed offices, in insertion order."""
+        return self._offices
+
+    def candidates(self, latitude: float, longitude: float) -> List[OfficeGeometry]:
+        """Get the offices whose geofence could contain the given point.
+
+        The result is a superset of the offices that actually contain the
+        point; callers still run the exact distance check.
+
+        Args:
+            latitude: Latitude to check
+            longitude: Longitude to check
+
+        Returns:
+            Candidate offices, in insertion order
+        """
+        longitude = _normalize_longitude(longitude)
+        bucket = self._grid.get((_cell(latitude), _cell(longitude)), [])
+
+        matches = [
+            entry
+            for entry in (*bucket, *self._wide)
+            if entry.lat_min <= latitude <= entry.lat_max
+            and any(lo <= longitude <= hi for lo, hi in entry.lon_ranges)
+        ]
+        matches.sort(key=lambda entry: entry.order)
+        return [entry.office for entry in matches]
+
+    def nearest(
+        self, latitude: float, longitude: float, k: int = 1
+    ) -> List[Tuple[OfficeGeometry, float]]:
+        """Find the k offices closest to the given point.
+
+        Circle offices are measured with the same haversine formula as
+        ``GeofenceService.calculate_distance`` and polygon offices to their
+        polygon (0 inside), as in ``GeofenceService.check_all_geofences``.
+        Ties are broken by insertion order so the result matches a
+        brute-force scan.
+
+        Args:
+            latitude: Latitude to check
+            longitude: Longitude to check
+            k: Number of offices to return
+
+        Returns:
+            List of (office, distance in meters) ordered by distance
+        """
+        if k <= 0 or not self._offices:
+            return []
+
+        best: List[Tuple[float, int]] = []
+        phi = math.radians(latitude)
+
+        def kth_distance() -> float:
+            return best[-1][0] if len(best) >= k else math.inf
+
+        def offer(distance: float, order: int) -> None:
+            if len(best) < k or (distance, order) < best[-1]:
+                best.append((distance, order))
+                best.sort()
+                del best[k:]
+
+        for order in self._polygon_orders:
+            offer(float(self._offices[order].polygon.distances(latitude, longitude)[0]), order)
+
+        def visit(position: int) -> bool:
+            order = self._sorted_orders[position]
+            office = self._offices[order]
+            lower_bound = EARTH_RADIUS_METERS * abs(math.radians(office.latitude) - phi)
+            limit = kth_distance()
+            if lower_bound > limit * (1 + 1e-12) + 1e-6:
+                return False
+
+            distance = haversine(
+                (latitude, longitude), (office.latitude, office.longitude), unit="m"
+            )
+            offer(distance, order)
+            return True
+
+        start = bisect_left(self._sorted_latitudes, latitude)
+        up, down = start, start - 1
+        up_open, down_open = True, True
+
+        while up_open or down_open:
+            if up_open:
+                up_open = up < len(self._sorted_orders) and visit(up)
+                up += 1
+            if down_open:
+                down_open = down >= 0 and visit(down)
+                down -= 1
+
+        return [(self._offices[order], distance) for distance, order in best]
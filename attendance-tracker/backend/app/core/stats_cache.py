@@ -0,0 +1,74 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from app.config import settings
+
+
+class StatsCache:
+    """Short-TTL cache for expensive aggregate results, with stampede protection.
+
+    Only one thread per key recomputes an expired entry. While it does,
+    other callers get the previous value if there is one, or wait for the
+    refresh if there is not, so a burst of dashboard loads costs a single
+    query per TTL window.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Get a cached value, recomputing it when it has expired.
+
+        Args:
+            key: Cache key
+            compute: Function producing a fresh value
+
+        Returns:
+            Cached or freshly computed value
+        """
+        ttl = settings.DASHBOARD_STATS_CACHE_SECONDS
+        if ttl <= 0:
+            return compute()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+
+        lock = self._lock_for(key)
+
+        # Someone else is refreshing; serve the stale value meanwhile
+        if entry is not None and not lock.acquire(blocking=False):
+            return entry[0]
+        if entry is None:
+            lock.acquire()
+
+        try:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+
+            value = compute()
+            self._entries[key] = (value, time.monotonic() + ttl)
+            return value
+        finally:
+            lock.release()
+
+    def invalidate(self) -> None:
+        """Drop all cached values."""
+        with self._guard:
+            self._entries.clear()
+
+    def _lock_for(self, key: Hashable) -> threading.Lock:
+        with self._guard:
+            # Keys include the date, so drop locks and entries of other days
+            if key not in self._locks and len(self._locks) >= 16:
+                self._locks.clear()
+                self._entries = {k: v for k, v in self._entries.items() if k == key}
+            return self._locks.setdefault(key, threading.Lock())
+
+
+# Create a default stats cache instance
+stats_cache = StatsCache()
@@ -0,0 +1,461 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+from sqlalchemy import String, case, delete, func, insert, or_, select, type_coerce
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db.counters import increment_counters
+from app.models.models import AttendanceRecord, DailyUserHours, Office, User
+
+# Timesheet groupings accepted by ``build_timesheet``
+GROUP_BY = ("day", "week", "total")
+
+# Days rebuilt per pass by ``recompute_worked_time``, bounding memory on long backfills
+RECOMPUTE_CHUNK_DAYS = 31
+
+
+class WorkedTime(NamedTuple):
+    """Worked seconds summed per user, office and period, as parallel arrays."""
+
+    user_ids: np.ndarray
+    office_ids: np.ndarray
+    periods: np.ndarray
+    seconds: np.ndarray
+    records: np.ndarray
+    open: np.ndarray
+
+
+def resolve_timezone(name: Optional[str]) -> ZoneInfo:
+    """Look up an IANA time zone, defaulting to ``TIMESHEET_TIMEZONE``.
+
+    Args:
+        name: Time zone name, e.g. "Europe/London"
+
+    Returns:
+        Time zone
+
+    Raises:
+        ValueError: If the name is not a known time zone
+    """
+    try:
+        return ZoneInfo(name or settings.TIMESHEET_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {name}")
+
+
+def day_boundaries(first_day: date, last_day: date, tz: ZoneInfo) -> np.ndarray:
+    """Get the UTC instants of local midnight from ``first_day`` to the day after ``last_day``.
+
+    Boundaries are computed per day, so days around DST changes get their
+    real length.
+
+    Args:
+        first_day: First local day
+        last_day: Last local day
+        tz: Time zone the days are in
+
+    Returns:
+        ``datetime64[us]`` array of naive UTC times, one longer than the number of days
+    """
+    return np.array([
+        datetime.combine(first_day + timedelta(days=i), time.min, tzinfo=tz)
+        .astimezone(timezone.utc).replace(tzinfo=None)
+        for i in range((last_day - first_day).days + 2)
+    ], dtype="datetime64[us]")
+
+
+def _sum_groups(
+    user_ids: np.ndarray,
+    office_ids: np.ndarray,
+    periods: np.ndarray,
+    seconds: np.ndarray,
+    records: np.ndarray,
+    is_open: np.ndarray,
+) -> WorkedTime:
+    if not len(seconds):
+        empty = np.empty(0, dtype=np.int64)
+        return WorkedTime(empty, empty, empty, np.empty(0), empty, np.empty(0, dtype=bool))
+
+    order = np.lexsort((periods, office_ids, user_ids))
+    user_ids, office_ids, periods = user_ids[order], office_ids[order], periods[order]
+
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (
+        (user_ids[1:] != user_ids[:-1])
+        | (office_ids[1:] != office_ids[:-1])
+        | (periods[1:] != periods[:-1])
+    )
+    starts = np.flatnonzero(new_group)
+
+    return WorkedTime(
+        user_ids[starts],
+        office_ids[starts],
+        periods[starts],
+        np.add.reduceat(seconds[order], starts),
+        np.add.reduceat(records[order], starts),
+        np.logical_or.reduceat(is_open[order], starts),
+    )
+
+
+def split_worked_time(
+    user_ids: Sequence[int],
+    office_ids: Sequence[int],
+    check_ins: Sequence[datetime],
+    check_outs: Sequence[Optional[datetime]],
+    boundaries: np.ndarray,
+    now: datetime,
+) -> WorkedTime:
+    """Split attendance records at local midnights and sum them per user, office and day.
+
+    Records are clipped to the boundary range and open records run until
+    ``now``. All records are split in one vectorized pass: each record is
+    repeated once per day it touches and every piece is clipped to its day.
+    A record is counted in ``records`` only on the day of its check-in, so
+    sums over several days count every record once.
+
+    Args:
+        user_ids: User ID per record
+        office_ids: Office ID per record
+        check_ins: Check-in time per record (naive UTC)
+        check_outs: Check-out time per record (naive UTC), None while open
+        boundaries: Day boundaries from ``day_boundaries``
+        now: Current time (naive UTC)
+
+    Returns:
+        Worked time with ``periods`` holding day indexes into the boundaries
+    """
+    users = np.asarray(user_ids, dtype=np.int64)
+    offices = np.asarray(office_ids, dtype=np.int64)
+    starts = np.array(check_ins, dtype="datetime64[us]")
+    ends = np.array(check_outs, dtype="datetime64[us]")
+
+    is_open = np.isnat(ends)
+    ends = np.where(is_open, np.datetime64(now, "us"), ends)
+    # Records checked in before the range have no check-in day in it
+    counted = starts >= boundaries[0]
+    starts = np.maximum(starts, boundaries[0])
+    ends = np.minimum(ends, boundaries[-1])
+
+    keep = ends > starts
+    users, offices, starts, ends = users[keep], offices[keep], starts[keep], ends[keep]
+    is_open, counted = is_open[keep], counted[keep]
+
+    # A record ending exactly at midnight does not touch the next day
+    first = np.searchsorted(boundaries, starts, side="right") - 1
+    last = np.searchsorted(boundaries, ends, side="left") - 1
+    counts = last - first + 1
+
+    record = np.repeat(np.arange(len(starts)), counts)
+    days = first[record] + np.arange(len(record)) - np.repeat(np.cumsum(counts) - counts, counts)
+    seconds = (
+        np.minimum(ends[record], boundaries[days + 1]) - np.maximum(starts[record], boundaries[days])
+    ) / np.timedelta64(1, "s")
+
+    records = ((days == first[record]) & counted[record]).astype(np.int64)
+
+    return _sum_groups(users[record], offices[record], days, seconds, records, is_open[record])
+
+
+def local_date(moment: datetime, tz: Optional[ZoneInfo] = None) -> date:
+    """Get the local day of a naive UTC time.
+
+    Args:
+        moment: Naive UTC time
+        tz: Time zone (default ``TIMESHEET_TIMEZONE``)
+
+    Returns:
+        Calendar day in the time zone
+    """
+    tz = tz or resolve_timezone(settings.TIMESHEET_TIMEZONE)
+    return moment.replace(tzinfo=timezone.utc).astimezone(tz).date()
+
+
+def _record_columns(rows: Sequence[Any]) -> List[Sequence[Any]]:
+    return [list(column) for column in zip(*rows)] if rows else [[], [], [], []]
+
+
+def record_worked_time(db: Session, record: AttendanceRecord) -> WorkedTime:
+    """Add a just-closed attendance record to the daily rollup.
+
+    Call in the transaction that sets the check-out time.
+
+    Args:
+        db: Database session
+        record: Attendance record with check-in and check-out times
+
+    Returns:
+        The record split per day, ``periods`` counting days from its check-in day
+    """
+    tz = resolve_timezone(settings.TIMESHEET_TIMEZONE)
+    first_day = local_date(record.check_in_time, tz)
+    worked = split_worked_time(
+        [record.user_id], [record.office_id], [record.check_in_time], [record.check_out_time],
+        day_boundaries(first_day, local_date(record.check_out_time, tz), tz),
+        record.check_out_time,
+    )
+
+    for day, seconds, records in zip(worked.periods.tolist(), worked.seconds.tolist(), worked.records.tolist()):
+        increment_counters(
+            db,
+            DailyUserHours,
+            {
+                "work_date": first_day + timedelta(days=day),
+                "user_id": record.user_id,
+                "office_id": record.office_id,
+            },
+            worked_seconds=seconds,
+            record_count=records,
+        )
+    return worked
+
+
+def recompute_worked_time(db: Union[Session, Connection], first_day: date, last_day: date) -> int:
+    """Rebuild the daily rollup for a date range from attendance records.
+
+    Idempotent; used for backfills and after bulk imports. The range is
+    rebuilt ``RECOMPUTE_CHUNK_DAYS`` at a time.
+
+    Args:
+        db: Database session or connection; the caller commits
+        first_day: First day to rebuild
+        last_day: Last day to rebuild
+
+    Returns:
+        Number of rollup rows written
+    """
+    tz = resolve_timezone(settings.TIMESHEET_TIMEZONE)
+    written = 0
+
+    chunk_start = first_day
+    while chunk_start <= last_day:
+        chunk_end = min(chunk_start + timedelta(days=RECOMPUTE_CHUNK_DAYS - 1), last_day)
+        written += _recompute_days(db, chunk_start, chunk_end, tz)
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def _recompute_days(db: Union[Session, Connection], first_day: date, last_day: date, tz: ZoneInfo) -> int:
+    boundaries = day_boundaries(first_day, last_day, tz)
+    start, end = boundaries[0].item(), boundaries[-1].item()
+
+    db.execute(delete(DailyUserHours).where(
+        DailyUserHours.work_date >= first_day, DailyUserHours.work_date <= last_day
+    ))
+
+    rows = db.execute(
+        select(
+            AttendanceRecord.user_id, AttendanceRecord.office_id,
+            AttendanceRecord.check_in_time, AttendanceRecord.check_out_time,
+        ).where(
+            AttendanceRecord.check_in_time < end,
+            AttendanceRecord.check_out_time > start,
+        )
+    ).all()
+    worked = split_worked_time(*_record_columns(rows), boundaries, end)
+
+    if len(worked.seconds):
+        db.execute(insert(DailyUserHours), [
+            {
+                "work_date": first_day + timedelta(days=day),
+                "user_id": user_id,
+                "office_id": office_id,
+                "worked_seconds": seconds,
+                "record_count": records,
+            }
+            for user_id, office_id, day, seconds, records in zip(
+                worked.user_ids.tolist(), worked.office_ids.tolist(), worked.periods.tolist(),
+                worked.seconds.tolist(), worked.records.tolist(),
+            )
+        ])
+    return len(worked.seconds)
+
+
+def _to_periods(days: np.ndarray, first_day: date, group_by: str) -> np.ndarray:
+    # Period = day index of the period start, which for weeks may precede first_day
+    if group_by == "week":
+        return days - (first_day.weekday() + days) % 7
+    if group_by == "total":
+        return np.zeros_like(days)
+    return days
+
+
+def _from_rollup(
+    db: Session,
+    first_day: date,
+    last_day: date,
+    group_by: str,
+    user_id: Optional[int],
+    office_id: Optional[int],
+) -> WorkedTime:
+    day_count = (last_day - first_day).days + 1
+    columns = [DailyUserHours.user_id, DailyUserHours.office_id]
+
+    # Weeks are bucketed with a CASE over the week starts, which every
+    # backend supports, so the rollup is summed in SQL for all groupings.
+    # A range within one week is summed like a total (CASE needs a WHEN).
+    week_starts: List[int] = [0]
+    if group_by == "week":
+        week_starts = sorted(set(_to_periods(np.arange(day_count), first_day, "week").tolist()))
+    if group_by == "week" and len(week_starts) > 1:
+        period = case(
+            *[
+                (DailyUserHours.work_date < first_day + timedelta(days=next_start), start)
+                for start, next_start in zip(week_starts, week_starts[1:])
+            ],
+            else_=week_starts[-1],
+        )
+        columns.append(period)
+    elif group_by == "day":
+        # Skip the per-row date parsing SQLite needs; a month for every user
+        # is hundreds of thousands of rows, mapped to day indexes below
+        columns.append(type_coerce(DailyUserHours.work_date, String))
+
+    if group_by == "day":
+        # Rollup rows are already per day
+        query = select(*columns, DailyUserHours.worked_seconds, DailyUserHours.record_count)
+    else:
+        query = select(
+            *columns, func.sum(DailyUserHours.worked_seconds), func.sum(DailyUserHours.record_count)
+        ).group_by(*columns)
+    query = query.where(DailyUserHours.work_date >= first_day, DailyUserHours.work_date <= last_day)
+
+    if user_id:
+        query = query.where(DailyUserHours.user_id == user_id)
+    if office_id:
+        query = query.where(DailyUserHours.office_id == office_id)
+
+    # Core execution; ORM row loading dominates on month-long reports
+    rows = db.connection().execute(query).all()
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in query.selected_columns]
+    if len(columns) == 4:
+        # No period column: totals, or weeks of a range within one week
+        columns.insert(2, [week_starts[0]] * len(rows))
+    elif group_by == "day":
+        # SQLite returns ISO strings, other drivers return dates
+        day_index: Dict[Any, int] = {}
+        for i in range(day_count):
+            day = first_day + timedelta(days=i)
+            day_index[day] = day_index[day.isoformat()] = i
+        columns[2] = [day_index[work_date] for work_date in columns[2]]
+
+    users, offices, periods, seconds, records = columns
+    return WorkedTime(
+        np.asarray(users, dtype=np.int64), np.asarray(offices, dtype=np.int64),
+        np.asarray(periods, dtype=np.int64), np.asarray(seconds, dtype=np.float64),
+        np.asarray(records, dtype=np.int64), np.zeros(len(rows), dtype=bool),
+    )
+
+
+def _from_records(
+    db: Session,
+    boundaries: np.ndarray,
+    now: datetime,
+    user_id: Optional[int],
+    office_id: Optional[int],
+    open_only: bool,
+) -> WorkedTime:
+    start, end = boundaries[0].item(), boundaries[-1].item()
+    query = select(
+        AttendanceRecord.user_id, AttendanceRecord.office_id,
+        AttendanceRecord.check_in_time, AttendanceRecord.check_out_time,
+    ).where(AttendanceRecord.check_in_time < end)
+
+    if open_only:
+        query = query.where(AttendanceRecord.check_out_time.is_(None))
+    else:
+        query = query.where(or_(
+            AttendanceRecord.check_out_time.is_(None), AttendanceRecord.check_out_time > start
+        ))
+    if user_id:
+        query = query.where(AttendanceRecord.user_id == user_id)
+    if office_id:
+        query = query.where(AttendanceRecord.office_id == office_id)
+
+    return split_worked_time(*_record_columns(db.connection().execute(query).all()), boundaries, now)
+
+
+def build_timesheet(
+    db: Session,
+    first_day: date,
+    last_day: date,
+    tz_name: Optional[str] = None,
+    group_by: str = "day",
+    user_id: Optional[int] = None,
+    office_id: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Compute worked time per user, office and day, week or range.
+
+    In ``TIMESHEET_TIMEZONE`` closed records come from the daily rollup and
+    only open records are read from ``attendance_records``, so cost follows
+    users x days rather than record count. Other time zones split the raw
+    records in that zone.
+
+    Args:
+        db: Database session
+        first_day: First local day of the report
+        last_day: Last local day of the report
+        tz_name: Time zone the days are in (default ``TIMESHEET_TIMEZONE``)
+        group_by: "day", "week" (starting Monday) or "total"
+        user_id: Only report this user
+        office_id: Only report this office
+        now: End time for open records (default current UTC time)
+
+    Returns:
+        Rows ordered by user, office and period
+
+    Raises:
+        ValueError: If the time zone or grouping is unknown
+    """
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+
+    tz = resolve_timezone(tz_name)
+    now = now or datetime.utcnow()
+    boundaries = day_boundaries(first_day, last_day, tz)
+
+    worked = _from_records(
+        db, boundaries, now, user_id, office_id, open_only=tz.key == settings.TIMESHEET_TIMEZONE
+    )
+    worked = worked._replace(periods=_to_periods(worked.periods, first_day, group_by))
+
+    if tz.key == settings.TIMESHEET_TIMEZONE:
+        rollup = _from_rollup(db, first_day, last_day, group_by, user_id, office_id)
+        worked = WorkedTime(*(np.concatenate(arrays) for arrays in zip(rollup, worked)))
+
+    worked = _sum_groups(
+        worked.user_ids, worked.office_ids, worked.periods, worked.seconds, worked.records, worked.open
+    )
+
+    users_query = select(User.id, User.username)
+    if user_id:
+        users_query = users_query.where(User.id == user_id)
+    usernames = dict(db.connection().execute(users_query).all())
+    office_names = dict(db.connection().execute(select(Office.id, Office.name)).all())
+
+    period_starts = {
+        period: (first_day + timedelta(days=period)).isoformat()
+        for period in set(worked.periods.tolist())
+    }
+    return [
+        {
+            "user_id": user,
+            "username": usernames.get(user),
+            "office_id": office,
+            "office_name": office_names.get(office),
+            "period_start": period_starts[period],
+            "worked_seconds": seconds,
+            "worked_hours": hours,
+            "records": records,
+            "open": is_open,
+        }
+        for user, office, period, seconds, hours, records, is_open in zip(
+            worked.user_ids.tolist(), worked.office_ids.tolist(), worked.periods.tolist(),
+            np.rint(worked.seconds).astype(np.int64).tolist(), np.round(worked.seconds / 3600, 2).tolist(),
+            worked.records.tolist(), worked.open.tolist(),
+        )
+    ]
@@ -1,14 +1,96 @@
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, declarative_base
+from starlette.concurrency import run_in_threadpool
+
 from app.config import settings
+from app.db.instrumentation import (
+    enable_pre_ping_interval,
+    instrument_engine,
+    instrumented_pool_class,
+    pool_stats,
+)
+from app.db.replica import RoutingSession
 from app.logger import logger
 
+T = TypeVar("T")
+
+# Async DBAPI driver used for each backend when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "mssql": "aioodbc",
+}
+
+
+def _pool_options(url: str, label: str) -> Dict[str, Any]:
+    """Build pool keyword arguments for a database URL from the DB_POOL_* settings.
+
+    Args:
+        url: Database URL
+        label: Engine label for pool metrics ("sync", "async", "read", "async_read")
+
+    Returns:
+        Keyword arguments for create_engine / create_async_engine
+    """
+    options: Dict[str, Any] = {
+        # With an interval, idle connections are pinged by enable_pre_ping_interval instead
+        "pool_pre_ping": settings.DB_POOL_PRE_PING and settings.DB_POOL_PRE_PING_INTERVAL <= 0,
+    }
+
+    pool_class = instrumented_pool_class(url, label)
+    if pool_class is not None:
+        options.update({
+            "poolclass": pool_class,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        })
+    return options
+
+
+def _engine_options(url: str, label: str) -> Dict[str, Any]:
+    """Build create_engine keyword arguments for a database URL."""
+    options = _pool_options(url, label)
+    if make_url(url).get_backend_name() == "mssql":
+        options["connect_args"] = {"fast_executemany": True}
+    return options
+
+
+def _configure_engine(sync_engine: Engine, label: str) -> None:
+    """Attach metrics and the interval pre-ping to an engine."""
+    instrument_engine(sync_engine, label)
+    if settings.DB_POOL_PRE_PING and settings.DB_POOL_PRE_PING_INTERVAL > 0:
+        enable_pre_ping_interval(sync_engine, settings.DB_POOL_PRE_PING_INTERVAL)
+
+
+def _async_url(url: str, override: Optional[str] = None) -> str:
+    """Derive the async driver URL from a sync database URL, unless overridden."""
+    if override:
+        return override
+
+    sync_url = make_url(url)
+    backend = sync_url.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+
+    if driver is None:
+        raise RuntimeError(
+            f"No async driver configured for '{backend}'; set ASYNC_DATABASE_URL"
+        )
+
+    return sync_url.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URI,
-    connect_args={"fast_executemany": True},
-    pool_pre_ping=True,
+    **_engine_options(settings.SQLALCHEMY_DATABASE_URI, "sync"),
 )
 
+_configure_engine(engine, "sync")
+
 SessionLocal = scoped_session(sessionmaker(
     bind=engine,
     autoflush=False,
@@ -16,8 +98,74 @@ SessionLocal = scoped_session(sessionmaker(
     expire_on_commit=False,
 ))
 
+async_engine = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.DB_ASYNC_MODE:
+    async_url = _async_url(settings.SQLALCHEMY_DATABASE_URI, settings.ASYNC_DATABASE_URL)
+    async_engine = create_async_engine(async_url, **_pool_options(async_url, "async"))
+    _configure_engine(async_engine.sync_engine, "async")
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+# Read replica engines; read sessions fall back to the primary when unset
+read_engine = None
+ReadSessionLocal: Optional[sessionmaker] = None
+async_read_engine = None
+AsyncReadSessionLocal: Optional[async_sessionmaker] = None
+
+if settings.READ_REPLICA_URL:
+    read_engine = create_engine(
+        settings.READ_REPLICA_URL,
+        **_engine_options(settings.READ_REPLICA_URL, "read"),
+    )
+    _configure_engine(read_engine, "read")
+    ReadSessionLocal = sessionmaker(
+        class_=RoutingSession,
+        primary=engine,
+        replica=read_engine,
+        autoflush=False,
+        autocommit=False,
+        expire_on_commit=False,
+    )
+
+    if async_engine is not None:
+        async_read_url = _async_url(settings.READ_REPLICA_URL, settings.ASYNC_READ_REPLICA_URL)
+        async_read_engine = create_async_engine(async_read_url, **_pool_options(async_read_url, "async_read"))
+        _configure_engine(async_read_engine.sync_engine, "async_read")
+        AsyncReadSessionLocal = async_sessionmaker(
+            sync_session_class=RoutingSession,
+            primary=async_engine.sync_engine,
+            replica=async_read_engine.sync_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+
+    logger.info("Read replica enabled for read-only endpoints")
+
 Base = declarative_base()
 
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Get connection pool statistics for each engine of this process.
+
+    Returns:
+        Pool statistics keyed by engine label ("sync", "async" in async mode,
+        and "read" / "async_read" with a read replica)
+    """
+    stats = {"sync": pool_stats(engine, "sync")}
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.sync_engine, "async")
+    if read_engine is not None:
+        stats["read"] = pool_stats(read_engine, "read")
+    if async_read_engine is not None:
+        stats["async_read"] = pool_stats(async_read_engine.sync_engine, "async_read")
+    return stats
+
+
 def get_db():
     db = SessionLocal()
     logger.debug("Sync DB session created")
@@ -26,3 +174,104 @@ def get_db():
     finally:
         db.close()
         logger.debug("Sync DB session closed")
+
+
+class ThreadedAsyncSession:
+    """AsyncSession-compatible wrapper that runs a sync Session in the threadpool.
+
+    Used by ``get_async_db`` when ``DB_ASYNC_MODE`` is off, so async route
+    handlers can be written once against the AsyncSession API.
+    """
+
+    def __init__(self, sync_session: Session) -> None:
+        self.sync_session = sync_session
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    async def execute(self, statement: Any, params: Optional[Any] = None) -> Any:
+        return await run_in_threadpool(self.sync_session.execute, statement, params)
+
+    async def scalar(self, statement: Any, params: Optional[Any] = None) -> Any:
+        return await run_in_threadpool(self.sync_session.scalar, statement, params)
+
+    async def delete(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            logger.debug("Async DB session created")
+            yield db
+        logger.debug("Async DB session closed")
+        return
+
+    db = ThreadedAsyncSession(SessionLocal.session_factory())
+    logger.debug("Threaded async DB session created")
+    try:
+        yield db
+    finally:
+        await db.close()
+        logger.debug("Threaded async DB session closed")
+
+
+def get_read_db():
+    """Session for read-only endpoints.
+
+    Queries go to the read replica when one is configured, except for users
+    who wrote within ``READ_REPLICA_STICKY_SECONDS``, whose reads stay on
+    the primary so they see their own changes.
+    """
+    if ReadSessionLocal is None:
+        yield from get_db()
+        return
+
+    db = ReadSessionLocal()
+    logger.debug("Read DB session created")
+    try:
+        yield db
+    finally:
+        db.close()
+        logger.debug("Read DB session closed")
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """Async session for read-only endpoints, routed like ``get_read_db``."""
+    if ReadSessionLocal is None:
+        async for db in get_async_db():
+            yield db
+        return
+
+    if AsyncReadSessionLocal is not None:
+        async with AsyncReadSessionLocal() as db:
+            logger.debug("Async read DB session created")
+            yield db
+        logger.debug("Async read DB session closed")
+        return
+
+    db = ThreadedAsyncSession(ReadSessionLocal())
+    logger.debug("Threaded async read DB session created")
+    try:
+        yield db
+    finally:
+        await db.close()
+        logger.debug("Threaded async read DB session closed")
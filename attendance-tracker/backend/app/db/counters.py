@@ -0,0 +1,34 @@
+from typing import Any, Dict, Type
+
+from sqlalchemy import exc, update
+from sqlalchemy.orm import Session
+
+
+def increment_counters(db: Session, model: Type[Any], key: Dict[str, Any], **amounts: Any) -> None:
+    """Add amounts to counter columns of a rollup row, creating the row if needed.
+
+    The increment is a single UPDATE, so concurrent writers do not lose
+    counts. When two transactions create the same row at once, the losing
+    insert is rolled back to a savepoint and retried as an update.
+
+    Args:
+        db: Database session; the caller commits
+        model: Rollup model
+        key: Primary key column values of the row
+        amounts: Amount to add per counter column
+    """
+    where = [getattr(model, name) == value for name, value in key.items()]
+    increments = update(model).where(*where).values(
+        **{name: getattr(model, name) + amount for name, amount in amounts.items()}
+    )
+
+    if db.execute(increments).rowcount:
+        return
+
+    # Flush pending changes first so a failed insert only undoes this row
+    db.flush()
+    try:
+        with db.begin_nested():
+            db.add(model(**key, **amounts))
+    except exc.IntegrityError:
+        db.execute(increments)
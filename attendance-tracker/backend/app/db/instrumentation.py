@@ -0,0 +1,213 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.metrics import (
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_POOL_CONNECTS,
+    DB_POOL_INVALIDATIONS,
+    DB_POOL_TIMEOUTS,
+    DB_QUERIES,
+    DB_QUERY_SECONDS,
+    current_request_db,
+)
+
+
+class PoolTelemetry:
+    """Running checkout and connection counters for one engine's pool."""
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.connects = 0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+                "wait_seconds_max": self.wait_seconds_max,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+                "connects": self.connects,
+            }
+
+
+# Telemetry per engine label ("sync" / "async" / "read" / "async_read")
+pool_telemetry: Dict[str, PoolTelemetry] = {}
+
+
+def _telemetry(label: str) -> PoolTelemetry:
+    return pool_telemetry.setdefault(label, PoolTelemetry())
+
+
+class _InstrumentedPoolMixin:
+    """Records how long each checkout waits for a connection and counts timeouts."""
+
+    metrics_label = ""
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            _telemetry(self.metrics_label).timeouts += 1
+            DB_POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            _telemetry(self.metrics_label).record_checkout(waited)
+            DB_POOL_CHECKOUT_SECONDS.labels(self.metrics_label).observe(waited)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool with checkout wait telemetry."""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout wait telemetry."""
+
+
+# Pool subclasses per (base class, engine label); the label lives on the
+# class so pools recreated by ``engine.dispose()`` keep it
+_labelled_pool_classes: Dict[Tuple[Type[Pool], str], Type[Pool]] = {}
+
+
+def instrumented_pool_class(url: str, label: str) -> Optional[Type[Pool]]:
+    """Get the instrumented replacement for a URL's default pool class.
+
+    Args:
+        url: Database URL
+        label: Engine label the pool's checkout metrics are recorded under
+
+    Returns:
+        Pool class, or None when the default pool is not a queue pool
+        (e.g. SingletonThreadPool for in-memory SQLite)
+    """
+    parsed = make_url(url)
+    default = parsed.get_dialect().get_pool_class(parsed)
+
+    if issubclass(default, AsyncAdaptedQueuePool):
+        base: Type[Pool] = InstrumentedAsyncAdaptedQueuePool
+    elif issubclass(default, QueuePool):
+        base = InstrumentedQueuePool
+    else:
+        return None
+
+    key = (base, label)
+    if key not in _labelled_pool_classes:
+        _labelled_pool_classes[key] = type(base.__name__, (base,), {"metrics_label": label})
+    return _labelled_pool_classes[key]
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Count and time every statement and pool event on an engine.
+
+    Statement time is also added to the current request's totals when the
+    metrics middleware is active.
+
+    Args:
+        engine: Sync engine (use ``async_engine.sync_engine`` for async engines)
+        label: Engine label used in metrics and pool statistics
+    """
+    telemetry = _telemetry(label)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES.inc()
+        DB_QUERY_SECONDS.observe(elapsed)
+
+        stats = current_request_db.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        telemetry.connects += 1
+        DB_POOL_CONNECTS.labels(label).inc()
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        telemetry.invalidations += 1
+        DB_POOL_INVALIDATIONS.labels(label).inc()
+
+
+def enable_pre_ping_interval(engine: Engine, interval: float) -> None:
+    """Ping pooled connections on checkout only when they sat idle for a while.
+
+    Replaces ``pool_pre_ping``, which costs a round trip on every checkout.
+    A failed ping raises DisconnectionError, so the pool discards the
+    connection and retries with a fresh one.
+
+    Args:
+        engine: Sync engine (use ``async_engine.sync_engine`` for async engines)
+        interval: Idle seconds after which a connection is pinged
+    """
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["returned_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        returned_at = connection_record.info.get("returned_at")
+        if returned_at is None or time.monotonic() - returned_at < interval:
+            return
+
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError(f"Idle connection failed pre-ping: {e}")
+
+
+def pool_stats(engine: Engine, label: str) -> Dict[str, Any]:
+    """Get the current state and running counters of an engine's pool.
+
+    Args:
+        engine: Sync engine (use ``async_engine.sync_engine`` for async engines)
+        label: Engine label passed to ``instrument_engine``
+
+    Returns:
+        Dictionary of pool statistics
+    """
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+
+    stats.update(_telemetry(label).as_dict())
+    return stats
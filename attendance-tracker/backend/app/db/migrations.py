@@ -0,0 +1,38 @@
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.db.base import engine
+from app.logger import logger
+
+ALEMBIC_INI = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "alembic.ini",
+)
+
+# Revision matching the schema that Base.metadata.create_all used to build
+BASELINE_REVISION = "0001"
+
+
+def run_migrations() -> None:
+    """Upgrade the database schema to the latest Alembic revision.
+
+    Databases created before migrations were introduced (tables present but
+    no ``alembic_version``) are stamped at the baseline first, so only the
+    later revisions run against them.
+    """
+    config = Config(ALEMBIC_INI)
+
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+
+        if "users" in tables and "alembic_version" not in tables:
+            logger.info("Stamping existing database at baseline revision %s", BASELINE_REVISION)
+            command.stamp(config, BASELINE_REVISION)
+
+        command.upgrade(config, "head")
+
+    logger.info("Database schema is up to date")
@@ -0,0 +1,91 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+# ID of the authenticated user of the current request, set by get_current_user
+request_user_id: ContextVar[Optional[int]] = ContextVar("request_user_id", default=None)
+
+
+class PrimaryPins:
+    """Users whose reads must go to the primary for a while after they wrote.
+
+    Gives read-your-writes consistency against a lagging replica: after a
+    commit that changed data, the writing user's reads stay on the primary
+    for ``READ_REPLICA_STICKY_SECONDS``. Pins are per worker process.
+    """
+
+    def __init__(self) -> None:
+        self._until: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def pin(self, user_id: int) -> None:
+        """Route a user's reads to the primary for the sticky window.
+
+        Args:
+            user_id: ID of the user who wrote
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Drop expired pins so the map stays as small as the write rate
+            if len(self._until) > 1000:
+                self._until = {k: v for k, v in self._until.items() if v > now}
+            self._until[user_id] = now + settings.READ_REPLICA_STICKY_SECONDS
+
+    def is_pinned(self, user_id: Optional[int]) -> bool:
+        """Check whether a user's reads must go to the primary.
+
+        Args:
+            user_id: ID of the user, or None for unauthenticated requests
+
+        Returns:
+            Whether the user wrote within the sticky window
+        """
+        if user_id is None:
+            return False
+        until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+
+# Create a default primary pins instance
+primary_pins = PrimaryPins()
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica unless the user recently wrote.
+
+    The bind is chosen per statement, so it picks up the request user set by
+    authentication even though the session is created before it. Flushes
+    always go to the primary.
+    """
+
+    def __init__(self, primary: Engine, replica: Engine, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs: Any) -> Engine:
+        if self._flushing or primary_pins.is_pinned(request_user_id.get()):
+            return self.primary
+        return self.replica
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_session_wrote(session: Session, flush_context: Any) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer_to_primary(session: Session) -> None:
+    if not session.info.pop("wrote", False):
+        return
+
+    user_id = request_user_id.get()
+    if user_id is not None:
+        primary_pins.pin(user_id)
@@ -1,27 +1,171 @@
+import atexit
+import json
 import logging
+import queue
 import sys
-from typing import Any, Dict, Optional
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as JSON.
+
+        Args:
+            record: The log record
+
+        Returns:
+            JSON string
+        """
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        return json.dumps(entry, default=str)
+
+
+class CallSiteRateLimitFilter(logging.Filter):
+    """Limit how many records per second each call site may emit.
+
+    Applies to records below WARNING only. Suppressed records are counted
+    and the count is attached as ``suppressed`` to the next record that
+    gets through from the same call site.
+    """
+
+    def __init__(self, per_second: int) -> None:
+        super().__init__()
+        self.per_second = per_second
+        self._windows: Dict[Tuple[str, int], Tuple[int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether a record is emitted.
+
+        Args:
+            record: The log record
+
+        Returns:
+            Whether to emit the record
+        """
+        if self.per_second <= 0 or record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.pathname, record.lineno)
+        second = int(time.monotonic())
+
+        with self._lock:
+            window, count, suppressed = self._windows.get(key, (second, 0, 0))
+            if window != second:
+                window, count = second, 0
+
+            if count >= self.per_second:
+                self._windows[key] = (window, count, suppressed + 1)
+                return False
+
+            self._windows[key] = (window, count + 1, 0)
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full.
+
+    Message formatting is left to the listener thread: only exception
+    tracebacks are rendered here, since they reference live frames.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
 
 class Logger:
-    """Custom logger class for the application."""
+    """Custom logger class for the application.
+    
+    Records are handed to a bounded in-memory queue and written to stdout by
+    a background listener thread, so logging never blocks a request on I/O.
+    Output is JSON lines unless ``LOG_FORMAT`` is ``text``.
+    """
     
-    def __init__(self, name: str, level: int = logging.INFO) -> None:
+    def __init__(self, name: str, level: Optional[int] = None) -> None:
         """Initialize the logger.
         
         Args:
             name: The name of the logger
-            level: The log level
+            level: The log level (defaults to ``LOG_LEVEL``)
         """
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(level)
+        self.logger.setLevel(level if level is not None else settings.LOG_LEVEL.upper())
+        self.logger.propagate = False
+        self.listener: Optional[QueueListener] = None
+        self.queue_handler: Optional[NonBlockingQueueHandler] = None
         
         if not self.logger.handlers:
             handler = logging.StreamHandler(sys.stdout)
-            formatter = logging.Formatter(
-                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-            )
+            if settings.LOG_FORMAT == "text":
+                formatter = logging.Formatter(
+                    "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+                )
+            else:
+                formatter = JsonFormatter()
             handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
+            
+            self.queue_handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+            self.queue_handler.addFilter(CallSiteRateLimitFilter(settings.LOG_RATE_LIMIT_PER_SECOND))
+            self.logger.addHandler(self.queue_handler)
+            
+            self.listener = QueueListener(self.queue_handler.queue, handler)
+            self.listener.start()
+            atexit.register(self.shutdown)
+    
+    def shutdown(self) -> None:
+        """Flush queued records and stop the listener thread."""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+    
+    @property
+    def dropped(self) -> int:
+        """Number of records dropped because the queue was full."""
+        return self.queue_handler.dropped if self.queue_handler else 0
     
     def debug(self, msg: str, *args: Any, **kwargs: Dict[str, Any]) -> None:
         """Log a debug message.
@@ -32,7 +176,7 @@ class Logger:
             kwargs: The keyword arguments to be formatted in the message
         """
         if self.logger.isEnabledFor(logging.DEBUG):
-            self.logger.debug(msg, *args, **kwargs)
+            self.logger.debug(msg, *args, stacklevel=2, **kwargs)
     
     def info(self, msg: str, *args: Any, **kwargs: Dict[str, Any]) -> None:
         """Log an info message.
@@ -43,7 +187,7 @@ class Logger:
             kwargs: The keyword arguments to be formatted in the message
         """
         if self.logger.isEnabledFor(logging.INFO):
-            self.logger.info(msg, *args, **kwargs)
+            self.logger.info(msg, *args, stacklevel=2, **kwargs)
     
     def warning(self, msg: str, *args: Any, **kwargs: Dict[str, Any]) -> None:
         """Log a warning message.
@@ -54,7 +198,7 @@ class Logger:
             kwargs: The keyword arguments to be formatted in the message
         """
         if self.logger.isEnabledFor(logging.WARNING):
-            self.logger.warning(msg, *args, **kwargs)
+            self.logger.warning(msg, *args, stacklevel=2, **kwargs)
     
     def error(self, msg: str, *args: Any, **kwargs: Dict[str, Any]) -> None:
         """Log an error message.
@@ -65,7 +209,7 @@ class Logger:
             kwargs: The keyword arguments to be formatted in the message
         """
         if self.logger.isEnabledFor(logging.ERROR):
-            self.logger.error(msg, *args, **kwargs)
+            self.logger.error(msg, *args, stacklevel=2, **kwargs)
     
     def critical(self, msg: str, *args: Any, **kwargs: Dict[str, Any]) -> None:
         """Log a critical message.
@@ -76,7 +220,7 @@ class Logger:
             kwargs: The keyword arguments to be formatted in the message
         """
         if self.logger.isEnabledFor(logging.CRITICAL):
-            self.logger.critical(msg, *args, **kwargs)
+            self.logger.critical(msg, *args, stacklevel=2, **kwargs)
 
 # Create a default logger instance
 logger = Logger("attendance_tracker")
\ No newline at end of file
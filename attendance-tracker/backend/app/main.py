@@ -1,19 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import attendance, auth, offices
 from app.config import settings
-from app.db.base import Base, engine
+from app.core.compression import CompressionMiddleware
+from app.core.events import event_bus
+from app.core.hashing import password_hasher
+from app.core.login_events import login_events
+from app.core.presence import presence_tracker
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.serialization import FastJSONResponse
+from app.db.base import get_pool_stats
+from app.db.migrations import run_migrations
 from app.logger import logger
 from app.api import admin
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=FastJSONResponse,
 )
 
 app.include_router(
@@ -30,6 +37,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
     )
 else:
     # If no specific origins set, allow all
@@ -39,8 +47,21 @@ else:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
     )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_BYTES,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Record request metrics (added last so it wraps CORS and sees every request)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(offices.router, prefix=f"{settings.API_V1_STR}/offices", tags=["offices"])
@@ -53,6 +74,62 @@ def root():
     return {"message": "Welcome to the Attendance Tracker API"}
 
 
+def _runtime_metrics():
+    """Report password hashing pool, login event queue, presence, event bus, database pool and logging state at scrape time."""
+    hashing = password_hasher.stats()
+    yield ("password_hash_workers", "gauge", "Password hashing worker processes", hashing["workers"])
+    yield ("password_hash_queue_depth", "gauge", "Password hash operations queued or running", hashing["queue_depth"])
+    yield ("password_hash_rejected_total", "counter", "Password hash operations rejected with 503", hashing["rejected"])
+    events = login_events.stats()
+    yield ("login_events_pending", "gauge", "Login and logout events waiting to be written", events["pending"])
+    yield ("login_events_dropped_total", "counter", "Login and logout events dropped without being written", events["dropped"])
+    presence = presence_tracker.stats()
+    yield ("presence_users_tracked", "gauge", "Users with presence state in this worker", presence["users"])
+    yield ("presence_users_present", "gauge", "Users inside an office according to their pings", presence["present"])
+    yield ("presence_pings_total", "counter", "Location pings run through the presence state machine", presence["pings"])
+    yield ("presence_events_total", "counter", "Presence enter and exit events", presence["events"])
+    bus = event_bus.stats()
+    yield ("event_subscriptions", "gauge", "Open event streams in this worker", bus["subscriptions"])
+    yield ("events_published_total", "counter", "Events published by this worker", bus["published"])
+    yield ("events_dropped_total", "counter", "Events dropped for event streams that fell behind", bus["dropped"])
+    yield ("log_records_dropped_total", "counter", "Log records dropped because the log queue was full", logger.dropped)
+
+    pools = get_pool_stats()
+    for key, kind, documentation in (
+        ("size", "gauge", "Configured connection pool size"),
+        ("checked_out", "gauge", "Connections currently checked out"),
+        ("checked_in", "gauge", "Idle connections in the pool"),
+        ("overflow", "gauge", "Connections open beyond the pool size"),
+    ):
+        for label, stats in pools.items():
+            if key in stats:
+                yield (f"db_pool_{key}", kind, documentation, stats[key], {"engine": label})
+
+
+registry.register_collector(_runtime_metrics)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose metrics of this worker process in Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.on_event("startup")
+def migrate_database():
+    """Apply pending database migrations."""
+    if settings.DB_AUTO_MIGRATE:
+        run_migrations()
+
+
+@app.on_event("startup")
+async def start_event_bus():
+    """Start pushing events to event stream clients."""
+    await event_bus.start()
+
+
 @app.on_event("startup")
 async def create_first_superadmin():
     """Create the first super admin if no users exist."""
@@ -99,6 +176,10 @@ async def create_first_superadmin():
 async def shutdown_event():
     """Execute tasks at application shutdown."""
     logger.info("Shutting down Attendance Tracker API")
+    password_hasher.shutdown()
+    await event_bus.stop()
+    # Write login and logout events still queued before the process exits
+    login_events.shutdown()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -22,6 +22,8 @@ class User(Base):
     is_super_admin = Column(Boolean, default=False)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Validates /auth/me ETags together with last_login
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = Column(DateTime, nullable=True)
     
     # Relationships
@@ -47,6 +49,20 @@ class UserLoginHistory(Base):
     
     user = relationship("User", back_populates="login_history")
     
+    __table_args__ = (
+        # Keyset pagination of the login history, newest first
+        Index("ix_user_login_history_login_time", login_time.desc(), id.desc()),
+        Index("ix_user_login_history_user_id_login_time", user_id, login_time.desc(), id.desc()),
+        # Sessions without a logout, counted by the admin dashboard
+        Index(
+            "ix_user_login_history_open",
+            user_id,
+            mssql_where=logout_time.is_(None),
+            postgresql_where=logout_time.is_(None),
+            sqlite_where=logout_time.is_(None),
+        ),
+    )
+    
     def __repr__(self):
         status = "Active" if self.logout_time is None else "Completed"
         return f"<LoginSession {self.id} - User: {self.user_id} - Status: {status}>"
@@ -63,6 +79,8 @@ class Office(Base):
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     radius = Column(Float, nullable=False)
+    # Optional polygon geofence as WKB; when set, ``radius`` is the tolerance around it
+    geofence = Column(LargeBinary, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -90,6 +108,83 @@ class AttendanceRecord(Base):
     user = relationship("User", back_populates="attendance_records")
     office = relationship("Office", back_populates="attendance_records")
     
+    __table_args__ = (
+        # Active record lookup (check-in, check-out, status)
+        Index("ix_attendance_records_user_id_check_out_time", user_id, check_out_time),
+        # Per-user history, newest first
+        Index("ix_attendance_records_user_id_check_in_time", user_id, check_in_time.desc()),
+        # Date range counts for the dashboard
+        Index("ix_attendance_records_check_in_time", check_in_time),
+        # Open records only; covers the whole row on backends with INCLUDE
+        Index(
+            "ix_attendance_records_open",
+            user_id,
+            mssql_where=check_out_time.is_(None),
+            mssql_include=["office_id", "check_in_time", "check_in_latitude", "check_in_longitude"],
+            postgresql_where=check_out_time.is_(None),
+            postgresql_include=["office_id", "check_in_time", "check_in_latitude", "check_in_longitude"],
+            sqlite_where=check_out_time.is_(None),
+        ),
+    )
+    
     def __repr__(self):
         status = "Active" if self.check_out_time is None else "Completed"
         return f"<AttendanceRecord {self.id} - User: {self.user_id} - Status: {status}>"
+
+
+class CacheVersion(Base):
+    """Version stamps used by worker processes to detect stale in-memory caches."""
+    
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<CacheVersion {self.name}={self.version}>"
+
+
+class DailyUserHours(Base):
+    """Worked time per user, office and day, rolled up from closed attendance records.
+    
+    Days are calendar days in ``TIMESHEET_TIMEZONE``; a record spanning
+    midnight contributes to both days.
+    """
+    
+    __tablename__ = "daily_user_hours"
+
+    work_date = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    office_id = Column(Integer, ForeignKey("offices.id"), primary_key=True)
+    worked_seconds = Column(Float, nullable=False, default=0.0)
+    record_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Per-user timesheets
+        Index("ix_daily_user_hours_user_id_work_date", user_id, work_date),
+    )
+    
+    def __repr__(self):
+        return f"<DailyUserHours {self.work_date} - User: {self.user_id} - Office: {self.office_id}>"
+
+
+class DailyOfficeAttendance(Base):
+    """Check-ins, check-outs, distinct visitors and worked time per office and day.
+    
+    Days are calendar days in ``TIMESHEET_TIMEZONE``. Check-ins and
+    visitors count on the check-in day, check-outs on the check-out day,
+    and worked time is split at midnight like ``DailyUserHours``.
+    """
+    
+    __tablename__ = "daily_office_attendance"
+
+    work_date = Column(Date, primary_key=True)
+    office_id = Column(Integer, ForeignKey("offices.id"), primary_key=True)
+    check_ins = Column(Integer, nullable=False, default=0)
+    check_outs = Column(Integer, nullable=False, default=0)
+    unique_users = Column(Integer, nullable=False, default=0)
+    worked_seconds = Column(Float, nullable=False, default=0.0)
+    
+    def __repr__(self):
+        return f"<DailyOfficeAttendance {self.work_date} - Office: {self.office_id}>"
@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, EmailStr, Field, validator
 
+from app.core.polygon import parse_geojson, to_geojson, wkb_to_geojson
+
 
 # User Schemas
 class UserBase(BaseModel):
@@ -80,6 +82,15 @@ class UserExtended(User):
 
 
 # Office Schemas
+def _validate_geofence(cls, value: Any) -> Optional[Dict[str, Any]]:
+    """Normalize a GeoJSON geofence, or decode one loaded from the database."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, memoryview)):
+        return wkb_to_geojson(value)
+    return to_geojson(parse_geojson(value))
+
+
 class OfficeBase(BaseModel):
     """Base schema for Office data."""
     
@@ -87,7 +98,14 @@ class OfficeBase(BaseModel):
     address: str
     latitude: float
     longitude: float
-    radius: float = Field(..., description="Radius of geofence in meters")
+    radius: float = Field(
+        ..., description="Radius of geofence in meters, or tolerance around the polygon geofence"
+    )
+    geofence: Optional[Dict[str, Any]] = Field(
+        None, description="GeoJSON Polygon or MultiPolygon used instead of the radius circle"
+    )
+    
+    _geofence = validator("geofence", pre=True, allow_reuse=True)(_validate_geofence)
 
 
 class OfficeCreate(OfficeBase):
@@ -104,6 +122,9 @@ class OfficeUpdate(BaseModel):
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     radius: Optional[float] = None
+    geofence: Optional[Dict[str, Any]] = None
+    
+    _geofence = validator("geofence", pre=True, allow_reuse=True)(_validate_geofence)
 
 
 class OfficeInDB(OfficeBase):
@@ -209,6 +230,13 @@ class LocationCheck(BaseModel):
     latitude: float
     longitude: float
     office_id: Optional[int] = None  # If not provided, check against all offices
+    within_only: bool = False  # Only return offices whose geofence contains the point
+
+
+class BatchLocationCheck(BaseModel):
+    """Schema for checking many locations in one request."""
+    
+    locations: List[LocationCheck]
 
 
 class GeofenceStatus(BaseModel):
@@ -217,4 +245,4 @@ class GeofenceStatus(BaseModel):
     is_within_geofence: bool
     office_id: Optional[int] = None
     office_name: Optional[str] = None
-    distance: Optional[float] = None  # Distance in meters
\ No newline at end of file
+    distance: Optional[float] = None  # Distance in meters; to the outline for polygon geofences, 0 inside
\ No newline at end of file
@@ -0,0 +1,125 @@
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.attendance_io import (
+    export_formats,
+    export_query,
+    import_attendance_csv,
+    stream_arrow,
+    stream_csv,
+)
+from sqlalchemy import func, select
+
+from app.core.rollups import recompute_rollups
+from app.core.timesheet import RECOMPUTE_CHUNK_DAYS, local_date
+from app.db.base import engine, read_engine
+from app.logger import logger
+from app.models.models import AttendanceRecord
+
+
+def export_attendance(output, file_format, start_date, end_date, office_id):
+    """Write attendance records with user and office names to a file.
+
+    Args:
+        output: Output path
+        file_format: "csv", "parquet" or "arrow"
+        start_date: First check-in date to include
+        end_date: Last check-in date to include
+        office_id: Only export records of this office
+    """
+    query = export_query(start_date, end_date, office_id)
+    source = read_engine or engine
+    chunks = stream_csv(source, query) if file_format == "csv" else stream_arrow(source, query, file_format)
+
+    written = 0
+    with open(output, "wb") as out:
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+
+    logger.info("Exported attendance to %s (%d bytes)", output, written)
+
+
+def import_attendance(path):
+    """Insert attendance records from a CSV file in one transaction.
+
+    Args:
+        path: CSV file, e.g. one written by the export
+    """
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as file, engine.begin() as conn:
+            imported = import_attendance_csv(conn, file)
+    except ValueError as e:
+        sys.exit(f"Import failed, nothing was written: {e}")
+
+    logger.info("Imported %d attendance records from %s", imported, path)
+    print(f"Imported {imported} attendance records")
+
+
+def backfill_rollups(start_date, end_date):
+    """Rebuild the daily rollups, committing one chunk of days at a time.
+
+    Safe to rerun; each day is deleted and recomputed.
+
+    Args:
+        start_date: First day to rebuild (default: day of the first check-in)
+        end_date: Last day to rebuild (default: today)
+    """
+    if start_date is None:
+        with engine.connect() as conn:
+            first_check_in = conn.execute(select(func.min(AttendanceRecord.check_in_time))).scalar()
+        if first_check_in is None:
+            print("No attendance records to roll up")
+            return
+        start_date = local_date(first_check_in)
+    end_date = end_date or local_date(datetime.utcnow())
+
+    rows = 0
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=RECOMPUTE_CHUNK_DAYS - 1), end_date)
+        with engine.begin() as conn:
+            rows += recompute_rollups(conn, chunk_start, chunk_end)
+        print(f"Rolled up {chunk_start} to {chunk_end}")
+        chunk_start = chunk_end + timedelta(days=1)
+
+    logger.info("Backfilled rollups from %s to %s (%d rows)", start_date, end_date, rows)
+    print(f"Wrote {rows} daily rollup rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export, bulk import or roll up attendance records."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Stream attendance records to a file")
+    # Not stdout: the application log is written there
+    export_parser.add_argument("-o", "--output", required=True, help="Output file")
+    export_parser.add_argument("--format", choices=export_formats(), default="csv")
+    export_parser.add_argument("--start-date", type=date.fromisoformat)
+    export_parser.add_argument("--end-date", type=date.fromisoformat)
+    export_parser.add_argument("--office-id", type=int)
+
+    import_parser = commands.add_parser("import", help="Bulk insert attendance records from CSV")
+    import_parser.add_argument("path", help="CSV file with a header row")
+
+    backfill_parser = commands.add_parser(
+        "backfill", help="Rebuild the daily rollups from attendance records"
+    )
+    backfill_parser.add_argument("--start-date", type=date.fromisoformat)
+    backfill_parser.add_argument("--end-date", type=date.fromisoformat)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_attendance(args.output, args.format, args.start_date, args.end_date, args.office_id)
+    elif args.command == "import":
+        import_attendance(args.path)
+    else:
+        backfill_rollups(args.start_date, args.end_date)
@@ -0,0 +1,156 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The benchmark uses its own SQLite file; keep app imports off the real database
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="serialization-bench-"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.core import serialization
+from app.core.compression import _Encoder, brotli
+from app.core.serialization import dumps, schema_columns
+from app.db.base import Base
+from app.models.models import AttendanceRecord, Office, User, UserLoginHistory
+from app.schemas.schemas import AttendanceRecord as AttendanceRecordSchema, LoginHistory, UserExtended
+
+
+def seed(engine, rows):
+    """Create the tables and insert synthetic users, offices and records.
+
+    Args:
+        engine: SQLAlchemy engine of the benchmark database
+        rows: Rows per list table
+    """
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    start = datetime(2026, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(insert(Office), [
+            {"name": "Office", "address": "Address", "latitude": 51.5, "longitude": -0.09, "radius": 100}
+        ])
+        conn.execute(insert(User), [
+            {
+                "email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x" * 60,
+                "full_name": f"User {i}", "is_active": True, "is_admin": False, "is_super_admin": False,
+                "created_at": start, "last_login": start + timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+        conn.execute(insert(AttendanceRecord), [
+            {
+                "user_id": 1, "office_id": 1,
+                "check_in_time": start + timedelta(hours=i),
+                "check_out_time": start + timedelta(hours=i, minutes=rng.randint(30, 600)),
+                "check_in_latitude": 51.5 + rng.random() / 1000, "check_in_longitude": -0.09,
+                "check_out_latitude": 51.5, "check_out_longitude": -0.09 + rng.random() / 1000,
+            }
+            for i in range(rows)
+        ])
+        conn.execute(insert(UserLoginHistory), [
+            {
+                "user_id": 1, "login_time": start + timedelta(minutes=i),
+                "logout_time": start + timedelta(minutes=i + 30),
+                "ip_address": "203.0.113.7", "user_agent": "Mozilla/5.0 (benchmark)",
+            }
+            for i in range(rows)
+        ])
+
+
+def model_path(db, model, schema, limit):
+    """Previous list endpoint path: ORM entities, Pydantic models, stdlib JSON."""
+    entities = db.execute(select(model).limit(limit)).scalars().all()
+    content = jsonable_encoder([schema.from_orm(entity) for entity in entities])
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    db.expunge_all()
+    return body
+
+
+def fast_path(db, model, schema, limit):
+    """Current list endpoint path: column tuples serialized directly."""
+    rows = db.execute(select(*schema_columns(schema, model)).limit(limit)).all()
+    return dumps([row._asdict() for row in rows])
+
+
+def measure(function, samples):
+    """Run a function several times.
+
+    Returns:
+        Tuple of the median time in seconds and the last result
+    """
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2], result
+
+
+def benchmark(rows, limit, samples):
+    """Print rows per second of the old and new list serialization paths.
+
+    Args:
+        rows: Rows seeded per table
+        limit: Page size, as in ``?limit=``
+        samples: Timed runs per measurement (the median is reported)
+    """
+    engine = create_engine(f"sqlite:///{DATABASE_PATH}")
+    seed(engine, rows)
+    print(f"JSON encoder: {'orjson' if serialization.orjson is not None else 'json (orjson not installed)'}")
+    print(f"Page size {limit}, median of {samples} runs\n")
+    print(f"{'endpoint':<22} {'before rows/s':>14} {'after rows/s':>13} {'speedup':>8} "
+          f"{'bytes':>9} {'gzip':>8}" + (f" {'br':>8}" if brotli is not None else ""))
+
+    cases = [
+        ("attendance/history", AttendanceRecord, AttendanceRecordSchema),
+        ("admin/users", User, UserExtended),
+        ("admin/login-history", UserLoginHistory, LoginHistory),
+    ]
+
+    with Session(engine) as db:
+        for name, model, schema in cases:
+            # Warm up statement caches for both paths
+            model_path(db, model, schema, limit)
+            fast_path(db, model, schema, limit)
+
+            before, expected = measure(lambda: model_path(db, model, schema, limit), samples)
+            after, body = measure(lambda: fast_path(db, model, schema, limit), samples)
+            if json.loads(body) != json.loads(expected):
+                raise SystemExit(f"{name}: fast path output differs from the model path")
+
+            page = min(rows, limit)
+            sizes = f" {len(body):>9} {len(gzip.compress(body, 6)):>8}"
+            if brotli is not None:
+                sizes += f" {len(_Encoder('br', 6, 4).finish(body)):>8}"
+            print(f"{name:<22} {page / before:>14,.0f} {page / after:>13,.0f} "
+                  f"{before / after:>7.1f}x" + sizes)
+
+    engine.dispose()
+    shutil.rmtree(os.path.dirname(DATABASE_PATH), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare list endpoint serialization before and after column-tuple rows and fast JSON."
+    )
+    parser.add_argument("--rows", type=int, default=5000, help="Rows seeded per table")
+    parser.add_argument("--limit", type=int, default=1000, help="Page size")
+    parser.add_argument("--samples", type=int, default=9)
+    args = parser.parse_args()
+
+    benchmark(args.rows, args.limit, args.samples)
@@ -0,0 +1,95 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passlib.hash import bcrypt
+
+from app.config import settings
+
+SAMPLE_PASSWORD = "calibration-password"
+
+
+def measure_rounds(rounds, samples):
+    """Measure bcrypt hash time for a cost factor.
+
+    Args:
+        rounds: bcrypt cost factor
+        samples: Number of hashes to time
+
+    Returns:
+        Median hash time in milliseconds
+    """
+    hasher = bcrypt.using(rounds=rounds)
+    timings = []
+
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash(SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(timings)
+
+
+def calibrate(min_rounds, max_rounds, samples, target_ms):
+    """Print hash time per cost factor and recommend BCRYPT_ROUNDS.
+
+    Costs are measured in increasing order and measurement stops once a
+    cost takes more than four times the target, since every further step
+    doubles the time.
+
+    Args:
+        min_rounds: Lowest cost factor to measure
+        max_rounds: Highest cost factor to measure
+        samples: Hashes timed per cost factor
+        target_ms: Maximum acceptable time for a single hash
+    """
+    print(f"Configured BCRYPT_ROUNDS: {settings.BCRYPT_ROUNDS}")
+    print(f"Target: {target_ms:.0f} ms per hash, median of {samples} samples\n")
+    print(f"{'rounds':>6}  {'median ms':>10}")
+
+    # Warm up the bcrypt backend so it is not counted in the first row
+    measure_rounds(min_rounds, 1)
+
+    recommended = None
+    recommended_ms = 0.0
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed = measure_rounds(rounds, samples)
+        marker = ""
+        if elapsed <= target_ms:
+            recommended, recommended_ms = rounds, elapsed
+            marker = "  <= target"
+        print(f"{rounds:>6}  {elapsed:>10.1f}{marker}")
+
+        if elapsed > target_ms * 4:
+            break
+
+    print()
+    if recommended is None:
+        print(f"No cost factor from {min_rounds} meets the target; consider a faster machine "
+              f"or a higher target")
+    else:
+        print(f"Recommended: BCRYPT_ROUNDS={recommended}")
+        print(f"With {settings.PASSWORD_HASH_WORKERS} hashing worker(s), expect at most "
+              f"{max(settings.PASSWORD_HASH_WORKERS, 1) * 1000 / recommended_ms:.0f} "
+              f"logins per second per API process")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure bcrypt hash time per cost factor on this machine."
+    )
+    parser.add_argument("--min-rounds", type=int, default=8)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument(
+        "--target-ms", type=float, default=250.0,
+        help="Maximum acceptable time for a single hash in milliseconds",
+    )
+    args = parser.parse_args()
+
+    calibrate(args.min_rounds, args.max_rounds, args.samples, args.target_ms)
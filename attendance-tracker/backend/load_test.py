@@ -0,0 +1,650 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_DATABASE = os.path.join(tempfile.gettempdir(), "attendance-load-test.db")
+
+# Every seeded user shares this password, hashed once at BCRYPT_ROUNDS
+PASSWORD = "load-test-password"
+
+# Endpoints in the order each virtual user calls them
+ENDPOINTS = ("login", "check-location", "check-in", "check-out", "history")
+
+# Offices are scattered around these centres, as in sample_office_generator.py
+CITIES = [
+    ("Bengaluru", 12.966000031799013, 77.60360204624122),
+    ("London", 51.530625267853445, -0.09350614639267102),
+    ("New York", 40.7128, -74.0060),
+    ("Singapore", 1.2834, 103.8607),
+    ("Sydney", -33.8688, 151.2093),
+]
+
+INSERT_BATCH_SIZE = 5000
+
+METERS_PER_DEGREE = 111320.0
+
+# settings.API_V1_STR; load generator processes do not import the app
+API_PREFIX = "/api/v1"
+
+
+def use_database(path: str, log_level: str = "ERROR") -> Dict[str, str]:
+    """Point app imports in this process at the benchmark database.
+
+    Must be called before anything from ``app`` is imported.
+
+    Args:
+        path: SQLite file
+        log_level: LOG_LEVEL for the app, keeping request logs off the report
+
+    Returns:
+        The environment variables set
+    """
+    variables = {"DATABASE_URL": f"sqlite:///{os.path.abspath(path)}"}
+    os.environ.update(variables)
+    os.environ.setdefault("LOG_LEVEL", log_level)
+    return variables
+
+
+def seed(path: str, users: int, offices: int, days: int, seed_value: int) -> None:
+    """Create a benchmark database of synthetic users, offices and attendance history.
+
+    An existing file at ``path`` is replaced.
+
+    Args:
+        path: SQLite file to create
+        users: Users to create (``loadtest0`` ... ``loadtest{N-1}``)
+        offices: Offices to create
+        days: Days of closed attendance records per user, ending yesterday
+        seed_value: Random seed, so the same arguments give the same data
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    use_database(path)
+
+    from sqlalchemy import insert
+
+    from app.core.auth import get_password_hash
+    from app.core.rollups import recompute_rollups
+    from app.db.base import engine
+    from app.db.migrations import run_migrations
+    from app.models.models import AttendanceRecord, Office, User
+
+    run_migrations()
+    rng = random.Random(seed_value)
+    started = time.perf_counter()
+
+    office_rows = []
+    for i in range(offices):
+        city, latitude, longitude = CITIES[i % len(CITIES)]
+        office_rows.append({
+            "name": f"Load Test Office {i}",
+            "address": f"{i + 1} Benchmark Road, {city}",
+            "latitude": latitude + rng.uniform(-0.2, 0.2),
+            "longitude": longitude + rng.uniform(-0.2, 0.2),
+            "radius": rng.choice([100, 200, 300, 500]),
+        })
+
+    # bcrypt is slow on purpose; one hash serves every user
+    hashed_password = get_password_hash(PASSWORD)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_day = today - timedelta(days=days)
+
+    with engine.begin() as conn:
+        conn.execute(insert(Office), office_rows)
+
+        for start in range(0, users, INSERT_BATCH_SIZE):
+            conn.execute(insert(User), [
+                {
+                    "email": f"loadtest{i}@example.com",
+                    "username": f"loadtest{i}",
+                    "hashed_password": hashed_password,
+                    "full_name": f"Load Test User {i}",
+                    "is_active": True,
+                    "is_admin": False,
+                    "is_super_admin": False,
+                    "created_at": first_day,
+                }
+                for i in range(start, min(start + INSERT_BATCH_SIZE, users))
+            ])
+
+        records = []
+        for day in range(days):
+            day_start = first_day + timedelta(days=day)
+            for i in range(users):
+                office_index = i % offices
+                office = office_rows[office_index]
+                check_in = day_start + timedelta(minutes=rng.randint(7 * 60, 10 * 60))
+                records.append({
+                    "user_id": i + 1,
+                    "office_id": office_index + 1,
+                    "check_in_time": check_in,
+                    "check_out_time": check_in + timedelta(minutes=rng.randint(4 * 60, 10 * 60)),
+                    "check_in_latitude": office["latitude"],
+                    "check_in_longitude": office["longitude"],
+                    "check_out_latitude": office["latitude"],
+                    "check_out_longitude": office["longitude"],
+                })
+                if len(records) == INSERT_BATCH_SIZE:
+                    conn.execute(insert(AttendanceRecord), records)
+                    records = []
+        if records:
+            conn.execute(insert(AttendanceRecord), records)
+
+        if days:
+            recompute_rollups(conn, first_day.date(), (today - timedelta(days=1)).date())
+
+    engine.dispose()
+    print(
+        f"Seeded {path}: {users} users, {offices} offices, {users * days} attendance records "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def load_targets(path: str, concurrency: int) -> List[Dict[str, Any]]:
+    """Pick a user and home office for each virtual user.
+
+    Each virtual user logs in as a different user, so check-ins never
+    collide on one user's open record.
+
+    Args:
+        path: Seeded SQLite file
+        concurrency: Number of virtual users
+
+    Returns:
+        One dict per virtual user with username and office location
+
+    Raises:
+        SystemExit: If the database is missing or has fewer users than virtual users
+    """
+    if not os.path.exists(path):
+        raise SystemExit(f"{path} does not exist; run the seed command first")
+
+    connection = sqlite3.connect(path)
+    try:
+        offices = connection.execute(
+            "SELECT id, latitude, longitude, radius FROM offices ORDER BY id"
+        ).fetchall()
+        users = connection.execute(
+            "SELECT username FROM users WHERE username LIKE 'loadtest%' ORDER BY id LIMIT ?",
+            (concurrency,),
+        ).fetchall()
+    finally:
+        connection.close()
+
+    if len(users) < concurrency:
+        raise SystemExit(f"{path} has {len(users)} load test users; seed at least {concurrency}")
+
+    targets = []
+    for i, (username,) in enumerate(users):
+        office_id, latitude, longitude, radius = offices[i % len(offices)]
+        targets.append({
+            "index": i, "username": username, "office_id": office_id,
+            "latitude": latitude, "longitude": longitude, "radius": radius,
+        })
+    return targets
+
+
+def database_counts(path: str) -> Dict[str, int]:
+    """Count the seeded rows, for the report."""
+    connection = sqlite3.connect(path)
+    try:
+        return {
+            table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("users", "offices", "attendance_records")
+        }
+    finally:
+        connection.close()
+
+
+class Recorder:
+    """Latencies and errors per endpoint, counted once the warm-up is over."""
+
+    def __init__(self, measure_from: float) -> None:
+        self.measure_from = measure_from
+        self.latencies: Dict[str, List[float]] = {name: [] for name in ENDPOINTS}
+        self.errors: Dict[str, int] = {name: 0 for name in ENDPOINTS}
+        self.statuses: Dict[str, Dict[str, int]] = {name: {} for name in ENDPOINTS}
+
+    async def call(self, endpoint: str, request: Any) -> Optional[httpx.Response]:
+        """Await a request and record how long it took.
+
+        Args:
+            endpoint: Name from ``ENDPOINTS``
+            request: Awaitable returning an ``httpx.Response``
+
+        Returns:
+            The response, or None if it failed or was not a 200
+        """
+        started = time.perf_counter()
+        try:
+            response = await request
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        elapsed = time.perf_counter() - started
+
+        ok = response is not None and response.status_code == 200
+        if time.time() >= self.measure_from:
+            if ok:
+                self.latencies[endpoint].append(elapsed)
+            else:
+                self.errors[endpoint] += 1
+                self.statuses[endpoint][status] = self.statuses[endpoint].get(status, 0) + 1
+        return response if ok else None
+
+    def results(self) -> Dict[str, Any]:
+        return {"latencies": self.latencies, "errors": self.errors, "statuses": self.statuses}
+
+
+def _point_near(target: Dict[str, Any], rng: random.Random) -> Dict[str, float]:
+    """Random point within half the geofence radius of an office."""
+    distance = rng.uniform(0, target["radius"] / 2)
+    bearing = rng.uniform(0, 2 * math.pi)
+    latitude = target["latitude"] + distance * math.cos(bearing) / METERS_PER_DEGREE
+    longitude = target["longitude"] + distance * math.sin(bearing) / (
+        METERS_PER_DEGREE * math.cos(math.radians(target["latitude"]))
+    )
+    return {"latitude": latitude, "longitude": longitude}
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    target: Dict[str, Any],
+    recorder: Recorder,
+    deadline: float,
+    options: Dict[str, Any],
+) -> None:
+    """Repeat the check-in flow of one user until the deadline.
+
+    Each iteration checks the location, checks in, checks out and reads
+    the first page of history; the user logs in again every
+    ``login_every`` iterations.
+
+    Args:
+        client: HTTP client for the API
+        target: Virtual user from ``load_targets``
+        recorder: Where timings are recorded
+        deadline: ``time.time()`` at which to stop
+        options: ``login_every`` and ``history_limit``
+    """
+    rng = random.Random(target["index"])
+    credentials = {"username": target["username"], "password": PASSWORD}
+    headers: Optional[Dict[str, str]] = None
+    iteration = 0
+
+    while time.time() < deadline:
+        if headers is None or (options["login_every"] and iteration % options["login_every"] == 0):
+            response = await recorder.call("login", client.post("/auth/login", data=credentials))
+            if response is None:
+                headers = None
+                await asyncio.sleep(0.1)
+                continue
+            first_login = headers is None and iteration == 0
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            if first_login:
+                # Close a record left open by an interrupted run; not timed
+                await client.post("/attendance/check-out", json=_point_near(target, rng), headers=headers)
+
+        point = _point_near(target, rng)
+        await recorder.call(
+            "check-location",
+            client.post("/attendance/check-location", json={**point, "within_only": True}, headers=headers),
+        )
+        await recorder.call(
+            "check-in",
+            client.post("/attendance/check-in", json={**point, "office_id": target["office_id"]}, headers=headers),
+        )
+        await recorder.call(
+            "check-out",
+            client.post("/attendance/check-out", json=_point_near(target, rng), headers=headers),
+        )
+        await recorder.call(
+            "history",
+            client.get("/attendance/history", params={"limit": options["history_limit"]}, headers=headers),
+        )
+        iteration += 1
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    targets: List[Dict[str, Any]],
+    start_at: float,
+    options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Run virtual users on one client from ``start_at`` for the configured duration."""
+    recorder = Recorder(start_at + options["warmup"])
+    deadline = start_at + options["warmup"] + options["duration"]
+    await asyncio.sleep(max(0.0, start_at - time.time()))
+    await asyncio.gather(*(virtual_user(client, target, recorder, deadline, options) for target in targets))
+    return recorder.results()
+
+
+async def _run_in_process(targets: List[Dict[str, Any]], options: Dict[str, Any]) -> Dict[str, Any]:
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url=f"http://load-test{API_PREFIX}") as client:
+            return await _drive(client, targets, time.time(), options)
+    finally:
+        await app.router.shutdown()
+
+
+def run_in_process(path: str, targets: List[Dict[str, Any]], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Drive the app through an in-process ASGI client; no sockets or HTTP parsing.
+
+    Returns:
+        Results of the single load generator
+    """
+    use_database(path)
+    return [asyncio.run(_run_in_process(targets, options))]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_server(base_url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    with httpx.Client(base_url=base_url, trust_env=False) as client:
+        while time.time() < deadline:
+            if server.poll() is not None:
+                raise SystemExit(f"API server exited with code {server.returncode}")
+            try:
+                client.get("/")
+                return
+            except httpx.TransportError:
+                time.sleep(0.2)
+    server.terminate()
+    raise SystemExit(f"API server did not start within {timeout:.0f}s")
+
+
+def _client_process(base_url: str, targets: List[Dict[str, Any]], start_at: float, options: Dict[str, Any]):
+    async def main() -> Dict[str, Any]:
+        limits = httpx.Limits(max_connections=len(targets), max_keepalive_connections=len(targets))
+        async with httpx.AsyncClient(
+            base_url=base_url, trust_env=False, limits=limits, timeout=options["timeout"]
+        ) as client:
+            return await _drive(client, targets, start_at, options)
+
+    return asyncio.run(main())
+
+
+def run_processes(
+    path: str,
+    targets: List[Dict[str, Any]],
+    options: Dict[str, Any],
+    processes: int,
+    server_workers: int,
+) -> List[Dict[str, Any]]:
+    """Drive a uvicorn server over HTTP from several load generator processes.
+
+    Args:
+        path: Seeded SQLite file
+        targets: Virtual users, split evenly between the processes
+        options: Run options
+        processes: Load generator processes
+        server_workers: uvicorn worker processes
+
+    Returns:
+        Results of each load generator
+    """
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, **use_database(path)}
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(server_workers), "--log-level", "warning", "--no-access-log",
+        ],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for_server(base_url, server)
+        processes = max(1, min(processes, len(targets)))
+        # Give every process time to start before the clock begins
+        start_at = time.time() + 2.0
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            return pool.starmap(
+                _client_process,
+                [(base_url + API_PREFIX, targets[i::processes], start_at, options) for i in range(processes)],
+            )
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def summarize(results: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    """Merge load generator results into throughput and latency percentiles.
+
+    Args:
+        results: ``Recorder.results()`` of each load generator
+        duration: Measured seconds, excluding the warm-up
+
+    Returns:
+        Per-endpoint and total statistics; latencies in milliseconds
+    """
+    def stats(latencies: List[float], errors: int, statuses: Dict[str, int]) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": round(len(latencies) / duration, 2),
+        }
+        if errors:
+            entry["error_statuses"] = statuses
+        if latencies:
+            values = np.array(latencies) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            entry["latency_ms"] = {
+                "mean": round(float(values.mean()), 3),
+                "p50": round(float(p50), 3),
+                "p95": round(float(p95), 3),
+                "p99": round(float(p99), 3),
+                "max": round(float(values.max()), 3),
+            }
+        return entry
+
+    endpoints = {}
+    all_latencies: List[float] = []
+    all_statuses: Dict[str, int] = {}
+    total_errors = 0
+    for name in ENDPOINTS:
+        latencies = [value for result in results for value in result["latencies"][name]]
+        errors = sum(result["errors"][name] for result in results)
+        statuses: Dict[str, int] = {}
+        for result in results:
+            for status, count in result["statuses"][name].items():
+                statuses[status] = statuses.get(status, 0) + count
+                all_statuses[f"{name} {status}"] = all_statuses.get(f"{name} {status}", 0) + count
+        endpoints[name] = stats(latencies, errors, statuses)
+        all_latencies.extend(latencies)
+        total_errors += errors
+
+    return {"endpoints": endpoints, "total": stats(all_latencies, total_errors, all_statuses)}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the load test described by the command line arguments.
+
+    Returns:
+        JSON-serializable report
+    """
+    targets = load_targets(args.database, args.concurrency)
+    options = {
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "login_every": args.login_every,
+        "history_limit": args.history_limit,
+        "timeout": args.timeout,
+    }
+
+    if args.mode == "asgi":
+        results = run_in_process(args.database, targets, options)
+    else:
+        results = run_processes(args.database, targets, options, args.processes, args.server_workers)
+
+    config = {
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "warmup_seconds": args.warmup,
+        "login_every": args.login_every,
+        "history_limit": args.history_limit,
+        "database": database_counts(args.database),
+        "env": {
+            name: os.environ[name]
+            for name in ("DB_ASYNC_MODE", "BCRYPT_ROUNDS", "PASSWORD_HASH_WORKERS", "COMPRESSION_ENABLED")
+            if name in os.environ
+        },
+    }
+    if args.mode == "processes":
+        config.update({"processes": args.processes, "server_workers": args.server_workers})
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        **summarize(results, args.duration),
+    }
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> int:
+    """Print throughput and p95 changes between two reports.
+
+    Args:
+        baseline_path: Report of the reference commit
+        current_path: Report to check
+        threshold: Percentage of p95 growth or throughput loss counted as a regression
+
+    Returns:
+        Exit status: 1 if any endpoint regressed, else 0
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+
+    # Row counts grow with every run; only the run settings must match
+    settings_before = {key: value for key, value in baseline["config"].items() if key != "database"}
+    settings_after = {key: value for key, value in current["config"].items() if key != "database"}
+    if settings_before != settings_after:
+        print("Warning: the reports were run with different settings\n")
+
+    print(f"{'endpoint':<16} {'rps before':>11} {'rps after':>10} {'change':>8} "
+          f"{'p95 before':>11} {'p95 after':>10} {'change':>8}")
+    regressed = False
+    for name in (*ENDPOINTS, "total"):
+        before = baseline["endpoints"].get(name) if name != "total" else baseline["total"]
+        after = current["endpoints"].get(name) if name != "total" else current["total"]
+        if not before or not after or "latency_ms" not in before or "latency_ms" not in after:
+            continue
+
+        rps_change = (after["throughput_rps"] / before["throughput_rps"] - 1) * 100
+        p95_change = (after["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1) * 100
+        flag = ""
+        if rps_change < -threshold or p95_change > threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(
+            f"{name:<16} {before['throughput_rps']:>11,.1f} {after['throughput_rps']:>10,.1f} "
+            f"{rps_change:>+7.1f}% {before['latency_ms']['p95']:>11.2f} "
+            f"{after['latency_ms']['p95']:>10.2f} {p95_change:>+7.1f}%{flag}"
+        )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Seed a SQLite database and load-test the check-in flow: login, "
+                    "check-location, check-in, check-out and history."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Create a database of synthetic data")
+    seed_parser.add_argument("--database", default=DEFAULT_DATABASE, help="SQLite file (replaced)")
+    seed_parser.add_argument("--users", type=int, default=200)
+    seed_parser.add_argument("--offices", type=int, default=50)
+    seed_parser.add_argument("--days", type=int, default=30, help="Days of attendance history per user")
+    seed_parser.add_argument("--seed", type=int, default=42, help="Random seed")
+
+    run_parser = commands.add_parser("run", help="Load-test a seeded database and print a JSON report")
+    run_parser.add_argument("--database", default=DEFAULT_DATABASE, help="SQLite file from the seed command")
+    run_parser.add_argument(
+        "--mode", choices=["asgi", "processes"], default="asgi",
+        help="asgi: in-process client; processes: uvicorn server and load generator processes",
+    )
+    run_parser.add_argument("--concurrency", type=int, default=20, help="Virtual users")
+    run_parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=5.0, help="Seconds run before measuring")
+    run_parser.add_argument(
+        "--login-every", type=int, default=10,
+        help="Log in again every N iterations (0: only once per virtual user)",
+    )
+    run_parser.add_argument("--history-limit", type=int, default=100, help="Page size of /history")
+    run_parser.add_argument("--processes", type=int, default=4, help="Load generator processes")
+    run_parser.add_argument("--server-workers", type=int, default=1, help="uvicorn workers")
+    run_parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds")
+    run_parser.add_argument("--output", help="Write the report to this file instead of stdout")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline", help="Report of the reference commit")
+    compare_parser.add_argument("current", help="Report to check")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=10.0,
+        help="Percent p95 growth or throughput loss reported as a regression",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        seed(args.database, args.users, args.offices, args.days, args.seed)
+    elif args.command == "run":
+        report = json.dumps(run(args), indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(report + "\n")
+        else:
+            print(report)
+    else:
+        sys.exit(compare(args.baseline, args.current, args.threshold))
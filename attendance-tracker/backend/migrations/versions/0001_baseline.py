@@ -0,0 +1,94 @@
+"""Baseline schema as previously created by Base.metadata.create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("username", sa.String(length=150), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("full_name", sa.String(length=255), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("is_super_admin", sa.Boolean(), nullable=True),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "offices",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("address", sa.String(length=500), nullable=False),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("radius", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_offices_id", "offices", ["id"])
+
+    op.create_table(
+        "user_login_history",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("login_time", sa.DateTime(), nullable=False),
+        sa.Column("logout_time", sa.DateTime(), nullable=True),
+        sa.Column("ip_address", sa.String(length=50), nullable=True),
+        sa.Column("user_agent", sa.String(length=512), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_login_history_id", "user_login_history", ["id"])
+
+    op.create_table(
+        "attendance_records",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("office_id", sa.Integer(), nullable=False),
+        sa.Column("check_in_time", sa.DateTime(), nullable=False),
+        sa.Column("check_out_time", sa.DateTime(), nullable=True),
+        sa.Column("check_in_latitude", sa.Float(), nullable=False),
+        sa.Column("check_in_longitude", sa.Float(), nullable=False),
+        sa.Column("check_out_latitude", sa.Float(), nullable=True),
+        sa.Column("check_out_longitude", sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(["office_id"], ["offices.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_attendance_records_id", "attendance_records", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attendance_records_id", table_name="attendance_records")
+    op.drop_table("attendance_records")
+    op.drop_index("ix_user_login_history_id", table_name="user_login_history")
+    op.drop_table("user_login_history")
+    op.drop_index("ix_offices_id", table_name="offices")
+    op.drop_table("offices")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
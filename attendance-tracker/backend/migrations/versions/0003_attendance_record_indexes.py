@@ -0,0 +1,53 @@
+"""Index attendance_records for active-record, history and date range queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+OPEN_RECORD_COLUMNS = ["office_id", "check_in_time", "check_in_latitude", "check_in_longitude"]
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_attendance_records_user_id_check_out_time",
+        "attendance_records",
+        ["user_id", "check_out_time"],
+    )
+    op.create_index(
+        "ix_attendance_records_user_id_check_in_time",
+        "attendance_records",
+        ["user_id", sa.text("check_in_time DESC")],
+    )
+    op.create_index(
+        "ix_attendance_records_check_in_time",
+        "attendance_records",
+        ["check_in_time"],
+    )
+    # Filtered/partial index on open records; other backends get a plain index
+    op.create_index(
+        "ix_attendance_records_open",
+        "attendance_records",
+        ["user_id"],
+        mssql_where=sa.text("check_out_time IS NULL"),
+        mssql_include=OPEN_RECORD_COLUMNS,
+        postgresql_where=sa.text("check_out_time IS NULL"),
+        postgresql_include=OPEN_RECORD_COLUMNS,
+        sqlite_where=sa.text("check_out_time IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_attendance_records_open", table_name="attendance_records")
+    op.drop_index("ix_attendance_records_check_in_time", table_name="attendance_records")
+    op.drop_index("ix_attendance_records_user_id_check_in_time", table_name="attendance_records")
+    op.drop_index("ix_attendance_records_user_id_check_out_time", table_name="attendance_records")
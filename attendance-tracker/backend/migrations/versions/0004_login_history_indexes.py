@@ -0,0 +1,33 @@
+"""Index user_login_history for keyset pagination and session lookups
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_user_login_history_login_time",
+        "user_login_history",
+        [sa.text("login_time DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_user_login_history_user_id_login_time",
+        "user_login_history",
+        ["user_id", sa.text("login_time DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_login_history_user_id_login_time", table_name="user_login_history")
+    op.drop_index("ix_user_login_history_login_time", table_name="user_login_history")
@@ -0,0 +1,30 @@
+"""Filtered index on login sessions without a logout
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_user_login_history_open",
+        "user_login_history",
+        ["user_id"],
+        mssql_where=sa.text("logout_time IS NULL"),
+        postgresql_where=sa.text("logout_time IS NULL"),
+        sqlite_where=sa.text("logout_time IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_login_history_open", table_name="user_login_history")
@@ -0,0 +1,40 @@
+"""Add daily_user_hours rollup table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fill it for existing records with `python attendance_data.py backfill`
+    op.create_table(
+        "daily_user_hours",
+        sa.Column("work_date", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("office_id", sa.Integer(), nullable=False),
+        sa.Column("worked_seconds", sa.Float(), nullable=False),
+        sa.Column("record_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["office_id"], ["offices.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("work_date", "user_id", "office_id"),
+    )
+    op.create_index(
+        "ix_daily_user_hours_user_id_work_date",
+        "daily_user_hours",
+        ["user_id", "work_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_user_hours_user_id_work_date", table_name="daily_user_hours")
+    op.drop_table("daily_user_hours")
@@ -0,0 +1,34 @@
+"""Add daily_office_attendance rollup table
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fill it for existing records with `python attendance_data.py backfill`
+    op.create_table(
+        "daily_office_attendance",
+        sa.Column("work_date", sa.Date(), nullable=False),
+        sa.Column("office_id", sa.Integer(), nullable=False),
+        sa.Column("check_ins", sa.Integer(), nullable=False),
+        sa.Column("check_outs", sa.Integer(), nullable=False),
+        sa.Column("unique_users", sa.Integer(), nullable=False),
+        sa.Column("worked_seconds", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["office_id"], ["offices.id"]),
+        sa.PrimaryKeyConstraint("work_date", "office_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_office_attendance")
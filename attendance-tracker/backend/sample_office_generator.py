@@ -4,6 +4,7 @@ import os
 # Add the parent directory to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from app.core.office_cache import office_cache
 from app.db.base import SessionLocal
 from app.models.models import Office
 from app.logger import logger
@@ -34,6 +35,8 @@ def create_sample_offices():
             office = Office(**office_data)
             db.add(office)
         
+        # Let running API workers know the office list changed
+        office_cache.record_change(db)
         db.commit()
         logger.info("Sample offices created")
     finally:
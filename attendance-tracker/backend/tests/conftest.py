@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when app modules are imported; use a throwaway database
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='attendance-tests-'), 'test.db')}"
+)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+@pytest.fixture
+def db():
+    """Session on freshly created tables, dropped again after the test."""
+    from app.db.base import Base, SessionLocal, engine
+    from app.models import models  # noqa: F401  (registers the tables)
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        SessionLocal.remove()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,46 @@
+import io
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.core.attendance_io import import_attendance_csv
+from app.db.base import engine
+from app.models.models import AttendanceRecord, Office, User
+
+HEADER = "user_id,office_id,check_in_time,check_out_time,check_in_latitude,check_in_longitude\n"
+
+
+@pytest.fixture
+def conn(db):
+    db.add(User(id=1, email="a@example.com", username="a", hashed_password="x"))
+    db.add(Office(id=1, name="HQ", address="1 Street", latitude=51.5, longitude=-0.1, radius=100))
+    db.commit()
+    with engine.begin() as connection:
+        yield connection
+
+
+def _import(conn, *rows):
+    return import_attendance_csv(conn, io.StringIO(HEADER + "".join(row + "\n" for row in rows)))
+
+
+def test_offset_timestamps_stored_as_utc(conn):
+    assert _import(conn, "1,1,2026-03-02T09:00:00+02:00,2026-03-02T17:00:00+02:00,51.5,-0.1") == 1
+    record = conn.execute(select(AttendanceRecord.check_in_time, AttendanceRecord.check_out_time)).one()
+    assert tuple(record) == (datetime(2026, 3, 2, 7), datetime(2026, 3, 2, 15))
+
+
+def test_rejects_check_out_before_check_in(conn):
+    with pytest.raises(ValueError, match="^Line 2: check_out_time must be after check_in_time"):
+        _import(conn, "1,1,2026-03-02T17:00:00,2026-03-02T09:00:00,51.5,-0.1")
+
+
+def test_rejects_second_open_row_in_file(conn):
+    with pytest.raises(ValueError, match="^Line 3: user 1 already has an active record"):
+        _import(conn, "1,1,2026-03-02T09:00:00,,51.5,-0.1", "1,1,2026-03-03T09:00:00,,51.5,-0.1")
+
+
+def test_rejects_open_row_for_active_user(conn):
+    _import(conn, "1,1,2026-03-02T09:00:00,,51.5,-0.1")
+    with pytest.raises(ValueError, match="^Line 2: user 1 already has an active record"):
+        _import(conn, "1,1,2026-03-03T09:00:00,,51.5,-0.1")
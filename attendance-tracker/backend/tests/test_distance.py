@@ -0,0 +1,103 @@
+import random
+
+import numpy as np
+import pytest
+from haversine import Unit, haversine
+
+from app.core import distance
+from app.core.distance import DistanceEngine, haversine_distances
+from app.core.spatial import OfficeGeometry
+
+# Vectorized results must match the scalar haversine package to 1 mm
+TOLERANCE_METERS = 1e-3
+
+
+def _points(count, seed):
+    rng = random.Random(seed)
+    points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(count)]
+    # Poles, antimeridian, antipodes and coincident points
+    points += [(90.0, 0.0), (-90.0, 45.0), (0.0, 180.0), (0.0, -180.0), (0.0, 179.9999), (12.5, 77.6)]
+    return points
+
+
+def _offices(count, seed):
+    rng = random.Random(seed)
+    offices = [
+        OfficeGeometry(i + 1, f"Office {i}", rng.uniform(-90, 90), rng.uniform(-180, 180), rng.uniform(50, 5000))
+        for i in range(count)
+    ]
+    offices += [
+        OfficeGeometry(count + 1, "Antipode", 0.0, 0.0, 100.0),
+        OfficeGeometry(count + 2, "Same", 12.5, 77.6, 100.0),
+    ]
+    return offices
+
+
+def _expected(points, offices):
+    return np.array([
+        [haversine(point, (office.latitude, office.longitude), unit=Unit.METERS) for office in offices]
+        for point in points
+    ])
+
+
+def test_haversine_distances_matches_haversine():
+    points = _points(500, seed=1)
+    others = _points(500, seed=2)
+    lat1, lon1 = np.array(points).T
+    lat2, lon2 = np.array(others).T
+
+    result = haversine_distances(lat1, lon1, lat2, lon2)
+    expected = [haversine(a, b, unit=Unit.METERS) for a, b in zip(points, others)]
+
+    assert np.abs(result - expected).max() <= TOLERANCE_METERS
+
+
+def test_haversine_distances_scalar():
+    result = haversine_distances(51.5306, -0.0935, 12.966, 77.6036)
+
+    assert abs(float(result) - haversine((51.5306, -0.0935), (12.966, 77.6036), unit=Unit.METERS)) <= TOLERANCE_METERS
+
+
+def test_engine_distances_match_haversine():
+    points = _points(200, seed=3)
+    offices = _offices(50, seed=4)
+    engine = DistanceEngine(offices)
+
+    latitudes, longitudes = np.array(points).T
+    result = engine.distances(latitudes, longitudes)
+
+    assert result.shape == (len(points), len(offices))
+    assert np.abs(result - _expected(points, offices)).max() <= TOLERANCE_METERS
+
+
+def test_engine_iter_blocks_match_haversine(monkeypatch):
+    # Force several blocks, including a short last one
+    monkeypatch.setattr(distance, "MAX_PAIRS_PER_BLOCK", 7 * 52)
+    points = _points(100, seed=5)
+    offices = _offices(50, seed=6)
+    engine = DistanceEngine(offices)
+    expected = _expected(points, offices)
+
+    latitudes, longitudes = np.array(points).T
+    blocks = list(engine.iter_blocks(latitudes, longitudes))
+
+    assert len(blocks) == -(-len(points) // 7)
+    covered = 0
+    for block, distances, within in blocks:
+        assert block.start == covered
+        covered += len(distances)
+        assert np.abs(distances - expected[block]).max() <= TOLERANCE_METERS
+        assert (within == (distances <= engine.radii)).all()
+    assert covered == len(points)
+
+
+@pytest.mark.parametrize("count", [0, 1])
+def test_engine_small_office_sets(count):
+    offices = _offices(0, seed=7)[:count]
+    engine = DistanceEngine(offices)
+
+    result = engine.distances([1.0, 2.0], [3.0, 4.0])
+
+    assert result.shape == (2, count)
+    if count:
+        assert np.abs(result - _expected([(1.0, 3.0), (2.0, 4.0)], offices)).max() <= TOLERANCE_METERS
@@ -0,0 +1,48 @@
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.core.rollups import record_check_in, record_check_out, recompute_rollups
+from app.models.models import AttendanceRecord, DailyOfficeAttendance, DailyUserHours
+
+
+def _rollups(db):
+    offices = db.execute(select(
+        DailyOfficeAttendance.work_date, DailyOfficeAttendance.office_id, DailyOfficeAttendance.check_ins,
+        DailyOfficeAttendance.check_outs, DailyOfficeAttendance.unique_users, DailyOfficeAttendance.worked_seconds,
+    ).order_by(DailyOfficeAttendance.work_date)).all()
+    users = db.execute(select(
+        DailyUserHours.work_date, DailyUserHours.user_id, DailyUserHours.office_id,
+        DailyUserHours.worked_seconds, DailyUserHours.record_count,
+    ).order_by(DailyUserHours.work_date)).all()
+    return [tuple(row) for row in offices], [tuple(row) for row in users]
+
+
+def test_check_out_matches_recompute(db, monkeypatch):
+    monkeypatch.setattr(settings, "TIMESHEET_TIMEZONE", "UTC")
+    record = AttendanceRecord(
+        user_id=1, office_id=1, check_in_time=datetime(2026, 3, 2, 22),
+        check_in_latitude=51.5, check_in_longitude=-0.1,
+    )
+    db.add(record)
+    db.flush()
+    record_check_in(db, record)
+    record.check_out_time = datetime(2026, 3, 3, 6)
+    record_check_out(db, record)
+    db.commit()
+    incremental = _rollups(db)
+
+    recompute_rollups(db, date(2026, 3, 2), date(2026, 3, 3))
+    db.commit()
+
+    assert incremental == _rollups(db)
+    offices, users = incremental
+    assert [(row[0], row[2], row[3], row[5]) for row in offices] == [
+        (date(2026, 3, 2), 1, 0, 2 * 3600),
+        (date(2026, 3, 3), 0, 1, 6 * 3600),
+    ]
+    assert [(row[0], row[3], row[4]) for row in users] == [
+        (date(2026, 3, 2), 2 * 3600, 1),
+        (date(2026, 3, 3), 6 * 3600, 0),
+    ]
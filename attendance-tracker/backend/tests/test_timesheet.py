@@ -0,0 +1,89 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.config import settings
+from app.core.timesheet import build_timesheet, record_worked_time, recompute_worked_time
+from app.models.models import AttendanceRecord, Office, User
+
+MONDAY = date(2026, 3, 2)
+TUESDAY = date(2026, 3, 3)
+
+
+@pytest.fixture
+def overnight(db, monkeypatch):
+    """One closed shift from Monday 22:00 to Tuesday 06:00 UTC."""
+    monkeypatch.setattr(settings, "TIMESHEET_TIMEZONE", "UTC")
+    db.add(User(id=1, email="night@example.com", username="night", hashed_password="x"))
+    db.add(Office(id=1, name="Depot", address="1 Night Road", latitude=51.5, longitude=-0.1, radius=100))
+    record = AttendanceRecord(
+        user_id=1, office_id=1,
+        check_in_time=datetime(2026, 3, 2, 22), check_out_time=datetime(2026, 3, 3, 6),
+        check_in_latitude=51.5, check_in_longitude=-0.1,
+    )
+    db.add(record)
+    db.commit()
+    return record
+
+
+def _rollup_at_check_out(db, record):
+    record_worked_time(db, record)
+    db.commit()
+    return None
+
+
+def _rollup_recomputed(db, record):
+    recompute_worked_time(db, MONDAY, TUESDAY)
+    db.commit()
+    return None
+
+
+def _raw_records(db, record):
+    # Not TIMESHEET_TIMEZONE, so the records are split directly; London is on UTC in March
+    return "Europe/London"
+
+
+SOURCES = [_rollup_at_check_out, _rollup_recomputed, _raw_records]
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_overnight_record_by_day(db, overnight, source):
+    tz_name = source(db, overnight)
+
+    rows = build_timesheet(db, MONDAY, TUESDAY, tz_name=tz_name, group_by="day")
+
+    assert [(row["period_start"], row["worked_seconds"], row["records"]) for row in rows] == [
+        ("2026-03-02", 2 * 3600, 1),
+        ("2026-03-03", 6 * 3600, 0),
+    ]
+
+
+@pytest.mark.parametrize("source", SOURCES)
+@pytest.mark.parametrize("group_by", ["week", "total"])
+def test_overnight_record_counted_once(db, overnight, source, group_by):
+    tz_name = source(db, overnight)
+
+    rows = build_timesheet(db, MONDAY, TUESDAY, tz_name=tz_name, group_by=group_by)
+
+    assert len(rows) == 1
+    assert rows[0]["period_start"] == "2026-03-02"
+    assert rows[0]["worked_seconds"] == 8 * 3600
+    assert rows[0]["records"] == 1
+
+
+def test_record_checked_in_before_range_not_counted(db, overnight):
+    recompute_worked_time(db, MONDAY, TUESDAY)
+    db.commit()
+
+    rows = build_timesheet(db, TUESDAY, TUESDAY, group_by="total")
+
+    assert rows[0]["worked_seconds"] == 6 * 3600
+    assert rows[0]["records"] == 0
+
+
+@pytest.mark.parametrize("group_by", ["day", "week", "total"])
+def test_empty_range(db, overnight, group_by):
+    recompute_worked_time(db, MONDAY, TUESDAY)
+    db.commit()
+
+    assert build_timesheet(db, date(2026, 4, 1), date(2026, 4, 30), group_by=group_by) == []
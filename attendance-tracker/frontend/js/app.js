@@ -46,6 +46,9 @@ async function initApp() {
             // Load attendance data
             await loadAttendanceData();
             
+            // Receive further changes as pushed events instead of polling
+            startEventStream();
+            
             // Record logout on window close/refresh
             window.addEventListener('beforeunload', async () => {
                 try {
@@ -96,4 +99,40 @@ async function loadAttendanceData() {
         console.error('Error loading attendance data:', error);
         showError(error.message);
     }
-}
\ No newline at end of file
+}
+
+/**
+ * Apply pushed status changes to the dashboard
+ */
+function startEventStream() {
+    eventStream.on('check_in', record => {
+        AttendanceService.updateStatusUI(record);
+        AttendanceService.applyRecord(record);
+    });
+    
+    eventStream.on('check_out', record => {
+        AttendanceService.updateStatusUI(null);
+        AttendanceService.applyRecord(record);
+    });
+    
+    // Presence events may have opened or closed a record
+    eventStream.on('geofence_enter', () => loadAttendanceData());
+    eventStream.on('geofence_exit', () => loadAttendanceData());
+    
+    // Geofences may have moved, so re-check the current position too
+    eventStream.on('offices_changed', async () => {
+        await locationService.loadOffices();
+        if (locationService.currentPosition) {
+            const { latitude, longitude } = locationService.currentPosition.coords;
+            locationService.checkGeofenceStatus(latitude, longitude);
+        }
+    });
+    
+    // Events were missed; reload everything once
+    eventStream.on('resync', () => {
+        loadAttendanceData();
+        locationService.loadOffices();
+    });
+    
+    eventStream.connect();
+}
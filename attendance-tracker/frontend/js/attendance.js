@@ -186,6 +186,7 @@ class AttendanceService {
      * @param {Array} records - The attendance records
      */
     static updateHistoryTable(records) {
+        AttendanceService.records = records;
         const tableBody = document.getElementById('history-body');
         tableBody.innerHTML = '';
         
@@ -216,6 +217,24 @@ class AttendanceService {
             tableBody.appendChild(row);
         });
     }
+
+    /**
+     * Add a new record to the history table or replace an updated one,
+     * without re-fetching the history
+     * @param {Object} record - The attendance record
+     */
+    static applyRecord(record) {
+        const records = (AttendanceService.records || []).slice();
+        const index = records.findIndex(existing => existing.id === record.id);
+        
+        if (index >= 0) {
+            records[index] = record;
+        } else {
+            records.unshift(record);
+        }
+        
+        AttendanceService.updateHistoryTable(records);
+    }
 }
 
 // DOM event listeners for attendance elements
@@ -245,15 +264,11 @@ document.addEventListener('DOMContentLoaded', () => {
             }, null);
             
             // Check in
-            await AttendanceService.checkIn(office.office_id, latitude, longitude);
+            const record = await AttendanceService.checkIn(office.office_id, latitude, longitude);
             
-            // Update UI
-            const status = await AttendanceService.getCurrentStatus();
-            AttendanceService.updateStatusUI(status);
-            
-            // Refresh history
-            const history = await AttendanceService.getHistory();
-            AttendanceService.updateHistoryTable(history);
+            // Update UI from the returned record; other open sessions get it pushed
+            AttendanceService.updateStatusUI(record);
+            AttendanceService.applyRecord(record);
             
             showError('Checked in successfully!');
         } catch (error) {
@@ -273,14 +288,11 @@ document.addEventListener('DOMContentLoaded', () => {
             const { latitude, longitude } = locationService.currentPosition.coords;
             
             // Check out
-            await AttendanceService.checkOut(latitude, longitude);
+            const record = await AttendanceService.checkOut(latitude, longitude);
             
-            // Update UI
+            // Update UI from the returned record; other open sessions get it pushed
             AttendanceService.updateStatusUI(null);
-            
-            // Refresh history
-            const history = await AttendanceService.getHistory();
-            AttendanceService.updateHistoryTable(history);
+            AttendanceService.applyRecord(record);
             
             showError('Checked out successfully!');
         } catch (error) {
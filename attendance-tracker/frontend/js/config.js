@@ -15,6 +15,10 @@ const CONFIG = {
     STORAGE_TOKEN_KEY: 'attendance_token',
     STORAGE_USER_KEY: 'attendance_user',
     
+    // Event stream reconnect delay, doubled after each failure up to the maximum
+    EVENTS_RETRY_MS: 3000,
+    EVENTS_MAX_RETRY_MS: 60000,
+    
     // Geofence settings
     GEOFENCE_RADIUS_METERS: 100,
     
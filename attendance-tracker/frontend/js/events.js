@@ -0,0 +1,133 @@
+/**
+ * Server-pushed status updates
+ */
+class EventStream {
+    constructor() {
+        this.handlers = {};
+        this.controller = null;
+        this.connected = false;
+        this.opened = false;
+        this.retryDelay = CONFIG.EVENTS_RETRY_MS;
+    }
+
+    /**
+     * Register a handler for an event
+     * @param {string} event - Event name, e.g. 'check_in'
+     * @param {Function} handler - Called with the event data
+     */
+    on(event, handler) {
+        this.handlers[event] = handler;
+    }
+
+    /**
+     * Open the event stream and keep it open until disconnect() is called.
+     * fetch is used instead of EventSource so the token can be sent as a
+     * header, as with every other request.
+     */
+    async connect() {
+        this.disconnect();
+        const controller = new AbortController();
+        this.controller = controller;
+
+        while (this.controller === controller && AuthService.isAuthenticated()) {
+            try {
+                const response = await fetch(`${CONFIG.API_URL}/attendance/events`, {
+                    method: 'GET',
+                    headers: {
+                        'Authorization': `Bearer ${AuthService.getToken()}`,
+                        'Accept': 'text/event-stream'
+                    },
+                    signal: controller.signal
+                });
+
+                if (response.status === 401) {
+                    break;
+                }
+
+                if (!response.ok || !response.body) {
+                    throw new Error('Failed to open event stream');
+                }
+
+                this.connected = true;
+                this.retryDelay = CONFIG.EVENTS_RETRY_MS;
+                if (this.opened) {
+                    // Events may have been missed while disconnected
+                    this.dispatch({ event: 'resync', data: null });
+                }
+                this.opened = true;
+                await this.read(response.body);
+            } catch (error) {
+                if (controller.signal.aborted) {
+                    break;
+                }
+                console.error('Event stream error:', error);
+            }
+
+            this.connected = false;
+            await new Promise(resolve => setTimeout(resolve, this.retryDelay));
+            this.retryDelay = Math.min(this.retryDelay * 2, CONFIG.EVENTS_MAX_RETRY_MS);
+        }
+
+        this.connected = false;
+    }
+
+    /**
+     * Close the event stream
+     */
+    disconnect() {
+        if (this.controller) {
+            this.controller.abort();
+            this.controller = null;
+        }
+        this.connected = false;
+    }
+
+    /**
+     * Read server-sent events from a response body until it ends
+     * @param {ReadableStream} body - The response body
+     */
+    async read(body) {
+        const reader = body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) {
+                return;
+            }
+
+            buffer += decoder.decode(value, { stream: true });
+            const blocks = buffer.split('\n\n');
+            buffer = blocks.pop();
+
+            blocks.forEach(block => {
+                const data = block.split('\n')
+                    .filter(line => line.startsWith('data: '))
+                    .map(line => line.slice(6))
+                    .join('\n');
+                if (data) {
+                    this.dispatch(JSON.parse(data));
+                }
+            });
+        }
+    }
+
+    /**
+     * Call the handler registered for a message
+     * @param {Object} message - Message with event name and data
+     */
+    dispatch(message) {
+        const handler = this.handlers[message.event];
+        if (handler) {
+            try {
+                handler(message.data);
+            } catch (error) {
+                console.error(`Error handling ${message.event} event:`, error);
+            }
+        }
+    }
+}
+
+// Create a global instance of the event stream
+const eventStream = new EventStream();